@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 
 class FilterAll(BaseModel):
@@ -10,3 +11,16 @@ class FilterAll(BaseModel):
 class FilterByDate(BaseModel):
     start: str
     end: str
+
+
+class ObservationIn(BaseModel):
+    date: str
+    season: str
+    field_stage: str
+    count: float
+    threshold_status: str
+    action: int = 0
+    pest: str = "RBB"
+
+class ObservationBatch(BaseModel):
+    observations: List[ObservationIn]
@@ -1,21 +1,198 @@
 # data_loader.py
-import pandas as pd, os
+import pandas as pd, os, hashlib, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from api.utils.dataset_schema import (
+    INGEST_SOURCE,
+    SOURCE_COLUMN,
+    apply_schema,
+    concat_datasets,
+    print_memory_report,
+    read_partition,
+)
+from api.utils.tracing import traced
+from api.utils.warmup import mark_failed, mark_loading, mark_ready, register_loader
 
-# Module-level variable
-df = None
-
-try:
-    _dataPath = Path(os.getcwd()) / "data"
-    _dataName = os.listdir(_dataPath).pop()
-    _dataUrl = _dataPath / _dataName
-    print(_dataUrl)
-    df = pd.read_csv(rf"{_dataUrl}")
-    df['Date'] = pd.to_datetime(df['Date'])
-    if df is None:
-        print("Data loading failed.")
+# Current dataset; loaded on first use (see load_dataset), not at import
+_df = None
+
+# Content hash of the loaded dataset; changes whenever the data changes
+dataset_version = None
+
+# Callbacks run as fn(df, version) whenever the dataset is replaced
+_listeners = []
+
+# Callbacks run as fn(new_rows, df, version) when observations are appended
+_append_listeners = []
+
+# Serializes dataset writers (readers just take the current reference)
+_write_lock = threading.Lock()
+
+# The initial load from data/ is attempted once
+_load_attempted = False
+
+# Processes parsing data files in parallel (default: one per CPU)
+DATA_LOAD_WORKERS = int(os.getenv("DATA_LOAD_WORKERS", "0")) or os.cpu_count() or 1
+
+# Below this total size the files are parsed in-process (starting workers costs more)
+PARALLEL_LOAD_MIN_BYTES = int(float(os.getenv("PARALLEL_LOAD_MIN_MB", "16")) * 1024 * 1024)
+
+
+def data_files():
+    """Every CSV in data/ (one per site/season partition), in name order."""
+    return sorted(path for path in (Path(os.getcwd()) / "data").glob("*.csv") if path.is_file())
+
+
+def _read_partitions(paths):
+    workers = min(len(paths), DATA_LOAD_WORKERS)
+    if workers <= 1 or sum(path.stat().st_size for path in paths) < PARALLEL_LOAD_MIN_BYTES:
+        return [read_partition(path) for path in paths]
+    # spawn, not fork: the warm-up and pool threads may hold locks at fork time
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(read_partition, paths))
+
+
+def read_data_files(paths):
+    """
+    Parse the data files in parallel and merge them into one date-sorted
+    frame. Returns (frame, version); a single file keeps its own hash as version.
+    """
+    partitions = _read_partitions(paths)
+    digests = [digest for digest, _ in partitions]
+    frames = [frame for _, frame in partitions]
+    if len(frames) == 1:
+        merged, version = frames[0], digests[0][:16]
     else:
-        print("Data loaded successfully.")
+        merged = concat_datasets(*frames)
+        version = hashlib.sha1(
+            "\n".join(f"{path.name}:{digest}" for path, digest in zip(paths, digests)).encode()
+        ).hexdigest()[:16]
+    if not merged['Date'].is_monotonic_increasing:
+        merged = merged.sort_values('Date', kind='stable')
+    return merged.reset_index(drop=True), version
+
+
+def load_dataset():
+    """
+    Load the CSVs from data/ on first call and notify the dataset listeners
+    (metadata, alerts, forecast...). Later calls return the current dataset.
+    """
+    global _df, dataset_version, _load_attempted
+    if _load_attempted:
+        return _df
+    with _write_lock:
+        if _load_attempted:
+            return _df
+        mark_loading("data")
+        try:
+            paths = data_files()
+            if not paths:
+                raise FileNotFoundError("no CSV files in data/")
+            print(f"📂 Loading {len(paths)} data file(s): {', '.join(path.name for path in paths)}")
+            new_df, version = read_data_files(paths)
+            _df, dataset_version = new_df, version
+            print(f"Data loaded successfully. (version: {dataset_version})")
+            print_memory_report(new_df)
+            _notify(_listeners, new_df, version)
+            mark_ready("data", rows=len(new_df), version=version)
+        except Exception as error:
+            print(f"An exception occurred: {error}")
+            mark_failed("data", error)
+        _load_attempted = True
+    return _df
+
+
+register_loader("data", load_dataset)
+
+
+def __getattr__(name):
+    # `from api.data_loader import df` keeps working, loading on first access
+    if name == "df":
+        return load_dataset()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_dataset():
+    """Return the currently loaded dataset (loading it on first use)."""
+    return _df if _load_attempted else load_dataset()
+
+
+def loaded_dataset():
+    """Return the dataset if it has been loaded, else None (never triggers a load)."""
+    return _df
+
+
+def get_dataset_version():
+    """Return the version tag of the currently loaded dataset (None until loaded)."""
+    return dataset_version
+
+
+def frame_version(frame):
+    """Content hash of a DataFrame, used as the version of an in-memory dataset."""
+    hashed = pd.util.hash_pandas_object(frame, index=False).values
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def on_dataset_change(callback):
+    """Register a callback run as callback(df, version) after the dataset changes."""
+    _listeners.append(callback)
+    return callback
+
+
+def on_observations_appended(callback):
+    """Register a callback run as callback(new_rows, df, version) after an append."""
+    _append_listeners.append(callback)
+    return callback
+
+
+def _notify(listeners, *args):
+    for callback in list(listeners):
+        try:
+            callback(*args)
+        except Exception as error:
+            print(f"⚠️ Dataset change listener failed: {error}")
+
+
+@traced("dataset.replace")
+def replace_dataset(new_df):
+    """Swap in a new dataset, bump the version and notify listeners."""
+    global _df, dataset_version, _load_attempted
+    new_df = apply_schema(new_df)
+    with _write_lock:
+        version = frame_version(new_df)
+        _df, dataset_version, _load_attempted = new_df, version, True
+        _notify(_listeners, new_df, version)
+        mark_ready("data", rows=len(new_df), version=version)
+    return version
+
 
-except Exception as error:
-    print(f"An exception occurred: {error}")
+@traced("dataset.append")
+def append_observations(rows):
+    """
+    Ingest new observation rows (same columns as the CSV).
+    Incremental listeners run first with only the new rows, then the
+    regular dataset-change listeners.
+    """
+    global _df, dataset_version
+    load_dataset()
+    rows = apply_schema(rows)
+    with _write_lock:
+        df = _df
+        if df is not None and SOURCE_COLUMN in df.columns and SOURCE_COLUMN not in rows.columns:
+            rows[SOURCE_COLUMN] = pd.Categorical([INGEST_SOURCE] * len(rows))
+        # Continue the existing integer index so row ids stay stable
+        start = 0 if df is None or df.empty else int(df.index.max()) + 1
+        rows.index = pd.RangeIndex(start, start + len(rows))
+        new_df = rows if df is None else concat_datasets(df, rows)
+        if not new_df['Date'].is_monotonic_increasing:
+            new_df = new_df.sort_values('Date', kind='stable')
+        # Chain the version so an append only hashes the new rows
+        version = hashlib.sha1(
+            f"{dataset_version}:{frame_version(rows)}".encode()
+        ).hexdigest()[:16]
+        _df, dataset_version = new_df, version
+        _notify(_append_listeners, rows, new_df, version)
+        _notify(_listeners, new_df, version)
+        mark_ready("data", rows=len(new_df), version=version)
+    return version
@@ -6,6 +6,8 @@ import os
 from pymongo import MongoClient
 from pymongo.server_api import ServerApi
 from dotenv import load_dotenv
+from api.utils.metrics import mongo_command_listener
+from api.utils.tracing import mongo_command_tracer
 
 load_dotenv()
 
@@ -18,12 +20,18 @@ if not MONGODB_URI:
 client = MongoClient(
     MONGODB_URI,
     server_api=ServerApi("1"),
+    event_listeners=[mongo_command_listener, mongo_command_tracer],
 )
 
 # Get database
 db = client.get_default_database()
 users_collection = db["users"]
 
+# Alert issue times and per-user read markers (see api/utils/alert_engine.py)
+alerts_collection = db["alerts"]
+alert_reads_collection = db["alert_reads"]
+alert_read_state_collection = db["alert_read_state"]
+
 # Create indexes
 def create_indexes():
     """Create database indexes for performance."""
@@ -32,6 +40,9 @@ def create_indexes():
         users_collection.create_index("status")
         users_collection.create_index("role")
         users_collection.create_index([("createdAt", -1)])
+        alert_reads_collection.create_index([("userId", 1), ("alertId", 1)], unique=True)
+        alert_reads_collection.create_index([("userId", 1), ("readAt", 1)])
+        alert_read_state_collection.create_index("userId", unique=True)
         print("✅ User database indexes created")
     except Exception as e:
         print(f"⚠️  Index creation warning: {e}")
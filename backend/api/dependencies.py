@@ -3,12 +3,13 @@ FastAPI dependencies for authentication and authorization.
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict
+from typing import Dict, Optional
 from api.db import users_collection
 from api.auth_utils import verify_token
 from bson import ObjectId
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
@@ -41,6 +42,19 @@ async def get_current_user(
     return user
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[Dict]:
+    """Get the authenticated user if a valid token was sent, else None."""
+    if not credentials:
+        return None
+    payload = verify_token(credentials.credentials)
+    user_id = payload.get("sub") if payload else None
+    if not user_id or not ObjectId.is_valid(user_id):
+        return None
+    return users_collection.find_one({"_id": ObjectId(user_id)})
+
+
 async def require_admin(
     current_user: Dict = Depends(get_current_user)
 ) -> Dict:
@@ -0,0 +1,198 @@
+"""
+Response compression middleware (brotli / gzip).
+
+Small responses are sent as-is; anything at or above the size threshold is
+compressed with the best encoding the client accepts. Responses that carry
+an ETag (see conditional.py) are version-derived, so their compressed bytes
+are cached per (ETag, encoding) and compressed only once per dataset version.
+"""
+import gzip
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.tracing import traced
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Bodies larger than this are compressed in a worker thread
+OFFLOAD_SIZE = 256 * 1024
+
+# Precompressed payload cache bounds
+CACHE_MAX_ENTRIES = 128
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/")
+
+
+@traced("compress")
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header (honours q=0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressedPayloadCache:
+    """Small LRU of compressed bodies keyed by (etag, encoding)."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        payload = self.entries.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, key: Tuple[str, str], payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = payload
+        self.size += len(payload)
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+payload_cache = CompressedPayloadCache()
+
+
+class CompressionMiddleware:
+    """Compress buffered responses above a size threshold."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.chunks = []
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message.get("headers", []))
+            content_type = headers.get("content-type", "")
+            status = message["status"]
+            if status == 304:
+                MutableHeaders(raw=message.setdefault("headers", [])).add_vary_header("Accept-Encoding")
+                self.passthrough = True
+                await self._send(message)
+            elif (
+                status < 200
+                or status in (204, 206)
+                or "content-encoding" in headers
+                or content_type.startswith(SKIP_CONTENT_TYPES)
+            ):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        self.chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            if len(self.chunks) == 1 and not self.chunks[0]:
+                return
+            # Streaming response: do not buffer, send uncompressed
+            self.passthrough = True
+            await self._send(self.start_message)
+            for chunk in self.chunks:
+                await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+            self.chunks = []
+            return
+
+        body = b"".join(self.chunks)
+        self.chunks = []
+        if len(body) < self.minimum_size:
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        headers = MutableHeaders(raw=self.start_message.setdefault("headers", []))
+        etag = headers.get("etag")
+        key = (etag, self.encoding) if etag else None
+        compressed = payload_cache.get(key) if key else None
+        if compressed is None:
+            if len(body) > OFFLOAD_SIZE:
+                compressed = await anyio.to_thread.run_sync(compress, body, self.encoding)
+            else:
+                compressed = compress(body, self.encoding)
+            if key:
+                payload_cache.put(key, compressed)
+
+        headers["content-encoding"] = self.encoding
+        headers["content-length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        if etag and etag.endswith('"'):
+            # Each encoding is a distinct representation; conditional.py strips the suffix
+            headers["etag"] = f'{etag[:-1]}-{self.encoding}"'
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
@@ -0,0 +1,124 @@
+"""
+Conditional GET support for dataset-derived endpoints.
+
+Responses of these endpoints only change when the dataset or the model
+changes, so their ETag is derived from the dataset version and the model
+fingerprint (and for forecasts the backtest stats behind the intervals)
+instead of the response body. A matching If-None-Match is
+answered with 304 before the route runs at all. The versions are checked
+again once the body is produced, and a response that raced a dataset or
+model change goes out without an ETag rather than under the old one.
+"""
+import hashlib
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.data_loader import get_dataset_version
+from api.model_loader import get_model_fingerprint
+from api.utils.forecast_utils import get_error_stats_version
+
+# Version sources available to cacheable routes
+VERSION_SOURCES: Dict[str, Callable[[], Optional[str]]] = {
+    "dataset": get_dataset_version,
+    "model": get_model_fingerprint,
+    # Backtest stats setting the forecast intervals
+    "intervals": get_error_stats_version,
+}
+
+# Path -> version sources the response depends on
+CACHEABLE_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "/filters/basic": ("dataset",),
+    "/filters/advanced": ("dataset",),
+    "/forecast/predict": ("dataset", "model", "intervals"),
+    "/forecast/kpi": ("dataset", "model"),
+    "/dashboard/forecast": ("dataset", "model", "intervals"),
+}
+
+# Seconds a client may reuse a response without revalidating (0 = always revalidate)
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "0"))
+
+# Suffixes added to the ETag by content-encoding layers
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def strip_etag(tag: str) -> str:
+    """Normalize an entity tag for comparison (weak prefix, encoding suffix)."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    target = strip_etag(etag)
+    return any(strip_etag(tag) == target for tag in if_none_match.split(","))
+
+
+def compute_etag(path: str, query_string: bytes, sources: Tuple[str, ...]) -> Optional[str]:
+    """Derive the ETag for a request, or None if a version is unknown."""
+    versions = [VERSION_SOURCES[source]() for source in sources]
+    if any(version is None for version in versions):
+        return None
+    query = "&".join(sorted(query_string.decode("latin-1").split("&")))
+    key = "|".join([path, query, *versions])
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+class ConditionalGetMiddleware:
+    """Add version-derived ETags and answer If-None-Match with 304."""
+
+    def __init__(self, app: ASGIApp, max_age: int = CACHE_MAX_AGE):
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}, must-revalidate"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        sources = CACHEABLE_ROUTES.get(scope["path"].rstrip("/") or "/")
+        etag = sources and compute_etag(scope["path"], scope["query_string"], sources)
+        if not etag:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and etag_matches(etag, if_none_match):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", self.cache_control.encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] == 200
+                # The body may already reflect a newer version than the ETag
+                and compute_etag(scope["path"], scope["query_string"], sources) == etag
+            ):
+                headers = [
+                    (k, v) for k, v in message.get("headers", [])
+                    if k.lower() not in (b"etag", b"cache-control")
+                ]
+                headers.append((b"etag", etag.encode()))
+                headers.append((b"cache-control", self.cache_control.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
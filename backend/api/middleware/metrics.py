@@ -0,0 +1,57 @@
+"""
+Request metrics middleware.
+
+Records a latency histogram and a request counter per (method, route
+template) plus an in-flight gauge. Routes are labelled by their path
+template ("/alerts/{alert_id}/read"), never the raw path, so label
+cardinality stays bounded.
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or route.path
+    # Mounted apps (e.g. /uploads) only extend root_path
+    mount = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+    return f"{mount}/*" if mount else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            method, route = scope["method"], route_label(scope)
+            http_request_duration_seconds.observe(elapsed, method, route)
+            http_requests_total.inc(method, route, str(status_code))
@@ -0,0 +1,77 @@
+"""
+Static file serving for content-addressed uploads.
+
+Files named by content hash never change, so they get a strong ETag derived
+from the hash, a long-lived immutable Cache-Control header and cheap 304
+responses. Clients that accept WebP receive the precompressed variant when
+one exists.
+"""
+import os
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from api.utils.upload_storage import is_content_addressed
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+WEBP_SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+class NotModified(Response):
+    """Bare 304 response carrying only the cache validators."""
+
+    def __init__(self, headers: dict):
+        super().__init__(status_code=304, headers=headers)
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with strong ETags and immutable caching for hashed files."""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        stem, ext = os.path.splitext(os.path.basename(full_path))
+        if not is_content_addressed(stem):
+            # Legacy uploads (timestamp names) keep the default behaviour
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        etag = f'"{stem}"'
+        vary_accept = ext.lower() in WEBP_SOURCE_EXTENSIONS
+
+        # Serve the WebP variant when the client accepts it
+        if vary_accept and "image/webp" in request_headers.get("accept", ""):
+            webp_path = os.path.join(os.path.dirname(full_path), f"{stem}.webp")
+            try:
+                webp_stat = os.stat(webp_path)
+                full_path, stat_result = webp_path, webp_stat
+                etag = f'"{stem}-webp"'
+            except OSError:
+                pass
+
+        cache_headers = {"etag": etag, "cache-control": IMMUTABLE_CACHE_CONTROL}
+        if vary_accept:
+            cache_headers["vary"] = "Accept"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(etag, if_none_match):
+            return NotModified(cache_headers)
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if response.status_code == 304:
+            return NotModified(cache_headers)
+        for key, value in cache_headers.items():
+            response.headers[key] = value
+        return response
@@ -0,0 +1,58 @@
+"""
+Per-request tracing middleware and traced JSON rendering.
+
+Sampled requests (see api/utils/tracing.py) get a server span covering the
+whole request, including compression, and an `X-Trace-Id` response header
+to find the exported trace. The default response class times JSON
+serialization as its own span.
+"""
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.middleware.metrics import route_label
+from api.utils.tracing import TRACE_HEADER, export, request_span, sample_request, span
+
+
+class TracedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with span("serialize.json") as serialize_span:
+            body = super().render(content)
+            serialize_span.set_attribute("http.response.body.size", len(body))
+        return body
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        trace = sample_request(headers.get(TRACE_HEADER), headers.get("traceparent"))
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["x-trace-id"] = trace.trace_id
+            await send(message)
+
+        method = scope["method"]
+        with request_span(trace, method, **{"http.method": method, "http.target": scope["path"]}) as root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_label(scope)
+                root.name = f"{method} {route}"
+                root.set_attribute("http.route", route)
+                root.set_attribute("http.status_code", status_code)
+        export(trace)
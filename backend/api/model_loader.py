@@ -1,15 +1,161 @@
 from pathlib import Path
 import os
-import xgboost as xgb
-
-try:
-  _modelName = os.listdir(os.path.join(os.getcwd(), "models")).pop()
-  _modelUrl = Path(os.getcwd()) / "models" / _modelName
-  model = xgb.XGBRegressor()
-  model.load_model(str(_modelUrl))
-  if model:
-    print(f"Model {_modelName} loaded successfully.")
-  
-  
-except Exception as error:
-  print(f"An exception occurred: {error}")
+import json
+import hashlib
+import threading
+
+from api.utils.warmup import mark_failed, mark_loading, mark_ready, register_loader
+
+# Content hash of the loaded model file; used to version forecast responses
+model_fingerprint = None
+
+MODEL_FOLDER = "models"
+MODEL_SUFFIXES = (".json", ".ubj", ".bin", ".model")
+
+# Version metadata published with a model: models/<stem>.meta.json
+METADATA_SUFFIX = ".meta.json"
+
+# Metadata of the loaded model ({} for models published without it)
+model_metadata = {}
+
+# Loaded on first use (see load_model); xgboost is only imported then
+_model = None
+_load_attempted = False
+_lock = threading.Lock()
+
+# Callbacks run as fn(model, fingerprint) when reload_model swaps the model
+_listeners = []
+
+
+def metadata_path(model_path):
+  """Sidecar holding the version metadata of `model_path`."""
+  model_path = Path(model_path)
+  return model_path.with_name(model_path.stem + METADATA_SUFFIX)
+
+
+def file_fingerprint(model_path):
+  """Content hash of a model file (what model_fingerprint is for the loaded one)."""
+  return hashlib.sha1(Path(model_path).read_bytes()).hexdigest()[:16]
+
+
+def read_model_metadata(model_path):
+  try:
+    return json.loads(metadata_path(model_path).read_text())
+  except (OSError, ValueError):
+    return {}
+
+
+def latest_model_file(folder=MODEL_FOLDER):
+  """
+  Newest model file in `folder` (by modification time, then name), or None.
+  Only model formats count, so other files in the folder are never loaded.
+  """
+  folder = Path(os.getcwd()) / folder
+  if not folder.is_dir():
+    return None
+  files = [
+    path for path in folder.iterdir()
+    if path.is_file() and path.suffix in MODEL_SUFFIXES and not path.name.endswith(METADATA_SUFFIX)
+  ]
+  if not files:
+    return None
+  return max(files, key=lambda path: (path.stat().st_mtime, path.name))
+
+
+def load_model():
+  """Load the model from models/ on first call; later calls return it."""
+  global _model, model_fingerprint, model_metadata, _load_attempted
+  if _load_attempted:
+    return _model
+  with _lock:
+    if _load_attempted:
+      return _model
+    mark_loading("model")
+    try:
+      import xgboost as xgb
+
+      _modelUrl = latest_model_file()
+      if _modelUrl is None:
+        raise FileNotFoundError(f"No model file in {MODEL_FOLDER}/")
+      _modelName = _modelUrl.name
+      model = xgb.XGBRegressor()
+      model.load_model(str(_modelUrl))
+      model_fingerprint = file_fingerprint(_modelUrl)
+      model_metadata = read_model_metadata(_modelUrl)
+      _model = model
+      print(f"Model {_modelName} loaded successfully.")
+      mark_ready("model", name=_modelName, fingerprint=model_fingerprint,
+                 version=model_metadata.get("version"))
+    except Exception as error:
+      print(f"An exception occurred: {error}")
+      mark_failed("model", error)
+    _load_attempted = True
+  return _model
+
+
+register_loader("model", load_model)
+
+
+def __getattr__(name):
+  # `from api.model_loader import model` keeps working, loading on first access
+  if name == "model":
+    return load_model()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_model():
+  """Return the loaded model (loading it on first use)."""
+  return _model if _load_attempted else load_model()
+
+
+def get_model_fingerprint():
+  """Return the fingerprint of the currently loaded model (None until loaded)."""
+  return model_fingerprint
+
+
+def get_model_metadata():
+  """Version metadata of the loaded model ({} if it has none)."""
+  return model_metadata
+
+
+def on_model_change(callback):
+  """Register fn(model, fingerprint), called after reload_model swaps in another model."""
+  _listeners.append(callback)
+  return callback
+
+
+def reload_model():
+  """
+  Load the newest model file again (e.g. after a retrained model was
+  published) and notify listeners if it differs. A failed load keeps the
+  current model.
+  """
+  global _load_attempted
+  previous = model_fingerprint
+  with _lock:
+    _load_attempted = False
+  model = load_model()
+  if model_fingerprint != previous:
+    for callback in list(_listeners):
+      try:
+        callback(model, model_fingerprint)
+      except Exception as error:
+        print(f"⚠️ Model change listener failed: {error}")
+  return model
+
+
+def refresh_model():
+  """
+  Reload if the newest model file is not the loaded one (e.g. the registry
+  check downloaded a model while the warm-up was loading, or after a failed
+  load). Before the first load this does nothing: that load picks it up.
+  """
+  with _lock:
+    # Waits for a load in progress
+    if not _load_attempted:
+      return _model
+    latest = latest_model_file()
+    if latest is None or (_model is not None and file_fingerprint(latest) == model_fingerprint):
+      return _model
+  print(f"🔄 Newer model {latest.name} available, reloading")
+  return reload_model()
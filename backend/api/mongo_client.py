@@ -1,12 +1,16 @@
 import gridfs
+import json
 import os
+import tempfile
 import certifi
-import xgboost as xgb
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure
 from pymongo.server_api import ServerApi
 from pathlib import Path
 from dotenv import load_dotenv
+from api.utils.metrics import mongo_command_listener
+from api.utils.tracing import mongo_command_tracer
+from api.model_loader import latest_model_file, metadata_path
 
 # Load environment variables
 load_dotenv()
@@ -25,7 +29,7 @@ LOCAL_MODEL_FOLDER = "models"
 def get_latest_local_model():
     """
     FALLBACK FUNCTION:
-    Finds the most recently modified file in the local 'models' directory.
+    Finds the most recently modified model file in the local 'models' directory.
     """
     try:
         base_path = os.getcwd()
@@ -35,40 +39,71 @@ def get_latest_local_model():
             print("❌ Offline mode failed: Model directory does not exist.")
             return None
 
-        # List all files in the directory
-        files = [
-            os.path.join(full_folder_path, f) for f in os.listdir(full_folder_path)
-        ]
+        # Newest model file (same choice as api.model_loader)
+        latest_file = latest_model_file(LOCAL_MODEL_FOLDER)
 
-        # Filter out directories, keep only files
-        files = [f for f in files if os.path.isfile(f)]
-
-        if not files:
+        if latest_file is None:
             print("❌ Offline mode failed: No models found locally.")
             return None
 
-        # Sort by modification time (newest first)
-        latest_file = max(files, key=os.path.getmtime)
-        print(f"📂 OFFLINE MODE: Selected local model: {os.path.basename(latest_file)}")
-        return latest_file
+        print(f"📂 OFFLINE MODE: Selected local model: {latest_file.name}")
+        return str(latest_file)
 
     except Exception as e:
         print(f"❌ Error finding local model: {e}")
         return None
 
 
-def get_latest_model():
-    print("🔌 Connecting to MongoDB...")
-
+def _models_client():
     # 1. SET TIMEOUT (e.g., 3000ms = 3 seconds)
     # This prevents the server from hanging if there is no internet.
-    client = MongoClient(
+    return MongoClient(
         URI,
         server_api=ServerApi("1"),
+        event_listeners=[mongo_command_listener, mongo_command_tracer],
         tlsCAFile=certifi.where(),
         serverSelectionTimeoutMS=3000,
     )
 
+
+def publish_model(model_path, metadata):
+    """
+    Upload a model file to GridFS with its version metadata. Servers pick
+    it up as the newest upload on their next registry check; errors are raised.
+    """
+    model_path = Path(model_path)
+    client = _models_client()
+    try:
+        fs = gridfs.GridFS(client[DB_NAME])
+        file_id = fs.put(model_path.read_bytes(), filename=model_path.name, metadata=metadata)
+        print(f"⬆️ Published {model_path.name} to GridFS ({file_id})")
+        return str(file_id)
+    finally:
+        client.close()
+
+
+def _write_atomic(path, data):
+    """
+    Write to a temp file in the same folder, then rename it into place, so
+    a concurrent model load never reads a half-written file (the temp name
+    has no model suffix, so latest_model_file skips it).
+    """
+    folder = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".", suffix=".download")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def get_latest_model():
+    print("🔌 Connecting to MongoDB...")
+
+    client = _models_client()
+
     try:
         # 2. Attempt Connection
         client.admin.command("ping")
@@ -108,11 +143,15 @@ def get_latest_model():
             else:
                 print(f"⚠️ Size mismatch. Redownloading...")
 
+        # Version metadata published with the model (see api.utils.training),
+        # in place before the model so a server never loads one without it
+        if latest_file.get("metadata"):
+            _write_atomic(metadata_path(final_file_path), json.dumps(latest_file["metadata"], indent=2).encode())
+
         if should_download:
             print(f"⬇️ Downloading {mongo_filename}...")
             grid_out = fs.get(file_id)
-            with open(final_file_path, "wb") as f:
-                f.write(grid_out.read())
+            _write_atomic(final_file_path, grid_out.read())
             print(f"✅ Download complete.")
 
         return final_file_path
@@ -135,6 +174,8 @@ def verify_and_load_model(model_path):
 
     print("\n--- 🧪 Verifying Model Integrity ---")
     try:
+        import xgboost as xgb
+
         model = xgb.XGBRegressor()
         model.load_model(model_path)
         params = model.get_params()
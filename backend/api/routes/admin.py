@@ -1,10 +1,18 @@
 """
 Admin routes: user approval, pending users management.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from api.models.user import PendingUser, user_to_pending_user
 from api.db import users_collection
 from api.dependencies import require_admin
+from api.data_loader import get_dataset
+from api.utils.executors import executor_stats, training_executor
+from api.model_loader import get_model_fingerprint, get_model_metadata, reload_model
+from api.utils.training import MODES, REGISTRIES, TrainingBusy, retrain
+from api.utils.partitions import get_partition_index
+from api.utils.profiler import ProfilerBusy, sample_cpu, trace_allocations
 from bson import ObjectId
 
 admin_router = APIRouter(prefix="/admin", tags=["admin"])
@@ -67,3 +75,109 @@ async def reject_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pending user not found",
         )
+
+
+@admin_router.get("/executors")
+async def get_executor_stats(
+    current_user: dict = Depends(require_admin),
+):
+    """Worker pool limits and queue metrics (admin only)."""
+    return {"success": True, "data": executor_stats()}
+
+
+@admin_router.get("/dataset/partitions")
+async def get_dataset_partitions(
+    current_user: dict = Depends(require_admin),
+):
+    """Year partitions of the loaded dataset with their pruning statistics (admin only)."""
+    await run_in_threadpool(get_dataset)
+    index = get_partition_index()
+    if index is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset is not partitioned")
+    return {"success": True, "data": index.stats()}
+
+
+@admin_router.get("/profile/cpu")
+async def profile_cpu(
+    duration: float = Query(5.0, gt=0, le=60, description="Sampling time in seconds"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Sampling interval in milliseconds"),
+    include_idle: bool = Query(False, description="Keep samples of threads that are only waiting"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Sample this worker's thread stacks for `duration` seconds (admin only).
+    Returns collapsed stacks for flamegraph.pl / speedscope, or JSON with
+    the same text plus sampling details.
+    """
+    try:
+        result = await run_in_threadpool(sample_cpu, duration, interval_ms / 1000, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if format == "json":
+        return {"success": True, "data": result}
+    return PlainTextResponse(result["collapsed"], headers={"X-Profile-Samples": str(result["samples"])})
+
+
+@admin_router.get("/profile/memory")
+async def profile_memory(
+    duration: float = Query(10.0, gt=0, le=300, description="Seconds between the two snapshots"),
+    top: int = Query(30, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|traceback)$"),
+    path_filter: str = Query(None, description="Only allocations with this path in their stack (e.g. api/utils)"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Track allocation growth with tracemalloc over `duration` seconds (admin only).
+    group_by=traceback adds collapsed allocation stacks weighted by bytes.
+    """
+    try:
+        result = await run_in_threadpool(trace_allocations, duration, top, group_by, path_filter)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return {"success": True, "data": result}
+
+
+@admin_router.get("/model")
+async def get_model_info(
+    current_user: dict = Depends(require_admin),
+):
+    """Fingerprint and version metadata of the loaded model (admin only)."""
+    return {
+        "success": True,
+        "data": {"fingerprint": get_model_fingerprint(), "metadata": get_model_metadata()},
+    }
+
+
+@admin_router.post("/model/train")
+async def train_model(
+    mode: str = Query("full", pattern=f"^({'|'.join(MODES)})$", description="full: grid search and refit; warm_start: continue the loaded model"),
+    publish: str = Query("local", pattern=f"^({'|'.join(REGISTRIES)}|none)$", description="Registry to publish the model to"),
+    activate: bool = Query(True, description="Serve the published model from this worker right away"),
+    since: str = Query(None, description="warm_start: train on observations after this date (YYYY-MM-DD)"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Retrain the forecast model on the loaded dataset (admin only) and publish
+    it with its version metadata. Runs on the single-worker training pool
+    (one more request may wait there, further ones get 503); the grid search
+    fans out over TRAINING_WORKERS processes.
+    """
+    try:
+        metadata = await training_executor.run(_train_model, mode, publish, activate, since)
+    except TrainingBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {"success": True, "data": metadata}
+
+
+def _train_model(mode, publish, activate, since):
+    metadata = retrain(mode, None if publish == "none" else publish, since=since)
+    # The published file is the newest in models/, so a reload picks it
+    if activate and publish != "none":
+        reload_model()
+        metadata["active"] = get_model_fingerprint() == metadata["fingerprint"]
+    return metadata
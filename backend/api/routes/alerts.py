@@ -1,24 +1,40 @@
 """
 Alerts and notifications API endpoints.
 """
-from fastapi import APIRouter, Query
-from typing import Optional, List, Dict
-import pandas as pd
-from datetime import datetime, timedelta
-from api.data_loader import df
-from api.utils.dashboard_utils import filter_dataset
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional, Dict
+from api.dependencies import get_optional_user
+from api.utils.alert_engine import alert_engine
 
 alerts_router = APIRouter(prefix="/alerts", tags=["alerts"])
 
 
+def _user_key(current_user: Optional[Dict]) -> Optional[str]:
+    return str(current_user["_id"]) if current_user else None
+
+
+def _require_user_key(current_user: Optional[Dict]) -> str:
+    # Read state is per user; anonymous callers would all share one
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sign in to mark alerts as read",
+        )
+    return _user_key(current_user)
+
+
 @alerts_router.get("/")
 def get_alerts(
     limit: Optional[int] = Query(10, description="Maximum number of alerts to return"),
     unread_only: Optional[bool] = Query(False, description="Return only unread alerts"),
+    category: Optional[str] = Query(None, description="Only return alerts of this category"),
+    current_user: Optional[Dict] = Depends(get_optional_user),
 ):
     """
     Get system alerts and notifications.
     Returns AlertRecord[] compatible with frontend.
+    Alerts are evaluated incrementally at ingest time; this is a top-k
+    query over the alert index with the caller's read state applied.
     
     Frontend expects:
     {
@@ -38,95 +54,12 @@ def get_alerts(
         }
     }
     """
-    alerts: List[Dict] = []
-    
-    # Get all data (not just last 30 days) to ensure alerts are generated
-    # Sort by date descending to get most recent first
-    all_df = df.sort_values('Date', ascending=False)
-    
-    # Generate threshold breach alerts from all data
-    threshold_breaches = all_df[
-        all_df['Threshold Status'].isin(['Economic Threshold', 'Economic Damage'])
-    ].head(limit * 2)  # Get more to ensure we have enough alerts
-    
-    for idx, row in threshold_breaches.head(limit).iterrows():
-        threshold_value = 10.0 if 'Economic Threshold' in str(row['Threshold Status']) else 5.0
-        count = float(row['Pest Count/Damage'])
-        
-        alerts.append({
-            'id': f"alert-threshold-{idx}",
-            'title': f"Critical pest threshold exceeded",
-            'message': f"Black Rice Bug count ({count}) surpassed threshold ({threshold_value}) in {row['Field Stage']} stage. Immediate action recommended.",
-            'type': 'alert',
-            'timestamp': row['Date'].isoformat() if isinstance(row['Date'], pd.Timestamp) else str(row['Date']),
-            'read': False,
-            'priority': 'high',
-            'category': 'threshold',
-            'metadata': {
-                'pestType': 'Black Rice Bug',
-                'location': row.get('Field Stage', 'Unknown'),
-                'count': count,
-                'threshold': threshold_value,
-            }
-        })
-    
-    # Generate forecast warnings (if forecast indicates high risk)
-    # This would typically come from forecast data, but for now we'll use recent trends
-    if len(threshold_breaches) > 5:
-        alerts.append({
-            'id': 'alert-forecast-1',
-            'title': 'Forecast: Elevated Black Rice Bug risk',
-            'message': 'Model projects rising counts over the next 7 days. Prepare interventions.',
-            'type': 'warning',
-            'timestamp': (datetime.now() - timedelta(hours=2)).isoformat(),
-            'read': False,
-            'priority': 'high',
-            'category': 'forecast',
-            'metadata': {
-                'pestType': 'Black Rice Bug',
-                'location': 'Multiple fields',
-            }
-        })
-    
-    # Generate action required alerts from all data
-    actions_needed = all_df[
-        (all_df['Threshold Status'].isin(['Economic Threshold', 'Economic Damage'])) &
-        (all_df['Action'] == '0')
-    ]
-    
-    if len(actions_needed) > 0:
-        alerts.append({
-            'id': 'alert-action-required',
-            'title': 'Inspection required',
-            'message': f'{len(actions_needed)} fields need follow-up after threshold breaches.',
-            'type': 'warning',
-            'timestamp': (datetime.now() - timedelta(hours=4)).isoformat(),
-            'read': False,
-            'priority': 'medium',
-            'category': 'action-required',
-        })
-    
-    # System info alert
-    alerts.append({
-        'id': 'alert-system-1',
-        'title': 'System sync complete',
-        'message': 'Latest observations synchronized from field devices.',
-        'type': 'info',
-        'timestamp': (datetime.now() - timedelta(days=1)).isoformat(),
-        'read': True,
-        'priority': 'low',
-        'category': 'system',
-    })
-    
-    # Sort by timestamp (newest first)
-    alerts.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    # Filter unread if requested
-    if unread_only:
-        alerts = [a for a in alerts if not a.get('read', False)]
-    
-    # Limit results
-    alerts = alerts[:limit]
+    alerts = alert_engine.query(
+        _user_key(current_user),
+        limit=limit,
+        unread_only=unread_only,
+        category=category,
+    )
     
     return {
         "success": True,
@@ -135,10 +68,16 @@ def get_alerts(
 
 
 @alerts_router.post("/{alert_id}/read")
-def mark_alert_read(alert_id: str):
+def mark_alert_read(
+    alert_id: str,
+    current_user: Optional[Dict] = Depends(get_optional_user),
+):
     """Mark an alert as read."""
-    # In a real implementation, this would update a database
-    # For now, we'll just return success
+    if not alert_engine.mark_read(_require_user_key(current_user), alert_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found",
+        )
     return {
         "success": True,
         "message": "Alert marked as read",
@@ -146,8 +85,11 @@ def mark_alert_read(alert_id: str):
 
 
 @alerts_router.post("/read-all")
-def mark_all_alerts_read():
+def mark_all_alerts_read(
+    current_user: Optional[Dict] = Depends(get_optional_user),
+):
     """Mark all alerts as read."""
+    alert_engine.mark_all_read(_require_user_key(current_user))
     return {
         "success": True,
         "message": "All alerts marked as read",
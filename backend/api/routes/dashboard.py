@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 import pandas as pd
 from typing import Optional
 
@@ -13,22 +13,40 @@ from api.utils.dashboard_utils import (
     threshold_status_counts,
     filter_dataset,
 )
-from api.utils.data_transformer import csv_to_observations, calculate_kpis_from_observations
-from api._pydanticModel import FilterAll, FilterByDate
-from api.data_loader import df
+from api.utils.data_transformer import (
+    csv_to_observations,
+    calculate_kpis_from_observations,
+    observations_to_frame,
+    action_mask,
+    build_recent_alert_records,
+)
+from api._pydanticModel import FilterAll, FilterByDate, ObservationBatch
+from api.data_loader import get_dataset, append_observations
+from api.dependencies import require_admin
+from api.utils.single_flight import SingleFlight, filter_key, forecast_key
+from api.utils.result_cache import query_cache, sized
+from api.utils.executors import aggregation_executor, forecast_executor
 from api.utils.forecast_utils import create_feature, recursive_forecast
-from api.model_loader import model
+from api.utils.downsampling import chart_history
+from api.utils.rollups import get_rollups
+from api.model_loader import get_model
 
 dashboard_router = APIRouter(prefix="/dashboard")
 
+# Coalesce identical concurrent dashboard computations
+kpi_flight = SingleFlight("dashboard_kpi")
+operational_flight = SingleFlight("dashboard_operational")
+forecast_flight = SingleFlight("dashboard_forecast")
+timeseries_flight = SingleFlight("dashboard_timeseries")
+
 
 @dashboard_router.get("/")
-def dashboard_root():
+async def dashboard_root():
     return {"success": True, "message": "At dashboard router"}
 
 
 @dashboard_router.get("/observations")
-def get_observations(
+async def get_observations(
     start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     season: Optional[str] = Query(None, description="Season filter"),
@@ -38,7 +56,12 @@ def get_observations(
     Get pest observations in frontend format.
     Returns PestObservation[] compatible with frontend.
     """
-    filtered_df = df.copy()
+    return await aggregation_executor.run(_compute_observations, start, end, season, field_stage)
+
+
+def _compute_observations(start, end, season, field_stage):
+    # Read-only below, so no copy (and filter_dataset can prune partitions)
+    filtered_df = get_dataset()
     
     # Apply filters if provided
     if start and end:
@@ -55,16 +78,50 @@ def get_observations(
     }
 
 
+@dashboard_router.post("/observations", status_code=status.HTTP_201_CREATED)
+async def ingest_observations(
+    batch: ObservationBatch,
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Ingest new field observations (admin only).
+    Appends to the in-memory dataset and bumps the dataset version; alerts,
+    filter metadata and caches update from the new rows.
+    """
+    if not batch.observations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No observations provided",
+        )
+    rows = observations_to_frame([obs.model_dump() for obs in batch.observations])
+    # Listeners refresh alerts, metadata and the cached forecast
+    version = await forecast_executor.run(append_observations, rows)
+    return {
+        "success": True,
+        "data": {"ingested": len(rows), "dataset_version": version},
+    }
+
+
 @dashboard_router.post(
     "/kpi",
     summary="KPI Response",
     description="Compute key performance indicators (KPIs) for a given date range, season, and stage.",
 )
-def dashboard_kpi(request: FilterAll):
+async def dashboard_kpi(request: FilterAll):
     """
     Get KPIs in frontend-compatible format.
     Returns KPIMetrics matching frontend expectations.
+    Results are cached per normalized filter and dataset version;
+    identical concurrent requests share one computation.
     """
+    key = filter_key(request.start, request.end, request.season, request.field_stage, route="kpi")
+    return await query_cache.get_or_compute_async(
+        key, kpi_flight.do_async, key, aggregation_executor, sized(_compute_kpi), request
+    )
+
+
+def _compute_kpi(request: FilterAll):
+    df = get_dataset()
     start_date = pd.to_datetime(request.start)
     end_date = pd.to_datetime(request.end)
     season = request.season if request.season != "All" else None
@@ -84,7 +141,11 @@ def dashboard_kpi(request: FilterAll):
 
 
 @dashboard_router.get("/forecast")
-def dashboard_forecast(horizon: int = Query(7, ge=1, le=30, description="Forecast horizon in days")):
+async def dashboard_forecast(
+    horizon: int = Query(7, ge=1, le=30, description="Forecast horizon in days"),
+    history_days: Optional[int] = Query(None, ge=1, description="Only return the last N days of history"),
+    max_points: Optional[int] = Query(None, ge=3, le=100_000, description="Downsample history (LTTB) to at most N points"),
+):
     """
     Get XGBoost forecast data in frontend-compatible format.
     Uses XGBoost model for AI-powered predictions.
@@ -92,20 +153,27 @@ def dashboard_forecast(horizon: int = Query(7, ge=1, le=30, description="Forecas
     
     Args:
         horizon: Number of days to forecast (1-30, default: 7)
+        history_days: Limit current_dates/actual to the most recent days
+        max_points: Downsample current_dates/actual, keeping peaks
     """
+    return await forecast_flight.do_async(
+        forecast_key(horizon=horizon, history_days=history_days, max_points=max_points),
+        forecast_executor, _compute_forecast, horizon, history_days, max_points,
+    )
+
+
+def _compute_forecast(horizon: int, history_days: Optional[int] = None, max_points: Optional[int] = None):
+    df = get_dataset()
     try:
-        features, y = create_feature(df)
+        features, _ = create_feature(df)
         # Use XGBoost model for forecasting with dynamic horizon
-        forecasted = recursive_forecast(model, features, horizon=horizon)
+        forecasted = recursive_forecast(get_model(), features, horizon=horizon)
         
         # recursive_forecast returns dict directly with index-based keys
         return {
             "success": True,
             "data": {
-                "max_pest_count": float(df["Pest Count/Damage"].max()),
-                "min_pest_count": float(df["Pest Count/Damage"].min()),
-                "current_dates": df["Date"].dt.strftime("%Y-%m-%d").tolist(),
-                "actual": [float(x) for x in df["Pest Count/Damage"].tolist()],
+                **chart_history(df, history_days, max_points),
                 "forecasted": forecasted,
             },
         }
@@ -128,11 +196,64 @@ def dashboard_forecast(horizon: int = Query(7, ge=1, le=30, description="Forecas
         }
 
 
+@dashboard_router.get("/timeseries")
+async def dashboard_timeseries(
+    bucket: str = Query("week", pattern="^(week|month|season)$", description="Bucket size: week, month or season"),
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    season: Optional[str] = Query(None, description="Season filter"),
+    field_stage: Optional[str] = Query(None, description="Field stage filter"),
+):
+    """
+    Pest counts per week, month or season: observations, sum, mean, max,
+    counts per threshold status and actions for each bucket.
+    Served from rollups kept up to date at load and ingest time, so the cost
+    depends on the number of buckets, not rows. Buckets cut by start/end
+    only count the days inside the range and are flagged partial.
+    """
+    try:
+        start_date = pd.to_datetime(start) if start else None
+        end_date = pd.to_datetime(end) if end else None
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be dates (YYYY-MM-DD)",
+        )
+    if start_date is not None and end_date is not None and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    key = filter_key(start, end, season, field_stage, route="timeseries", bucket=bucket)
+    return await query_cache.get_or_compute_async(
+        key, timeseries_flight.do_async, key, aggregation_executor,
+        sized(_compute_timeseries), bucket, start_date, end_date, season, field_stage,
+    )
+
+
+def _compute_timeseries(bucket, start_date, end_date, season, field_stage):
+    buckets = get_rollups().query(bucket, start_date, end_date, season, field_stage)
+    return {
+        "success": True,
+        "data": {"bucket": bucket, "buckets": buckets},
+    }
+
+
 @dashboard_router.post("/operational")
-def dashboard_operational(request: FilterAll):
+async def dashboard_operational(request: FilterAll):
     """
     Get operational dashboard data: threshold status, action tracker, recent alerts.
+    Results are cached per normalized filter and dataset version;
+    identical concurrent requests share one computation.
     """
+    key = filter_key(request.start, request.end, request.season, request.field_stage, route="operational")
+    return await query_cache.get_or_compute_async(
+        key, operational_flight.do_async, key, aggregation_executor, sized(_compute_operational), request
+    )
+
+
+def _compute_operational(request: FilterAll):
+    df = get_dataset()
     start_date = pd.to_datetime(request.start)
     end_date = pd.to_datetime(request.end)
     season = request.season if request.season != "All" else None
@@ -147,7 +268,7 @@ def dashboard_operational(request: FilterAll):
     # Action tracker - count actions by type
     action_tracker = {}
     if not filtered_df.empty:
-        action_df = filtered_df[filtered_df['Action'] == '1']
+        action_df = filtered_df[action_mask(filtered_df)]
         if not action_df.empty:
             # Group by date and count
             action_counts = action_df.groupby(action_df['Date'].dt.date).size().to_dict()
@@ -156,23 +277,7 @@ def dashboard_operational(request: FilterAll):
             }
     
     # Recent alerts - observations above threshold in last 7 days
-    recent_alerts = []
-    if not filtered_df.empty:
-        recent_df = filtered_df[
-            (filtered_df['Date'] >= end_date - pd.Timedelta(days=7)) &
-            (filtered_df['Threshold Status'].isin(['Economic Threshold', 'Economic Damage']))
-        ].sort_values('Date', ascending=False).head(10)
-        
-        for idx, row in recent_df.iterrows():
-            recent_alerts.append({
-                'id': f"alert-{idx}",
-                'date': row['Date'].strftime('%Y-%m-%d'),
-                'pestType': 'Black Rice Bug',
-                'count': float(row['Pest Count/Damage']),
-                'threshold': 10.0 if 'Economic Threshold' in str(row['Threshold Status']) else 5.0,
-                'fieldStage': row['Field Stage'],
-                'status': row['Threshold Status'],
-            })
+    recent_alerts = build_recent_alert_records(filtered_df, end_date - pd.Timedelta(days=7))
     
     return {
         "success": True,
@@ -1,61 +1,39 @@
 from fastapi import APIRouter
-from api.data_loader import df
+from api.utils.dataset_metadata import get_dataset_metadata
+from api.utils.executors import aggregation_executor
 
 filter_router = APIRouter(prefix="/filters")
 
 
 @filter_router.get("/")
-def filters_root():
+async def filters_root():
     return {"success": True, "message": "At filters router"}
 
 
 @filter_router.get("/basic")
-def basic_filters():
+async def basic_filters():
     """
     Get basic filter options from actual data.
     Returns only values that exist in the backend data.
     Maps pest types to match frontend format (RBB -> Black Rice Bug).
+    Served from metadata computed once per dataset version.
     """
-    # Sort years descending (newest first)
-    years = sorted(df["Date"].dt.year.unique().tolist(), reverse=True)
-    
-    # Map pest types to match frontend format (same mapping as in data_transformer)
-    pest_mapping = {
-        'RBB': 'Black Rice Bug',
-        'Black Rice Bug': 'Black Rice Bug',
-    }
-    
-    # Get unique pest types and map them
-    raw_pest_types = df["Pest"].unique().tolist()
-    mapped_pest_types = sorted(list(set([
-        pest_mapping.get(pest, 'Black Rice Bug') for pest in raw_pest_types
-    ])))
-    
+    # Off the event loop: the first call may load the dataset
+    metadata = await aggregation_executor.run(get_dataset_metadata)
     return {
         "success": True,
-        "data": {
-            "field_stages": sorted(df["Field Stage"].unique().tolist()),
-            "pest_types": mapped_pest_types,  # Mapped to match frontend format
-            "date": {
-                "min": str(df["Date"].min()),
-                "max": str(df["Date"].max())
-            },
-            "years": years,  # Sorted descending (newest first)
-        },
+        "data": metadata.basic_filters(),
     }
 
 
 @filter_router.get("/advanced")
-def advanced_filters():
+async def advanced_filters():
     """
     Get advanced filter options from actual data.
     Returns only values that exist in the backend data.
     """
+    metadata = await aggregation_executor.run(get_dataset_metadata)
     return {
         "success": True,
-        "data": {
-            "season": sorted(df["Season"].unique().tolist()),
-            "threshold_status": sorted(df["Threshold Status"].unique().tolist()),
-            "isActionTaken": sorted(df["Action"].unique().tolist()),
-        },
+        "data": metadata.advanced_filters(),
     }
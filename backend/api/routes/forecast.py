@@ -1,61 +1,155 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-import numpy as np
 from api.utils.forecast_utils import (
     create_feature,
-    peak_day,
+    current_error_stats,
+    forecast_summary,
+    load_error_stats,
     recursive_forecast,
-    risk_levels,
 )
-from api.data_loader import df
-from api.model_loader import model
+from api.utils.backtest import DEFAULT_HORIZON, DEFAULT_ORIGINS, backtest_loaded, save_error_stats
+from api.utils.single_flight import SingleFlight
+from api.utils.broadcast import hub
+from api.utils.downsampling import chart_history
+from api.utils.executors import aggregation_executor, forecast_executor
+from api.utils.warmup import mark_failed, mark_loading, mark_ready, register_loader
+from api.data_loader import get_dataset, get_dataset_version, on_dataset_change
+from api.dependencies import require_admin
+from api.model_loader import get_model, on_model_change
 
 
 forecast_router = APIRouter(prefix="/forecast")
 
-features, y = create_feature(df)
-forecast = recursive_forecast(model, features, horizon=7)
+# Cached 7-day forecast; computed when the dataset loads (or on first use)
+forecast = None
+
+# One backtest at a time per parameter set
+backtest_flight = SingleFlight("forecast_backtest")
+
+
+@on_dataset_change
+def _refresh_forecast(new_df, version):
+    """Recompute the cached 7-day forecast when the dataset changes and push it."""
+    global forecast
+    mark_loading("forecast")
+    try:
+        features, _ = create_feature(new_df)
+        forecast = recursive_forecast(get_model(), features, horizon=7)
+    except Exception as e:
+        mark_failed("forecast", e)
+        raise
+    mark_ready("forecast", dataset_version=version)
+    hub.publish("forecast", {"dataset_version": version, **forecast_summary(forecast)})
+
+
+@on_model_change
+def _refresh_on_model_change(model, fingerprint):
+    """Recompute the cached forecast with a newly loaded model."""
+    _refresh_forecast(get_dataset(), get_dataset_version())
+
+
+def get_forecast():
+    """Return the cached forecast, loading the dataset (and so computing it) if needed."""
+    get_dataset()
+    return forecast
+
+
+register_loader("forecast", get_forecast)
 
 
 @forecast_router.get("/")
-def forecast_root():
+async def forecast_root():
     return {"success": True, "message": "At forecast router"}
 
 
 @forecast_router.get("/predict")
-def model_predict():
+async def model_predict(
+    history_days: Optional[int] = Query(None, ge=1, description="Only return the last N days of history"),
+    max_points: Optional[int] = Query(None, ge=3, le=100_000, description="Downsample history (LTTB) to at most N points"),
+):
     """
     XGBoost model prediction endpoint.
     Returns forecast data using XGBoost AI model.
     """
+    # Serves the cached forecast; only the history columns need building
+    return await aggregation_executor.run(_compute_predict, history_days, max_points)
+
+
+def _compute_predict(history_days=None, max_points=None):
+    df = get_dataset()
+    forecast = get_forecast()
     return {
         "success": True,
         "data": {
-            "max_pest_count": df["Pest Count/Damage"].max(),
-            "min_pest_count": df["Pest Count/Damage"].min(),
-            "current_dates": df["Date"].dt.strftime("%Y-%m-%d").tolist(),
-            "actual": df["Pest Count/Damage"].tolist(),
+            **chart_history(df, history_days, max_points),
             "forecasted": forecast,
         },
     }
 
 
 @forecast_router.get("/kpi")
-def forecast_kpi():
+async def forecast_kpi():
     """
     XGBoost forecast KPI endpoint.
     Returns key performance indicators from XGBoost model predictions.
     """
+    cached = forecast if forecast is not None else await forecast_executor.run(get_forecast)
     return {
         "success": True,
-        "data": {
-            "risk_levels": risk_levels(forecast),
-            "day_above_threshold": len(
-                [i for i in forecast["forecast"].values() if i >= 10]
-            ),
-            "avg_predicted": np.round(
-                np.array([v for v in forecast["forecast"].values()]).mean(), 1
-            ),  # Changed to 1 decimal for consistency with frontend
-            "peak_day": peak_day(forecast),
-        },
+        "data": forecast_summary(cached),
     }
+
+
+@forecast_router.get("/backtest")
+async def get_backtest(
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Saved backtest error stats (admin only). `active` tells whether they
+    were computed for the loaded model, i.e. set the forecast intervals.
+    """
+    stats, version = await aggregation_executor.run(load_error_stats)
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No backtest has been saved")
+    active = await aggregation_executor.run(current_error_stats) is not None
+    return {"success": True, "data": {"version": version, "active": active, **_summary(stats)}}
+
+
+@forecast_router.post("/backtest")
+async def run_backtest(
+    horizon: int = Query(DEFAULT_HORIZON, ge=1, le=90, description="Forecast steps per origin"),
+    origins: int = Query(DEFAULT_ORIGINS, ge=10, le=100_000, description="Historical forecast origins"),
+    save: bool = Query(True, description="Use the stats for forecast intervals"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Rolling-origin backtest of the loaded model on the loaded dataset (admin
+    only): per-horizon MAE, RMSE, bias and residual std. With save=true the
+    residual stds replace STD_ERROR in the forecast intervals and the cached
+    forecast is recomputed.
+    """
+    try:
+        stats = await backtest_flight.do_async(
+            (horizon, origins, save, get_dataset_version()),
+            forecast_executor, _run_backtest, horizon, origins, save,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {"success": True, "data": _summary(stats)}
+
+
+def _summary(stats):
+    # The raw one-step errors only feed the simulated intervals
+    return {key: value for key, value in stats.items() if key != "residuals"}
+
+
+def _run_backtest(horizon, origins, save):
+    stats = backtest_loaded(horizon, origins)
+    if save:
+        save_error_stats(stats)
+        _refresh_forecast(get_dataset(), get_dataset_version())
+    return stats
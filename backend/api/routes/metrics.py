@@ -0,0 +1,116 @@
+"""
+GET /metrics - Prometheus text exposition.
+
+Request metrics are recorded by MetricsMiddleware and Mongo latency by the
+driver listener; everything else (dataset, model, pools, caches, push
+subscribers) is read from its owner at scrape time.
+"""
+import os
+from typing import List
+
+import anyio.to_thread
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import Response
+
+from api.data_loader import get_dataset_version, loaded_dataset
+from api.model_loader import get_model_fingerprint
+from api.middleware.compression import payload_cache
+from api.utils.broadcast import hub
+from api.utils.executors import registry as executor_registry
+from api.utils.metrics import CONTENT_TYPE, registry, sample_lines
+from api.utils.result_cache import query_cache
+from api.utils.single_flight import registry as single_flight_registry
+
+# When set, scrapers must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@registry.collector
+def _dataset_metrics() -> List[str]:
+    # A scrape reports what is loaded; it must not load the dataset on the event loop
+    df = loaded_dataset()
+    return (
+        sample_lines("dataset_rows", "gauge", "Rows in the loaded dataset.",
+                     [({}, 0 if df is None else len(df))])
+        + sample_lines("dataset_info", "gauge", "Version of the loaded dataset.",
+                       [({"version": get_dataset_version() or ""}, 1)])
+        + sample_lines("model_info", "gauge", "Fingerprint of the loaded forecast model.",
+                       [({"fingerprint": get_model_fingerprint() or ""}, 1)])
+    )
+
+
+@registry.collector
+def _executor_metrics() -> List[str]:
+    pools = list(executor_registry.items())
+
+    def family(name, kind, help_text, attr):
+        return sample_lines(name, kind, help_text, [({"pool": n}, getattr(e, attr)) for n, e in pools])
+
+    return (
+        family("executor_max_workers", "gauge", "Worker threads per pool.", "max_workers")
+        + family("executor_queued_tasks", "gauge", "Tasks waiting for a worker.", "queued")
+        + family("executor_running_tasks", "gauge", "Tasks currently running.", "running")
+        + family("executor_completed_total", "counter", "Tasks finished.", "completed")
+        + family("executor_failed_total", "counter", "Tasks that raised.", "failed")
+        + family("executor_rejected_total", "counter", "Tasks rejected by a full queue.", "rejected")
+        + family("executor_wait_seconds_total", "counter", "Total time tasks spent queued.", "wait_seconds")
+        + family("executor_run_seconds_total", "counter", "Total time tasks spent running.", "run_seconds")
+    )
+
+
+@registry.collector
+def _cache_metrics() -> List[str]:
+    caches = [
+        ("query", query_cache.hits, query_cache.misses),
+        ("compressed_payload", payload_cache.hits, payload_cache.misses),
+    ] + [
+        (name, flight.hits, flight.misses) for name, flight in single_flight_registry.items()
+    ]
+    ratio = [
+        ({"cache": name}, round(hits / (hits + misses), 4) if hits + misses else 0.0)
+        for name, hits, misses in caches
+    ]
+    return (
+        sample_lines("cache_hits_total", "counter", "Cache hits.",
+                     [({"cache": name}, hits) for name, hits, _ in caches])
+        + sample_lines("cache_misses_total", "counter", "Cache misses.",
+                       [({"cache": name}, misses) for name, _, misses in caches])
+        + sample_lines("cache_hit_ratio", "gauge", "Hits / lookups since start.", ratio)
+        + sample_lines("cache_bytes", "gauge", "Bytes held by byte-bounded caches.",
+                       [({"cache": "query"}, query_cache.bytes),
+                        ({"cache": "compressed_payload"}, payload_cache.size)])
+        + sample_lines("cache_evictions_total", "counter", "Result cache evictions.",
+                       [({"cache": "query"}, query_cache.evictions)])
+        + sample_lines("single_flight_coalesced_total", "counter",
+                       "Requests that joined an identical in-flight computation.",
+                       [({"name": name}, flight.coalesced) for name, flight in single_flight_registry.items()])
+        + sample_lines("stream_subscribers", "gauge", "Open SSE / WebSocket subscribers.",
+                       [({}, hub.subscriber_count)])
+    )
+
+
+def _threadpool_metrics() -> List[str]:
+    # Starlette's default pool (sync routes and dependencies); needs the event loop
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return (
+        sample_lines("threadpool_size", "gauge", "Default threadpool capacity.",
+                     [({}, limiter.total_tokens)])
+        + sample_lines("threadpool_busy", "gauge", "Default threadpool threads in use.",
+                       [({}, stats.borrowed_tokens)])
+        + sample_lines("threadpool_queued_tasks", "gauge", "Tasks waiting for the default threadpool.",
+                       [({}, stats.tasks_waiting)])
+    )
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+        )
+    body = registry.render() + "\n".join(_threadpool_metrics()) + "\n"
+    return Response(content=body, media_type=CONTENT_TYPE)
@@ -0,0 +1,95 @@
+"""
+Push channel for alerts, dataset-version changes and forecast summaries.
+
+Both transports read from the in-process broadcast hub, so each change is
+computed once and fanned out to every open dashboard:
+- GET /stream/events  Server-Sent Events
+- WS  /stream/ws      WebSocket (JSON messages)
+"""
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from api.data_loader import on_dataset_change
+from api.utils.broadcast import hub
+
+stream_router = APIRouter(prefix="/stream", tags=["stream"])
+
+# Seconds between keep-alive comments on idle SSE connections
+HEARTBEAT_SECONDS = 15
+
+
+@on_dataset_change
+def _publish_dataset_version(df, version):
+    hub.publish("dataset", {"version": version, "rows": len(df)})
+
+
+def _parse_events(events: Optional[str]):
+    return [e.strip() for e in events.split(",") if e.strip()] if events else None
+
+
+def _format_sse(message: dict) -> str:
+    data = json.dumps(message["data"], default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+
+@stream_router.get("/events")
+async def stream_events(
+    request: Request,
+    events: Optional[str] = Query(None, description="Comma-separated event types (alert,dataset,forecast)"),
+):
+    """Server-Sent Events stream of alerts, dataset versions and forecast summaries."""
+    subscription = hub.subscribe(_parse_events(events))
+
+    async def event_source():
+        async with subscription:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _format_sse(message)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@stream_router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, events: Optional[str] = None):
+    """WebSocket stream; each message is {"id", "event", "data"}."""
+    await websocket.accept()
+    async with hub.subscribe(_parse_events(events)) as subscription:
+        receiver = asyncio.create_task(websocket.receive_text())
+        getter = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.create_task(subscription.get())
+                done, _ = await asyncio.wait(
+                    {getter, receiver}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if receiver in done:
+                    # Client messages are ignored; a disconnect raises here
+                    receiver.result()
+                    receiver = asyncio.create_task(websocket.receive_text())
+                if getter in done:
+                    message = getter.result()
+                    getter = None
+                    await websocket.send_text(json.dumps(
+                        {"id": message["id"], "event": message["event"], "data": message["data"]},
+                        default=str,
+                    ))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+            if getter is not None:
+                getter.cancel()
@@ -1,20 +1,24 @@
 from fastapi import APIRouter, Query
-from typing import Optional, List, Dict
+from typing import Optional
 import pandas as pd
-from api.data_loader import df
+from api.data_loader import get_dataset
 from api.utils.dashboard_utils import filter_dataset
+from api.utils.data_transformer import build_action_records
 from api._pydanticModel import FilterAll
+from api.utils.single_flight import filter_key
+from api.utils.result_cache import query_cache, sized
+from api.utils.executors import aggregation_executor
 
 threshold_router = APIRouter(prefix="/threshold", tags=["threshold"])
 
 
 @threshold_router.get("/")
-def threshold_root():
+async def threshold_root():
     return {"success": True, "message": "At threshold router"}
 
 
 @threshold_router.get("/actions")
-def get_threshold_actions(
+async def get_threshold_actions(
     start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     season: Optional[str] = Query(None, description="Season filter"),
@@ -24,84 +28,56 @@ def get_threshold_actions(
     Get threshold actions taken.
     Returns list of actions with details.
     """
-    filtered_df = df.copy()
+    if start and end:
+        key = filter_key(start, end, season, field_stage, route="threshold_actions")
+    else:
+        key = filter_key(route="threshold_actions")
+    return await query_cache.get_or_compute_async(
+        key, aggregation_executor.run, sized(_compute_threshold_actions), start, end, season, field_stage
+    )
+
+
+def _compute_threshold_actions(start, end, season, field_stage):
+    df = get_dataset()
     
     # Apply filters if provided
     if start and end:
-        start_date = pd.to_datetime(start)
-        end_date = pd.to_datetime(end)
-        filtered_df = filter_dataset(filtered_df, start_date, end_date, season, field_stage)
-    
-    # Get actions taken
-    actions_df = filtered_df[filtered_df['Action'] == '1'].copy()
-    
-    actions: List[Dict] = []
-    for idx, row in actions_df.iterrows():
-        actions.append({
-            'id': f"action-{idx}",
-            'date': row['Date'].strftime('%Y-%m-%d') if isinstance(row['Date'], pd.Timestamp) else str(row['Date']),
-            'pestType': 'Black Rice Bug',
-            'count': float(row['Pest Count/Damage']),
-            'threshold': 10.0 if 'Economic Threshold' in str(row['Threshold Status']) else 5.0,
-            'fieldStage': row['Field Stage'],
-            'season': row['Season'],
-            'actionType': 'Intervention',
-            'status': row['Threshold Status'],
-        })
-    
-    # Sort by date (newest first)
-    actions.sort(key=lambda x: x['date'], reverse=True)
+        df = filter_dataset(df, pd.to_datetime(start), pd.to_datetime(end), season, field_stage)
     
+    # Action rows, already newest first
     return {
         "success": True,
-        "data": actions,
+        "data": build_action_records(df),
     }
 
 
 @threshold_router.post("/actions")
-def get_threshold_actions_filtered(request: FilterAll):
+async def get_threshold_actions_filtered(request: FilterAll):
     """
     Get threshold actions with full filter support.
     """
-    start_date = pd.to_datetime(request.start)
-    end_date = pd.to_datetime(request.end)
-    season = request.season if request.season != "All" else None
-    field_stage = request.field_stage if request.field_stage != "All" else None
-    
-    # Filter data
-    filtered_df = filter_dataset(df, start_date, end_date, season, field_stage)
-    
-    # Get actions taken
-    actions_df = filtered_df[filtered_df['Action'] == '1'].copy()
-    
-    actions: List[Dict] = []
-    for idx, row in actions_df.iterrows():
-        actions.append({
-            'id': f"action-{idx}",
-            'date': row['Date'].strftime('%Y-%m-%d') if isinstance(row['Date'], pd.Timestamp) else str(row['Date']),
-            'pestType': 'Black Rice Bug',
-            'count': float(row['Pest Count/Damage']),
-            'threshold': 10.0 if 'Economic Threshold' in str(row['Threshold Status']) else 5.0,
-            'fieldStage': row['Field Stage'],
-            'season': row['Season'],
-            'actionType': 'Intervention',
-            'status': row['Threshold Status'],
-        })
-    
-    # Sort by date (newest first)
-    actions.sort(key=lambda x: x['date'], reverse=True)
-    
-    return {
-        "success": True,
-        "data": actions,
-    }
+    key = filter_key(request.start, request.end, request.season, request.field_stage, route="threshold_actions")
+    return await query_cache.get_or_compute_async(
+        key,
+        aggregation_executor.run,
+        sized(_compute_threshold_actions),
+        request.start,
+        request.end,
+        request.season,
+        request.field_stage,
+    )
 
 
 @threshold_router.get("/status")
-def get_threshold_status():
+async def get_threshold_status():
     """
     Get current threshold status summary.
     """
+    return await aggregation_executor.run(_compute_threshold_status)
+
+
+def _compute_threshold_status():
+    df = get_dataset()
     # Get recent data (last 30 days)
     end_date = pd.to_datetime('today')
     start_date = end_date - pd.Timedelta(days=30)
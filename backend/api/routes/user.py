@@ -2,24 +2,17 @@
 User management routes: profile, settings, photo upload.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from api.models.user import AppUser, UserUpdate, PasswordChange, user_to_app_user
 from api.db import users_collection
 from api.auth_utils import hash_password, verify_password
 from api.dependencies import get_current_user
 from bson import ObjectId
 from datetime import datetime
-from PIL import Image
-import os
-import io
-import shutil
-from pathlib import Path
+from api.utils.upload_storage import store_photo
 
 user_router = APIRouter(prefix="/user", tags=["user"])
 
-# Upload directory
-UPLOAD_DIR = Path(__file__).parent.parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-
 
 def get_base_url(request: Request) -> str:
     """Get base URL for constructing absolute photo URLs."""
@@ -118,44 +111,11 @@ async def upload_photo(
             detail="Only image uploads are allowed",
         )
     
-    # Generate unique filename
-    unique = f"{int(datetime.utcnow().timestamp() * 1000)}-{os.urandom(4).hex()}"
-    filename = f"{unique}.jpg"
-    file_path = UPLOAD_DIR / filename
-    
-    try:
-        # Read and process image
-        contents = await photo.read()
-        
-        # Process with PIL
-        image = Image.open(io.BytesIO(contents))
-        # Auto-rotate based on EXIF
-        try:
-            from PIL.ExifTags import ORIENTATION
-            exif = image._getexif()
-            if exif:
-                orientation = exif.get(ORIENTATION)
-                if orientation == 3:
-                    image = image.rotate(180, expand=True)
-                elif orientation == 6:
-                    image = image.rotate(270, expand=True)
-                elif orientation == 8:
-                    image = image.rotate(90, expand=True)
-        except:
-            pass
-        
-        # Resize and save
-        image.thumbnail((800, 800), Image.Resampling.LANCZOS)
-        image = image.convert("RGB")
-        image.save(file_path, "JPEG", quality=90)
-        
-    except Exception as e:
-        # Fallback: save raw file
-        with open(file_path, "wb") as f:
-            f.write(contents)
+    # Store under the content hash (identical uploads are deduplicated)
+    contents = await photo.read()
+    public_path = await run_in_threadpool(store_photo, contents)
     
     # Update user photoUrl
-    public_path = f"/uploads/{filename}"
     users_collection.update_one(
         {"_id": current_user["_id"]},
         {
@@ -178,4 +138,4 @@ async def upload_photo(
     }
 
 
-# Note: Uploads are served via StaticFiles mount in app.py
+# Note: Uploads are served via the CachedStaticFiles mount in app.py
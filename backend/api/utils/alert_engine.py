@@ -0,0 +1,491 @@
+"""
+Incremental alert engine.
+
+Threshold-breach rules are evaluated once per observation as rows are
+ingested (initial load, then data_loader.append_observations), instead of
+scanning the full history on every GET /alerts. Alerts live in in-memory
+indexes ordered by timestamp (overall and per category).
+
+Alert ids are derived from what they describe (the observation for a
+threshold breach), so every worker and every rebuild gives the same alert
+the same id, and a revision hash changes when its text does. Each (id,
+revision) is recorded once in the `alerts` collection with the time it was
+first issued, shared by all workers. Read state is per user: a marker per
+read (alert id, revision) and a read-all watermark on that issue time, both
+in MongoDB. Each process keeps the read state of its ALERT_READS_CACHE_SIZE
+most recent users and, every ALERT_READS_TTL seconds, fetches only the
+markers written since its last look.
+
+Unread queries walk an index ordered by issue time from the user's read
+floor: the newest issue time up to which every alert is read (the read-all
+watermark, advanced over alerts read one by one). Users who keep up with
+their alerts only ever touch the few issued after it.
+"""
+import bisect
+import hashlib
+import os
+import threading
+import heapq
+import time
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+from pymongo import UpdateOne
+
+from api.db import alert_reads_collection, alert_read_state_collection, alerts_collection
+from api.utils.broadcast import hub
+from api.utils.data_transformer import BREACH_STATUSES, action_mask, threshold_values
+from api.data_loader import (
+    get_dataset,
+    on_dataset_change,
+    on_observations_appended,
+)
+
+# Breaches needed before the forecast warning is raised
+FORECAST_WARNING_MIN_BREACHES = 5
+
+# Seconds a worker reuses a user's read markers before re-reading them,
+# i.e. how long a read on another worker can take to show up here
+ALERT_READS_TTL = float(os.getenv("ALERT_READS_TTL", "5"))
+
+# Users whose read state a worker keeps in memory (least recently used dropped)
+ALERT_READS_CACHE_SIZE = int(os.getenv("ALERT_READS_CACHE_SIZE", "1000"))
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:12]
+
+
+def alert_revision(alert: Dict) -> str:
+    """Changes when the alert's text does (not its timestamp, which differs per worker)."""
+    return _digest(alert['title'], alert['message'])
+
+
+class AlertEngine:
+    """Holds alerts indexed by timestamp and category plus per-user read markers."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # user_id -> {"ids": {alert_id: revision}, "all": issued-at watermark,
+        #             "floor": (epoch, issue time), "checked": monotonic, "since": utc}
+        self._reads: "OrderedDict[str, Dict]" = OrderedDict()
+        self._epoch = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._alerts: Dict[str, Dict] = {}
+            self._seq: Dict[str, int] = {}
+            self._revision: Dict[str, str] = {}
+            # alert_id -> first issue time of its current revision (from MongoDB)
+            self._issued: Dict[str, datetime] = {}
+            # (issue time, seq, alert_id) of issued alerts, oldest first
+            self._by_issue: List[tuple] = []
+            # Alerts whose issue time has not been recorded yet
+            self._pending = set()
+            # (date, stage, count, status, source) -> threshold alerts for it so far
+            self._observations: Counter = Counter()
+            self._timeline: List[tuple] = []
+            self._by_category: Dict[str, List[tuple]] = defaultdict(list)
+            self._next_seq = 0
+            self._breaches = 0
+            self._unactioned = 0
+            self.version = None
+            # Read floors only hold while no alert is issued at or before them
+            self._epoch += 1
+
+    # --- Index maintenance -------------------------------------------------
+
+    def _add(self, alert: Dict):
+        alert_id = alert['id']
+        if alert_id in self._alerts:
+            self._remove(alert_id)
+        seq = self._next_seq
+        self._next_seq += 1
+        entry = (alert['timestamp'], seq, alert_id)
+        self._alerts[alert_id] = alert
+        self._seq[alert_id] = seq
+        self._revision[alert_id] = alert_revision(alert)
+        self._pending.add(alert_id)
+        bisect.insort(self._timeline, entry)
+        bisect.insort(self._by_category[alert['category']], entry)
+
+    def _remove(self, alert_id: str):
+        alert = self._alerts.pop(alert_id)
+        self._revision.pop(alert_id)
+        issued = self._issued.pop(alert_id, None)
+        self._pending.discard(alert_id)
+        seq = self._seq.pop(alert_id)
+        _delete(self._timeline, (alert['timestamp'], seq, alert_id))
+        _delete(self._by_category[alert['category']], (alert['timestamp'], seq, alert_id))
+        if issued is not None:
+            _delete(self._by_issue, (issued, seq, alert_id))
+
+    def _set_issued(self, alert_id: str, issued_at: datetime):
+        self._issued[alert_id] = issued_at
+        bisect.insort(self._by_issue, (issued_at, self._seq[alert_id], alert_id))
+
+    # --- Rule evaluation ---------------------------------------------------
+
+    def ingest(self, rows: pd.DataFrame, version: Optional[str] = None) -> List[Dict]:
+        """Evaluate alert rules for newly ingested observation rows only."""
+        if rows is None or rows.empty:
+            return []
+        breaches = rows[rows['Threshold Status'].isin(BREACH_STATUSES)]
+        unactioned = int((~action_mask(breaches)).sum())
+
+        sources = breaches['Source'] if 'Source' in breaches.columns else [None] * len(breaches)
+
+        new_alerts = []
+        keys = []
+        for date, threshold_value, count, stage, status, source in zip(
+            breaches['Date'],
+            threshold_values(breaches['Threshold Status']).tolist(),
+            breaches['Pest Count/Damage'].astype(float),
+            breaches['Field Stage'],
+            breaches['Threshold Status'],
+            sources,
+        ):
+            keys.append((date, stage, count, status, source))
+            new_alerts.append({
+                'title': "Critical pest threshold exceeded",
+                'message': f"Black Rice Bug count ({count}) surpassed threshold ({threshold_value}) in {stage} stage. Immediate action recommended.",
+                'type': 'alert',
+                'timestamp': date.isoformat() if isinstance(date, pd.Timestamp) else str(date),
+                'read': False,
+                'priority': 'high',
+                'category': 'threshold',
+                'metadata': {
+                    'pestType': 'Black Rice Bug',
+                    'location': stage,
+                    'count': count,
+                    'threshold': threshold_value,
+                },
+            })
+
+        with self._lock:
+            for key, alert in zip(keys, new_alerts):
+                # The observation identifies the alert; identical ones by their occurrence
+                nth = self._observations[key]
+                self._observations[key] += 1
+                alert['id'] = f"alert-threshold-{_digest(*key, nth)}"
+                self._add(alert)
+            self._breaches += len(new_alerts)
+            self._unactioned += unactioned
+            self._update_derived_alerts(bool(new_alerts) or self.version is None)
+            self.version = version
+        return new_alerts
+
+    def rebuild(self, df: pd.DataFrame, version: Optional[str] = None):
+        """Re-evaluate everything (dataset replaced rather than appended)."""
+        with self._lock:
+            self.reset()
+            self.ingest(df, version)
+
+    def _issue(self):
+        """
+        Look up (or record) when each new alert revision was first issued.
+        Runs on the first read-state request after an ingest, outside the
+        lock, so dataset loads never wait on MongoDB.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            pending = {alert_id: self._revision[alert_id] for alert_id in self._pending}
+        issued = record_issued(pending)
+        with self._lock:
+            latest = self._by_issue[-1][0] if self._by_issue else None
+            if latest is not None and min(issued.values()) <= latest:
+                # Issued no later than alerts users may already have read past
+                self._epoch += 1
+            for alert_id, issued_at in issued.items():
+                # Skip alerts replaced by another revision in the meantime
+                if alert_id in self._pending and self._revision.get(alert_id) == pending[alert_id]:
+                    self._set_issued(alert_id, issued_at)
+                    self._pending.discard(alert_id)
+
+    def _update_derived_alerts(self, changed: bool):
+        now = datetime.now()
+
+        if self._breaches > FORECAST_WARNING_MIN_BREACHES and 'alert-forecast-1' not in self._alerts:
+            self._add({
+                'id': 'alert-forecast-1',
+                'title': 'Forecast: Elevated Black Rice Bug risk',
+                'message': 'Model projects rising counts over the next 7 days. Prepare interventions.',
+                'type': 'warning',
+                'timestamp': (now - timedelta(hours=2)).isoformat(),
+                'read': False,
+                'priority': 'high',
+                'category': 'forecast',
+                'metadata': {
+                    'pestType': 'Black Rice Bug',
+                    'location': 'Multiple fields',
+                },
+            })
+
+        previous = self._alerts.get('alert-action-required')
+        if self._unactioned > 0 and (previous is None or changed):
+            self._add({
+                'id': 'alert-action-required',
+                'title': 'Inspection required',
+                'message': f'{self._unactioned} fields need follow-up after threshold breaches.',
+                'type': 'warning',
+                'timestamp': (now - timedelta(hours=4)).isoformat(),
+                'read': False,
+                'priority': 'medium',
+                'category': 'action-required',
+            })
+
+        if changed:
+            self._add({
+                'id': 'alert-system-1',
+                'title': 'System sync complete',
+                'message': 'Latest observations synchronized from field devices.',
+                'type': 'info',
+                'timestamp': now.isoformat(),
+                'read': True,
+                'priority': 'low',
+                'category': 'system',
+            })
+
+    def _ensure_loaded(self):
+        # Alerts are built by the dataset listener once the dataset first loads
+        if self.version is None:
+            get_dataset()
+
+    # --- Read markers ------------------------------------------------------
+
+    def _user_reads(self, user_id: str) -> Dict:
+        with self._lock:
+            reads = self._reads.get(user_id)
+            if reads is not None:
+                self._reads.move_to_end(user_id)
+                if time.monotonic() - reads['checked'] <= ALERT_READS_TTL:
+                    return reads
+            since = reads['since'] if reads is not None else None
+        # Fetch (outside the engine lock) what other workers recorded meanwhile
+        now = _now()
+        loaded = load_read_markers(user_id, since)
+        with self._lock:
+            reads = self._reads.get(user_id)
+            if reads is None:
+                reads = {'ids': {}, 'all': None, 'floor': None, 'since': None}
+                self._reads[user_id] = reads
+                while len(self._reads) > ALERT_READS_CACHE_SIZE:
+                    self._reads.popitem(last=False)
+            reads['ids'].update(loaded['ids'])
+            if loaded['all'] is not None and (reads['all'] is None or loaded['all'] > reads['all']):
+                reads['all'] = loaded['all']
+            # Overlap the next fetch by a TTL for writes in flight and clock skew
+            reads['since'] = now - timedelta(seconds=ALERT_READS_TTL)
+            reads['checked'] = time.monotonic()
+            return reads
+
+    def _read_floor(self, reads: Dict) -> int:
+        """
+        Position in the issue index past which the user's unread alerts lie:
+        after the read-all watermark, moved forward over alerts read one by
+        one. The advanced floor is kept for the next query.
+        """
+        index = self._by_issue
+        floor = reads['all']
+        if reads['floor'] is not None and reads['floor'][0] == self._epoch:
+            if floor is None or reads['floor'][1] > floor:
+                floor = reads['floor'][1]
+        start = 0 if floor is None else bisect.bisect_right(index, (floor, float('inf')))
+        pos = start
+        while pos < len(index) and self._is_read(reads, index[pos][2]):
+            pos += 1
+        # Keep a floor only below the first unread alert's issue time
+        end = pos
+        while pos < len(index) and end > start and index[end - 1][0] == index[pos][0]:
+            end -= 1
+        if end > start:
+            reads['floor'] = (self._epoch, index[end - 1][0])
+        return pos
+
+    def _is_read(self, reads: Optional[Dict], alert_id: str) -> bool:
+        if self._alerts[alert_id]['read']:
+            return True
+        if reads is None:
+            return False
+        if reads['ids'].get(alert_id) == self._revision[alert_id]:
+            return True
+        issued = self._issued.get(alert_id)
+        return reads['all'] is not None and issued is not None and issued <= reads['all']
+
+    def mark_read(self, user_id: str, alert_id: str) -> bool:
+        self._ensure_loaded()
+        reads = self._user_reads(user_id)
+        with self._lock:
+            if alert_id not in self._alerts:
+                return False
+            revision = self._revision[alert_id]
+            reads['ids'][alert_id] = revision
+        persist_read_marker(user_id, alert_id, revision)
+        return True
+
+    def mark_all_read(self, user_id: str):
+        """Mark every alert issued so far as read (by a watermark on the issue time)."""
+        self._ensure_loaded()
+        self._issue()
+        reads = self._user_reads(user_id)
+        with self._lock:
+            watermark = max(self._issued.values(), default=None)
+            if watermark is None:
+                return
+            if reads['all'] is not None:
+                watermark = max(watermark, reads['all'])
+            reads['all'] = watermark
+        persist_read_all(user_id, watermark)
+
+    # --- Queries -----------------------------------------------------------
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 10,
+        unread_only: bool = False,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Newest-first top-k alerts with the user's read state applied
+        (user_id=None: anonymous, only the alerts' own read flags).
+        """
+        self._ensure_loaded()
+        reads = None
+        if user_id:
+            self._issue()
+            reads = self._user_reads(user_id)
+        with self._lock:
+            if unread_only and reads is not None:
+                return self._unread(reads, limit, category)
+            index = self._by_category.get(category, []) if category else self._timeline
+            results = []
+            for _, _, alert_id in reversed(index):
+                if len(results) >= limit:
+                    break
+                read = self._is_read(reads, alert_id)
+                if unread_only and read:
+                    continue
+                results.append({**self._alerts[alert_id], 'read': read})
+            return results
+
+    def _unread(self, reads: Dict, limit: int, category: Optional[str]) -> List[Dict]:
+        # Only alerts issued past the user's read floor (or not issued yet) can be unread
+        candidates = [entry[2] for entry in self._by_issue[self._read_floor(reads):]]
+        candidates.extend(self._pending)
+        unread = (
+            alert_id for alert_id in candidates
+            if (category is None or self._alerts[alert_id]['category'] == category)
+            and not self._is_read(reads, alert_id)
+        )
+        newest = heapq.nlargest(
+            limit, unread,
+            key=lambda alert_id: (self._alerts[alert_id]['timestamp'], self._seq[alert_id]),
+        )
+        return [{**self._alerts[alert_id], 'read': False} for alert_id in newest]
+
+
+def _delete(index: List[tuple], entry: tuple):
+    pos = bisect.bisect_left(index, entry)
+    if pos < len(index) and index[pos] == entry:
+        del index[pos]
+
+
+# --- Persistence -------------------------------------------------------------
+
+
+def _now() -> datetime:
+    # MongoDB keeps milliseconds; round now so cached and stored times compare equal
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def record_issued(pending: Dict[str, str]) -> Dict[str, datetime]:
+    """
+    First issue time of each {alert_id: revision}: recorded in the alerts
+    collection by whichever worker issues it first, read back by the rest.
+    Without MongoDB, now.
+    """
+    keys = {f"{alert_id}@{revision}": alert_id for alert_id, revision in pending.items()}
+    now = _now()
+    issued = {}
+    try:
+        for document in alerts_collection.find({"_id": {"$in": list(keys)}}):
+            issued[document["_id"]] = document["issuedAt"]
+        missing = [key for key in keys if key not in issued]
+        if missing:
+            alerts_collection.bulk_write([
+                UpdateOne(
+                    {"_id": key},
+                    {"$setOnInsert": {"alertId": keys[key], "revision": pending[keys[key]], "issuedAt": now}},
+                    upsert=True,
+                )
+                for key in missing
+            ], ordered=False)
+            # Another worker may have recorded some of them first
+            for document in alerts_collection.find({"_id": {"$in": missing}}):
+                issued[document["_id"]] = document["issuedAt"]
+    except Exception as e:
+        print(f"⚠️ Could not record alert issue times: {e}")
+    return {alert_id: issued.get(key, now) for key, alert_id in keys.items()}
+
+
+def load_read_markers(user_id: str, since: Optional[datetime] = None) -> Dict:
+    """The user's read-all watermark and read markers (only those written since `since`)."""
+    reads = {"ids": {}, "all": None}
+    query = {"userId": user_id}
+    if since is not None:
+        query["readAt"] = {"$gte": since}
+    try:
+        state = alert_read_state_collection.find_one({"userId": user_id})
+        if state:
+            reads["all"] = state.get("readAllAt")
+        for marker in alert_reads_collection.find(query):
+            reads["ids"][marker["alertId"]] = marker.get("revision")
+    except Exception as e:
+        print(f"⚠️ Could not load alert read markers: {e}")
+    return reads
+
+
+def persist_read_marker(user_id: str, alert_id: str, revision: str):
+    try:
+        alert_reads_collection.update_one(
+            {"userId": user_id, "alertId": alert_id},
+            {"$set": {"revision": revision, "readAt": datetime.utcnow()}},
+            upsert=True,
+        )
+    except Exception as e:
+        print(f"⚠️ Could not persist alert read marker: {e}")
+
+
+def persist_read_all(user_id: str, watermark: datetime):
+    try:
+        # A single watermark supersedes all older per-alert markers
+        alert_read_state_collection.update_one(
+            {"userId": user_id},
+            {"$set": {"readAllAt": watermark, "readAt": datetime.utcnow()}},
+            upsert=True,
+        )
+    except Exception as e:
+        print(f"⚠️ Could not persist alert read state: {e}")
+
+
+alert_engine = AlertEngine()
+
+
+@on_observations_appended
+def _ingest_appended(new_rows, df, version):
+    for alert in alert_engine.ingest(new_rows, version):
+        hub.publish("alert", alert)
+
+
+@on_dataset_change
+def _rebuild_on_change(df, version):
+    # Appends were already handled incrementally above
+    if alert_engine.version != version:
+        alert_engine.rebuild(df, version)
+
@@ -0,0 +1,184 @@
+"""
+Rolling-origin backtest of the recursive forecaster.
+
+From each of `origins` evenly spaced rows of the history the forecaster
+runs `horizon` steps with recursive_forecast's own step function
+(forecast_utils.forecast_step), and every step is compared with what was
+observed. All origins advance in lockstep, so a
+step is one predict over an (origins x features) matrix; with several
+workers the origins are split into chunks that run in separate processes.
+
+The result holds MAE, RMSE, bias and residual std per horizon step, and
+the one-step errors of every origin. Saved to FORECAST_ERROR_STATS, the
+stds replace STD_ERROR for the model they were computed with (see
+forecast_utils.step_std_errors) and the one-step errors are the residuals
+its simulated paths resample (forecast_utils.one_step_residuals).
+
+    python -m api.utils.backtest --origins 300 --horizon 30 --save
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+
+from api.utils.forecast_utils import ERROR_STATS_PATH, forecast_step, invalidate_error_stats
+from api.utils.tracing import span, traced
+
+DEFAULT_HORIZON = 30
+DEFAULT_ORIGINS = 200
+
+# Processes running origin chunks (default: one per CPU)
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "0")) or os.cpu_count() or 1
+
+# Below this many origins one in-process batch wins (starting workers costs seconds)
+BACKTEST_PARALLEL_MIN_ORIGINS = int(os.getenv("BACKTEST_PARALLEL_MIN_ORIGINS", "2000"))
+
+
+def select_origins(rows: int, horizon: int, origins: int) -> np.ndarray:
+    """Evenly spaced row positions that still have `horizon` observations after them."""
+    last = rows - horizon - 1
+    if last < 0:
+        raise ValueError(f"Need at least {horizon + 1} rows of history for a {horizon}-step backtest")
+    return np.unique(np.linspace(0, last, min(origins, last + 1)).round().astype(np.int64))
+
+
+def forecast_origins(model, matrix: np.ndarray, columns: Dict[str, int], horizon: int) -> np.ndarray:
+    """
+    Recursive forecasts from every row of `matrix` (one origin per row):
+    an (origins x horizon) array, one batched predict per step.
+    """
+    matrix = matrix.copy()
+    predictions = np.empty((len(matrix), horizon), dtype=np.float64)
+    for step in range(horizon):
+        predictions[:, step] = forecast_step(model, matrix, columns)
+    return predictions
+
+
+def _forecast_chunk(model_raw: bytes, matrix: np.ndarray, columns: Dict[str, int], horizon: int) -> np.ndarray:
+    # Runs in a worker process: rebuild the model from its serialized booster
+    import xgboost as xgb
+
+    model = xgb.XGBRegressor()
+    model.load_model(bytearray(model_raw))
+    return forecast_origins(model, matrix, columns, horizon)
+
+
+def _forecast_parallel(model, matrix, columns, horizon, workers):
+    if workers <= 1:
+        return forecast_origins(model, matrix, columns, horizon)
+    model_raw = bytes(model.get_booster().save_raw(raw_format="json"))
+    chunks = np.array_split(matrix, workers)
+    # spawn, not fork: the server's pool threads may hold locks at fork time
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = pool.map(
+            _forecast_chunk,
+            [model_raw] * workers, chunks, [columns] * workers, [horizon] * workers,
+        )
+        return np.concatenate(list(results))
+
+
+def error_stats(errors: np.ndarray) -> list:
+    """Per-step MAE, RMSE, bias and residual std of (observed - predicted) errors."""
+    stats = []
+    for step in range(errors.shape[1]):
+        e = errors[:, step]
+        stats.append({
+            "horizon": step + 1,
+            "count": int(len(e)),
+            "mae": float(np.mean(np.abs(e))),
+            "rmse": float(np.sqrt(np.mean(e ** 2))),
+            "bias": float(np.mean(e)),
+            "residual_std": float(np.std(e, ddof=1)) if len(e) > 1 else 0.0,
+        })
+    return stats
+
+
+@traced("backtest")
+def run_backtest(model, features, y, horizon: int = DEFAULT_HORIZON, origins: int = DEFAULT_ORIGINS,
+                 workers: Optional[int] = None) -> Dict:
+    """Backtest `model` on the feature rows of a history (see create_feature)."""
+    started = time.perf_counter()
+    workers = workers or BACKTEST_WORKERS
+    positions = select_origins(len(features), horizon, origins)
+    columns = {name: i for i, name in enumerate(features.columns)}
+    matrix = features.to_numpy(dtype=np.float64)[positions]
+    # Row i's windows already include y[i], so (as in recursive_forecast,
+    # which labels it T+1) step h from origin i forecasts row i + 1 + h
+    observed = np.asarray(y, dtype=np.float64)[positions[:, None] + 1 + np.arange(horizon)]
+
+    workers = min(workers, len(positions)) if len(positions) >= BACKTEST_PARALLEL_MIN_ORIGINS else 1
+    with span("backtest.forecast", origins=len(positions), horizon=horizon, workers=workers):
+        predicted = _forecast_parallel(model, matrix, columns, horizon, workers)
+
+    errors = observed - predicted
+    per_horizon = error_stats(errors)
+    dates = features.index[positions]
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "horizon": horizon,
+        "origins": int(len(positions)),
+        "first_origin": dates[0].strftime("%Y-%m-%d"),
+        "last_origin": dates[-1].strftime("%Y-%m-%d"),
+        "workers": workers,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "per_horizon": per_horizon,
+        "residuals": np.round(errors[:, 0], 4).tolist(),
+    }
+
+
+def backtest_loaded(horizon: int = DEFAULT_HORIZON, origins: int = DEFAULT_ORIGINS,
+                    workers: Optional[int] = None) -> Dict:
+    """Backtest the loaded model on the loaded dataset, tagged with their versions."""
+    from api.data_loader import get_dataset, get_dataset_version
+    from api.model_loader import get_model, get_model_fingerprint
+    from api.utils.forecast_utils import create_feature
+
+    model = get_model()
+    if model is None:
+        raise RuntimeError("No model loaded")
+    features, y = create_feature(get_dataset())
+    stats = run_backtest(model, features, y, horizon, origins, workers)
+    return {
+        "model_fingerprint": get_model_fingerprint(),
+        "dataset_version": get_dataset_version(),
+        **stats,
+    }
+
+
+def save_error_stats(stats: Dict, path=ERROR_STATS_PATH):
+    """Write the stats where forecasts load them (atomically, so readers never see half a file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(stats, indent=2))
+    os.replace(tmp, path)
+    invalidate_error_stats()
+    print(f"💾 Forecast error stats saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the recursive forecaster")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    parser.add_argument("--origins", type=int, default=DEFAULT_ORIGINS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default BACKTEST_WORKERS)")
+    parser.add_argument("--save", action="store_true", help=f"Write the stats to {ERROR_STATS_PATH}")
+    args = parser.parse_args()
+
+    stats = backtest_loaded(args.horizon, args.origins, args.workers)
+    print(f"\n📈 Backtest: {stats['origins']} origins ({stats['first_origin']} .. {stats['last_origin']}), "
+          f"{stats['workers']} worker(s), {stats['elapsed_seconds']}s")
+    print(f"   {'h':>3} {'MAE':>8} {'RMSE':>8} {'bias':>8} {'std':>8}")
+    for row in stats["per_horizon"]:
+        print(f"   {row['horizon']:>3} {row['mae']:>8.3f} {row['rmse']:>8.3f} {row['bias']:>8.3f} {row['residual_std']:>8.3f}")
+    if args.save:
+        save_error_stats(stats)
+
+
+if __name__ == "__main__":
+    main()
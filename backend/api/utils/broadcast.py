@@ -0,0 +1,98 @@
+"""
+In-process broadcast hub for push channels (SSE / WebSocket).
+
+Producers (alert engine, dataset and forecast refreshes) publish each change
+once; the hub fans it out to every subscriber queue. Publishing is safe from
+worker threads. The latest event of each "snapshot" type is retained so new
+subscribers immediately get the current state.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Events whose latest value is replayed to new subscribers
+SNAPSHOT_EVENTS = {"dataset", "forecast"}
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One subscriber's queue; iterate with `await subscription.get()`."""
+
+    def __init__(self, hub: "BroadcastHub", events: Optional[Iterable[str]] = None):
+        self.hub = hub
+        self.events = set(events) if events else None
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def wants(self, event: str) -> bool:
+        return self.events is None or event in self.events
+
+    def _deliver(self, message: Dict):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            # Slow consumer: drop the oldest message rather than block producers
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> Dict:
+        return await self.queue.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.hub.unsubscribe(self)
+
+
+class BroadcastHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._snapshots: Dict[str, Dict] = {}
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, events: Optional[Iterable[str]] = None) -> Subscription:
+        """Register a subscriber (must be called from a running event loop)."""
+        subscription = Subscription(self, events)
+        with self._lock:
+            self._subscribers.add(subscription)
+            snapshots = list(self._snapshots.values())
+        for message in sorted(snapshots, key=lambda m: m["id"]):
+            if subscription.wants(message["event"]):
+                subscription._deliver(message)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: str, data) -> Dict:
+        """Fan an event out to all subscribers. Thread-safe."""
+        message = {"id": next(self._ids), "event": event, "data": data, "time": time.time()}
+        with self._lock:
+            self.published += 1
+            if event in SNAPSHOT_EVENTS:
+                self._snapshots[event] = message
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+            except RuntimeError:
+                # Subscriber's loop is closed
+                self.unsubscribe(subscription)
+        return message
+
+
+hub = BroadcastHub()
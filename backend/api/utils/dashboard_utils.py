@@ -1,25 +1,43 @@
 import pandas as pd
+from api.utils.data_transformer import action_mask
+from api.utils.dataset_metadata import DatasetMetadata, get_dataset_metadata
+from api.utils.partitions import get_partition_index
+from api.utils.tracing import span, traced
 
 
+def _pest_counts(df):
+    # float64 also for frames built outside the schema
+    return df["Pest Count/Damage"].astype("float64")
+
+
+@traced("filter_dataset")
 def filter_dataset(df, start_date, end_date, season=None, field_stage=None):
     """
     Centralized helper to filter data by date, season, and field stage.
     Handles "All" or None values automatically.
     """
-    # 1. Ensure Date format (Working on a copy to avoid SettingWithCopy warnings)
-    df = df.copy()
-    df["Date"] = pd.to_datetime(df["Date"])
     start_date = pd.to_datetime(start_date)
     end_date = pd.to_datetime(end_date)
 
-    # 2. Filter by Date
+    # 1. Only scan the year partitions whose statistics can match
+    index = get_partition_index(df)
+    if index is not None:
+        partitions = index.prune(start_date, end_date, season, field_stage)
+        with span("partition.prune", scanned=len(partitions), total=len(index.partitions)):
+            df = index.rows_for(partitions)
+
+    # 2. Ensure Date format (frames from outside the loader may carry strings)
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df = df.assign(Date=pd.to_datetime(df["Date"]))
+
+    # 3. Filter by Date
     mask = (df["Date"] >= start_date) & (df["Date"] <= end_date)
 
-    # 3. Filter by Season (only if provided and not "All")
+    # 4. Filter by Season (only if provided and not "All")
     if season and season != "All":
         mask = mask & (df["Season"] == season)
 
-    # 4. Filter by Field Stage (only if provided and not "All")
+    # 5. Filter by Field Stage (only if provided and not "All")
     if field_stage and field_stage != "All":
         mask = mask & (df["Field Stage"] == field_stage)
 
@@ -29,7 +47,7 @@ def filter_dataset(df, start_date, end_date, season=None, field_stage=None):
 def pest_sum(df, start_date, end_date, season=None, field_stage=None, exclude_days=7):
     # 1. Get Current Total (using the helper)
     current_df = filter_dataset(df, start_date, end_date, season, field_stage)
-    current_total_sum = int(current_df["Pest Count/Damage"].sum())
+    current_total_sum = int(_pest_counts(current_df).sum())
 
     # 2. Get Previous Total
     # Calculate previous end date
@@ -37,7 +55,7 @@ def pest_sum(df, start_date, end_date, season=None, field_stage=None, exclude_da
 
     # Use the SAME helper, just with a different end date
     prev_df = filter_dataset(df, start_date, prev_end_date, season, field_stage)
-    prev_total_sum = int(prev_df["Pest Count/Damage"].sum())
+    prev_total_sum = int(_pest_counts(prev_df).sum())
 
     changes = current_total_sum - prev_total_sum
     trend = "up" if changes > 0 else "down"
@@ -57,7 +75,7 @@ def average_pest_count(df, start_date, end_date, season=None, field_stage=None):
     if filtered_df.empty:
         return None
 
-    avg_count = filtered_df["Pest Count/Damage"].mean()
+    avg_count = _pest_counts(filtered_df).mean()
     return round(avg_count, 2) if not pd.isna(avg_count) else None
 
 
@@ -121,20 +139,15 @@ def action_rate(df, start_date, end_date, season=None, field_stage=None):
     if filtered_df.empty:
         return None
 
-    action_count = filtered_df[filtered_df["Action"] == "1"].shape[0]
+    action_count = int(action_mask(filtered_df).sum())
     rate = (action_count / len(filtered_df)) * 100
     return round(rate, 2)
 
 
-def dashboard_filter(df):
-    season = ["All", *df["Season"].unique().tolist()]
-    field_stage = ["All", *df["Field Stage"].unique().tolist()]
-
-    return {
-        "season": season,
-        "field_stage": field_stage,
-        "date": {"min": str(df["Date"].min()), "max": str(df["Date"].max())},
-    }
+def dashboard_filter(df=None):
+    # Served from the precomputed metadata unless an explicit frame is given
+    metadata = get_dataset_metadata() if df is None else DatasetMetadata(df)
+    return metadata.dashboard_filter()
 
 def threshold_status_counts(df, start_date, end_date, season=None, field_stage=None):
     # Use helper
@@ -143,5 +156,6 @@ def threshold_status_counts(df, start_date, end_date, season=None, field_stage=N
     if filtered_df.empty:
         return {}
 
-    status_counts = filtered_df["Threshold Status"].value_counts().to_dict()
-    return status_counts
+    # Categorical value_counts also lists statuses absent from the selection
+    status_counts = filtered_df["Threshold Status"].value_counts()
+    return status_counts[status_counts > 0].to_dict()
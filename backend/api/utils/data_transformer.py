@@ -1,12 +1,127 @@
 """
 Data transformation utilities to convert backend data to frontend format.
 """
+import numpy as np
 import pandas as pd
 from typing import List, Dict
 from datetime import datetime
 import uuid
 
+from api.utils.tracing import traced
 
+# Map raw pest codes to the names used by the frontend
+PEST_MAPPING = {
+    'RBB': 'Black Rice Bug',
+    'Black Rice Bug': 'Black Rice Bug',
+}
+DEFAULT_PEST_TYPE = 'Black Rice Bug'
+
+
+def map_pest_type(pest: str) -> str:
+    """Map a raw pest value to its frontend name."""
+    return PEST_MAPPING.get(pest, DEFAULT_PEST_TYPE)
+
+
+# Threshold value shown for each threshold status (anything else: 5.0)
+THRESHOLD_VALUES = {
+    'Economic Threshold': 10.0,
+    'Economic Damage': 5.0,
+}
+DEFAULT_THRESHOLD_VALUE = 5.0
+
+BREACH_STATUSES = ['Economic Threshold', 'Economic Damage']
+
+
+def action_mask(df: pd.DataFrame) -> pd.Series:
+    """Boolean index of rows where an action was taken (int8 0/1 in the schema; '1'/'0' strings tolerated)."""
+    action = df['Action']
+    if pd.api.types.is_numeric_dtype(action):
+        return action == 1
+    return action.astype(str) == '1'
+
+
+def threshold_values(status: pd.Series) -> np.ndarray:
+    """Map threshold statuses to threshold values through a lookup."""
+    return (
+        status.astype(object).map(THRESHOLD_VALUES)
+        .fillna(DEFAULT_THRESHOLD_VALUE)
+        .to_numpy(dtype=float)
+    )
+
+
+def _newest_first(rows: pd.DataFrame) -> pd.DataFrame:
+    # Stable descending order by date (ties keep their original order)
+    order = np.argsort(-rows['Date'].to_numpy(dtype='datetime64[ns]').astype('int64'), kind='stable')
+    return rows.iloc[order]
+
+
+def _record_columns(rows: pd.DataFrame, id_prefix: str) -> Dict:
+    """Columns shared by action and alert records, computed in bulk."""
+    return {
+        'id': (id_prefix + rows.index.astype(str)).to_numpy(),
+        'date': rows['Date'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'pestType': DEFAULT_PEST_TYPE,
+        'count': rows['Pest Count/Damage'].to_numpy(dtype=float),
+        'threshold': threshold_values(rows['Threshold Status']),
+        'fieldStage': rows['Field Stage'].to_numpy(),
+    }
+
+
+@traced("build_action_records")
+def build_action_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Threshold-action records (newest first) for rows where an action was taken.
+    Used by GET/POST /threshold/actions.
+    """
+    rows = _newest_first(df[action_mask(df)])
+    if rows.empty:
+        return []
+    columns = _record_columns(rows, 'action-')
+    columns['season'] = rows['Season'].to_numpy()
+    columns['actionType'] = 'Intervention'
+    columns['status'] = rows['Threshold Status'].to_numpy()
+    return pd.DataFrame(columns).to_dict('records')
+
+
+@traced("build_recent_alert_records")
+def build_recent_alert_records(df: pd.DataFrame, since, limit: int = 10) -> List[Dict]:
+    """
+    Most recent threshold breaches on or after `since` (newest first).
+    Used by the recent_alerts block of /dashboard/operational.
+    """
+    rows = df[
+        (df['Date'] >= since) &
+        (df['Threshold Status'].isin(BREACH_STATUSES))
+    ]
+    rows = _newest_first(rows).head(limit)
+    if rows.empty:
+        return []
+    columns = _record_columns(rows, 'alert-')
+    columns['status'] = rows['Threshold Status'].to_numpy()
+    return pd.DataFrame(columns).to_dict('records')
+
+
+def observations_to_frame(observations: List[Dict]) -> pd.DataFrame:
+    """
+    Convert ingested observations (ObservationIn dicts) to dataset rows
+    (data_loader casts them to the dataset schema).
+    """
+    rows = pd.DataFrame(observations)
+    dates = pd.to_datetime(rows['date'])
+    return pd.DataFrame({
+        'Date': dates,
+        'Year': dates.dt.year,
+        'Season': rows['season'],
+        'Field Stage': rows['field_stage'],
+        'Pest': rows['pest'],
+        'Pest Count/Damage': rows['count'].astype(float),
+        'Threshold Status': rows['threshold_status'],
+        'Action': rows['action'].astype(int),
+        'Threshold': rows['threshold_status'],
+    })
+
+
+@traced("csv_to_observations")
 def csv_to_observations(df: pd.DataFrame) -> List[Dict]:
     """
     Convert CSV DataFrame to PestObservation format expected by frontend.
@@ -33,12 +148,6 @@ def csv_to_observations(df: pd.DataFrame) -> List[Dict]:
     df = df.copy()
     df['Date'] = pd.to_datetime(df['Date'])
     
-    # Map pest names
-    pest_mapping = {
-        'RBB': 'Black Rice Bug',
-        'Black Rice Bug': 'Black Rice Bug',
-    }
-    
     # Determine threshold value based on Threshold Status
     def get_threshold_value(threshold_status: str) -> float:
         """Extract threshold value from status."""
@@ -50,7 +159,7 @@ def csv_to_observations(df: pd.DataFrame) -> List[Dict]:
             return 5.0  # Default threshold
     
     for idx, row in df.iterrows():
-        pest_type = pest_mapping.get(row.get('Pest', 'RBB'), 'Black Rice Bug')
+        pest_type = map_pest_type(row.get('Pest', 'RBB'))
         count = float(row.get('Pest Count/Damage', 0))
         threshold_status = str(row.get('Threshold Status', 'Below Threshold'))
         threshold_value = get_threshold_value(threshold_status)
@@ -76,6 +185,7 @@ def csv_to_observations(df: pd.DataFrame) -> List[Dict]:
     return observations
 
 
+@traced("calculate_kpis_from_observations")
 def calculate_kpis_from_observations(observations: List[Dict]) -> Dict:
     """
     Calculate KPIs from observations in frontend format.
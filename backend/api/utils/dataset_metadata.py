@@ -0,0 +1,88 @@
+"""
+Dataset metadata: distinct values, date bounds and years of the loaded dataset.
+
+Computed once per dataset version (at load time and again whenever the
+dataset is replaced) so filter endpoints only serialize a ready object.
+"""
+import threading
+
+from api.data_loader import get_dataset, get_dataset_version, on_dataset_change
+from api.utils.data_transformer import map_pest_type
+
+
+def _distinct(series):
+    """Distinct values in order of first appearance."""
+    return series.drop_duplicates().tolist()
+
+
+class DatasetMetadata:
+    """Precomputed filter options for one dataset version."""
+
+    def __init__(self, df, version=None):
+        self.version = version
+        self.row_count = len(df)
+
+        # Order of first appearance (dashboard) and sorted (filters)
+        self.seasons = _distinct(df["Season"])
+        self.field_stages = _distinct(df["Field Stage"])
+        self.threshold_statuses = sorted(_distinct(df["Threshold Status"]))
+        # "0"/"1" strings, as the frontend's isActionTaken options expect
+        self.action_values = sorted(str(value) for value in _distinct(df["Action"]))
+
+        self.pest_types = sorted({map_pest_type(pest) for pest in _distinct(df["Pest"])})
+
+        self.date_min = df["Date"].min()
+        self.date_max = df["Date"].max()
+        # Newest first
+        self.years = sorted(_distinct(df["Date"].dt.year), reverse=True)
+
+    def basic_filters(self):
+        return {
+            "field_stages": sorted(self.field_stages),
+            "pest_types": self.pest_types,
+            "date": {"min": str(self.date_min), "max": str(self.date_max)},
+            "years": self.years,
+        }
+
+    def advanced_filters(self):
+        return {
+            "season": sorted(self.seasons),
+            "threshold_status": self.threshold_statuses,
+            "isActionTaken": self.action_values,
+        }
+
+    def dashboard_filter(self):
+        return {
+            "season": ["All", *self.seasons],
+            "field_stage": ["All", *self.field_stages],
+            "date": {"min": str(self.date_min), "max": str(self.date_max)},
+        }
+
+
+_metadata = None
+_lock = threading.Lock()
+
+
+def _rebuild(df, version):
+    global _metadata
+    if df is None:
+        return None
+    metadata = DatasetMetadata(df, version)
+    with _lock:
+        _metadata = metadata
+    return metadata
+
+
+def get_dataset_metadata():
+    """Return metadata for the current dataset version, rebuilding if stale."""
+    # Loading the dataset on first use builds the metadata via the listener
+    df = get_dataset()
+    metadata = _metadata
+    version = get_dataset_version()
+    if metadata is not None and metadata.version == version:
+        return metadata
+    return _rebuild(df, version)
+
+
+# Computed when the dataset loads and refreshed whenever its version changes
+on_dataset_change(_rebuild)
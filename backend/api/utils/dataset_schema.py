@@ -0,0 +1,115 @@
+"""
+Declared schema of the observation dataset (data/*.csv).
+
+read_csv with inferred dtypes gave a float64 Year, an int64 Action and an
+object column per categorical, and parsed dates in a second pass. The
+loader reads only the columns the API uses, with compact dtypes,
+categories for the low-cardinality strings and a fixed date format;
+frames from other sources (ingested rows, benchmarks) are cast to the same
+schema. Action is 0/1 as int8 everywhere; compare through action_mask().
+Pest counts stay float64: they are served and fed to the model as read
+(float32 turns 3.7 into 3.700000047683716).
+Each row also carries the data file (partition) it came from in Source.
+"""
+import hashlib
+import io
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DATE_COLUMN = "Date"
+DATE_FORMAT = "%Y-%m-%d"
+
+# Partition (data file stem) of each row; ingested rows use INGEST_SOURCE
+SOURCE_COLUMN = "Source"
+INGEST_SOURCE = "ingest"
+
+# CSV column -> dtype; the CSV's "Stage Type" is not used and not loaded
+CSV_DTYPES: Dict[str, str] = {
+    "Year": "int16",
+    "Season": "category",
+    "Field Stage": "category",
+    "Pest": "category",
+    "Pest Count/Damage": "float64",
+    "Threshold Status": "category",
+    "Action": "int8",
+    "Threshold": "category",
+}
+CSV_COLUMNS: List[str] = [DATE_COLUMN, *CSV_DTYPES]
+
+DTYPES: Dict[str, str] = {**CSV_DTYPES, SOURCE_COLUMN: "category"}
+COLUMNS: List[str] = [DATE_COLUMN, *DTYPES]
+
+CATEGORY_COLUMNS = [column for column, dtype in DTYPES.items() if dtype == "category"]
+
+# Years are written as "2019.0"; read as float, then narrowed
+_READ_DTYPES = {**CSV_DTYPES, "Year": "float32"}
+
+
+def read_dataset(source) -> pd.DataFrame:
+    """Read a dataset CSV (path or buffer) straight into the schema."""
+    df = pd.read_csv(
+        source,
+        usecols=CSV_COLUMNS,
+        dtype=_READ_DTYPES,
+        parse_dates=[DATE_COLUMN],
+        date_format=DATE_FORMAT,
+    )
+    df["Year"] = df["Year"].astype(DTYPES["Year"])
+    return df
+
+
+def read_partition(path) -> Tuple[str, pd.DataFrame]:
+    """
+    Read one data file: (content hash, frame tagged with the file stem as
+    Source). Runs in loader worker processes.
+    """
+    path = Path(path)
+    raw = path.read_bytes()
+    df = read_dataset(io.BytesIO(raw))
+    df[SOURCE_COLUMN] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [path.stem])
+    return hashlib.sha1(raw).hexdigest(), df
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of `df` with the schema's columns and dtypes."""
+    df = df[[column for column in COLUMNS if column in df.columns]].copy()
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+    for column, dtype in DTYPES.items():
+        if column in df.columns and df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def concat_datasets(*frames: pd.DataFrame) -> pd.DataFrame:
+    """
+    Concatenate schema-typed frames, keeping category columns categorical (a
+    plain concat falls back to object when the category sets differ).
+    """
+    frames = [frame.copy(deep=False) for frame in frames]
+    for column in CATEGORY_COLUMNS:
+        if all(column in frame.columns for frame in frames):
+            categories = union_categoricals(
+                [frame[column] for frame in frames], ignore_order=True
+            ).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames)
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, int]:
+    """Bytes held by each column (deep, so object strings are counted)."""
+    usage = df.memory_usage(deep=True, index=True)
+    return {str(column): int(size) for column, size in usage.items()}
+
+
+def print_memory_report(df: pd.DataFrame):
+    report = memory_report(df)
+    total = sum(report.values())
+    print(f"📦 Dataset memory: {total / 1024 / 1024:.2f} MB for {len(df):,} rows")
+    for column, size in report.items():
+        dtype = df[column].dtype if column in df.columns else "index"
+        print(f"   {column:<20} {str(dtype):<16} {size / 1024:>10.1f} KB")
@@ -0,0 +1,93 @@
+"""
+Chart history for forecast responses: windowing and LTTB downsampling.
+
+/dashboard/forecast and /forecast/predict return the observed series next
+to the forecast. history_days keeps only the most recent days and
+max_points reduces the series with Largest-Triangle-Three-Buckets, which
+keeps the points that shape the line (peaks and troughs survive) instead of
+every n-th point. Results are cached per dataset version in the query cache.
+"""
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from api.data_loader import get_dataset_version
+from api.utils.result_cache import query_cache
+from api.utils.tracing import traced
+
+COUNT_COLUMN = "Pest Count/Damage"
+
+# Default max_points when a request sets none (0 = full resolution)
+HISTORY_MAX_POINTS = int(os.getenv("FORECAST_HISTORY_MAX_POINTS", "0"))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the `n_out` points Largest-Triangle-Three-Buckets keeps from
+    the x-sorted series (x, y). The first and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    # Average of each bucket, then of the one after it (the last point for the final bucket)
+    sizes = stops - starts
+    avg_x = np.add.reduceat(x[: n - 1], starts) / sizes
+    avg_y = np.add.reduceat(y[: n - 1], starts) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+        # Twice the area of (previous point, candidate, next bucket average)
+        px, py = x[previous], y[previous]
+        area = np.abs(
+            (px - next_x[bucket]) * (y[start:stop] - py)
+            - (px - x[start:stop]) * (next_y[bucket] - py)
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def _chart_history(df: pd.DataFrame, history_days: Optional[int], max_points: Optional[int]) -> Dict:
+    if history_days and not df.empty:
+        # Rows are date-sorted; keep the last `history_days` days
+        since = df["Date"].iloc[-1] - pd.Timedelta(days=history_days - 1)
+        df = df.iloc[int(df["Date"].searchsorted(since, side="left")):]
+
+    dates = df["Date"]
+    counts = df[COUNT_COLUMN].to_numpy(dtype=np.float64)
+    # Extremes of the whole window: LTTB does not guarantee they survive
+    max_count = float(counts.max()) if len(counts) else 0.0
+    min_count = float(counts.min()) if len(counts) else 0.0
+    if max_points and len(df) > max_points:
+        keep = lttb(dates.to_numpy(dtype="datetime64[ns]").astype(np.int64), counts, max_points)
+        dates, counts = dates.iloc[keep], counts[keep]
+
+    return {
+        "max_pest_count": max_count,
+        "min_pest_count": min_count,
+        "current_dates": dates.dt.strftime("%Y-%m-%d").tolist(),
+        "actual": counts.tolist(),
+    }
+
+
+@traced("chart_history")
+def chart_history(df: pd.DataFrame, history_days: Optional[int] = None, max_points: Optional[int] = None) -> Dict:
+    """
+    max/min count, dates and actual values of the observed series, limited
+    to the last `history_days` days and downsampled to `max_points` points.
+    """
+    max_points = max_points if max_points is not None else HISTORY_MAX_POINTS
+    key = ("chart_history", history_days, max_points, get_dataset_version())
+    return query_cache.get_or_compute(key, _chart_history, df, history_days, max_points)
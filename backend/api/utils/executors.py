@@ -0,0 +1,136 @@
+"""
+Named thread pools for CPU-heavy route work.
+
+Routes are `async def` and hand pandas / XGBoost sections to a dedicated
+pool instead of Starlette's shared default threadpool, so a burst of
+forecasts queues behind the forecast pool's own limit and cannot starve
+cheap aggregation or filter requests. Each pool's size and queue limit are
+configurable through the environment (EXECUTOR_<NAME>_WORKERS /
+EXECUTOR_<NAME>_QUEUE) and every pool keeps queue metrics.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from fastapi import HTTPException, status
+
+# All NamedExecutor instances by name (for stats reporting)
+registry: Dict[str, "NamedExecutor"] = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class NamedExecutor:
+    """
+    A thread pool with a concurrency limit (max_workers), an optional
+    bound on waiting tasks (max_queue, 0 = unbounded) and queue metrics.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        self.name = name
+        self.max_workers = _env_int(f"EXECUTOR_{name.upper()}_WORKERS", max_workers)
+        self.max_queue = _env_int(f"EXECUTOR_{name.upper()}_QUEUE", max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+        registry[name] = self
+
+    def _call(self, enqueued: float, fn: Callable, args, kwargs):
+        started = time.perf_counter()
+        waited = started - enqueued
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds += time.perf_counter() - started
+        return result
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) on this pool and await the result."""
+        with self._lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Server busy ({self.name} queue full), please retry",
+                )
+            self.queued += 1
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        # Carry the caller's context (active trace) into the worker thread
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, self._call, time.perf_counter(), fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        # Cancelled before a worker picked it up (client went away / shutdown)
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        started = self.completed + self.running
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / started * 1000, 3) if started else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "avg_run_ms": round(self.run_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+        }
+
+
+# Filtering, KPI and operational aggregations
+aggregation_executor = NamedExecutor("aggregation", max_workers=4)
+
+# Feature building and XGBoost recursive forecasts
+forecast_executor = NamedExecutor("forecast", max_workers=2, max_queue=32)
+
+# Model retraining (POST /admin/model/train): one run at a time, off the
+# forecast pool so a long grid search never holds up forecasts
+training_executor = NamedExecutor("training", max_workers=1, max_queue=1)
+
+
+def executor_stats() -> Dict[str, Dict]:
+    return {name: executor.stats() for name, executor in registry.items()}
+
+
+def shutdown_executors():
+    for executor in registry.values():
+        executor.shutdown()
@@ -1,11 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
 import pandas as pd, numpy as np
 from collections import Counter
 
+from api.model_loader import get_model_fingerprint
+from api.utils.tracing import span, traced
+
+# Fallback interval width when no backtest stats match the loaded model
 STD_ERROR = 0.6148985557583696
 ROLL_WINDOWS = [3, 5, 7]
 N_LAG = 7
 
+# Prediction intervals: "fixed" (z * STD_ERROR) or "simulation" (Monte Carlo paths)
+FORECAST_INTERVALS = os.getenv("FORECAST_INTERVALS", "fixed").lower()
+SIMULATION_PATHS = int(os.getenv("FORECAST_SIMULATION_PATHS", "1000"))
+# Fixed seed: the same dataset and model give the same intervals (and ETag)
+SIMULATION_SEED = int(os.getenv("FORECAST_SIMULATION_SEED", "0"))
+
+# Per-horizon error stats written by the backtest (api/utils/backtest.py)
+ERROR_STATS_PATH = Path(os.getenv("FORECAST_ERROR_STATS", "backtests/forecast_error.json"))
+
+# Seconds between checks of the stats file for writes by other processes
+# (save_error_stats invalidates this process's copy at once)
+ERROR_STATS_RECHECK = float(os.getenv("FORECAST_ERROR_STATS_RECHECK", "5"))
+
+_error_stats = (None, None, None)  # (file mtime, stats, version)
+_error_stats_checked = None  # time.monotonic() of the last stat
+_error_stats_lock = threading.Lock()
+
+
+def invalidate_error_stats():
+    """Re-check the stats file on next use (called by the backtest writer)."""
+    global _error_stats_checked
+    _error_stats_checked = None
+
+
+def load_error_stats():
+    """
+    (stats, version) from ERROR_STATS_PATH, re-read when the file changes;
+    (None, None) when there is no stats file. The file is checked at most
+    every ERROR_STATS_RECHECK seconds, so per-request callers never stat it.
+    """
+    global _error_stats, _error_stats_checked
+    checked = _error_stats_checked
+    if checked is not None and time.monotonic() - checked < ERROR_STATS_RECHECK:
+        return _error_stats[1], _error_stats[2]
+    now = time.monotonic()
+    try:
+        mtime = ERROR_STATS_PATH.stat().st_mtime_ns
+    except OSError:
+        with _error_stats_lock:
+            _error_stats, _error_stats_checked = (None, None, None), now
+        return None, None
+    with _error_stats_lock:
+        if _error_stats[0] != mtime:
+            try:
+                raw = ERROR_STATS_PATH.read_bytes()
+                stats = json.loads(raw)
+            except (OSError, ValueError) as error:
+                print(f"⚠️ Could not read forecast error stats {ERROR_STATS_PATH}: {error}")
+                return None, None
+            _error_stats = (mtime, stats, hashlib.sha1(raw).hexdigest()[:16])
+        _error_stats_checked = now
+        return _error_stats[1], _error_stats[2]
+
+
+def current_error_stats():
+    """Backtest stats if they were computed for the loaded model, else None."""
+    stats, _ = load_error_stats()
+    if stats is None or stats.get("model_fingerprint") != get_model_fingerprint():
+        return None
+    return stats
+
 
+def get_error_stats_version():
+    """Version of the interval widths in use ("default" for STD_ERROR)."""
+    if current_error_stats() is None:
+        return "default"
+    return load_error_stats()[1]
+
+
+def step_std_errors(horizon):
+    """
+    Residual std for each forecast step: the backtest's per-horizon values
+    (the last one repeated past its horizon), or STD_ERROR for every step.
+    """
+    stats = current_error_stats()
+    if stats is None:
+        return np.full(horizon, STD_ERROR)
+    stds = np.array([h["residual_std"] for h in stats["per_horizon"]], dtype=np.float64)
+    if horizon > len(stds):
+        stds = np.append(stds, np.full(horizon - len(stds), stds[-1]))
+    return stds[:horizon]
+
+
+@traced("create_feature")
 def create_feature(df):
 
     add_ewm = True
@@ -38,23 +132,104 @@ def create_feature(df):
             features[f"ewm_mean_{w}"] = series.ewm(span=w).mean()
             features[f"ewm_std_{w}"] = series.ewm(span=w).std()
 
-    features = features.dropna()
-    y = series.loc[features.index]
+    # Select positionally: with several observations per date the Date
+    # index has duplicates and a label lookup would multiply the rows
+    complete = features.notna().all(axis=1).to_numpy()
+    features = features[complete]
+    y = series[complete]
     return features, y
 
 
-def recursive_forecast(model, features, horizon):
+def _update_features(matrix, values, columns):
+    """
+    Feed `values` back into each row of `matrix` as the newest observation:
+    shift the lags and recompute the window statistics from them.
+    """
+    lags = [columns[f"lag_{i}"] for i in range(1, N_LAG + 1)]
+    matrix[:, lags[1:]] = matrix[:, lags[:-1]]
+    matrix[:, lags[0]] = values
+    for w in ROLL_WINDOWS:
+        window = matrix[:, lags[: min(N_LAG, w)]]
+        mean = window.mean(axis=1)
+        std = window.std(axis=1)
+        matrix[:, columns[f"roll_mean_{w}"]] = mean
+        matrix[:, columns[f"roll_std_{w}"]] = std
+        matrix[:, columns[f"roll_min_{w}"]] = window.min(axis=1)
+        matrix[:, columns[f"roll_max_{w}"]] = window.max(axis=1)
+        matrix[:, columns[f"roll_median_{w}"]] = np.median(window, axis=1)
+        matrix[:, columns[f"roll_cumsum_{w}"]] = window.sum(axis=1)
+        matrix[:, columns[f"ewm_mean_{w}"]] = mean
+        matrix[:, columns[f"ewm_std_{w}"]] = std
+
+
+def forecast_step(model, matrix, columns, noise=None):
+    """
+    One recursive step for every row of `matrix`: predict, add the row's
+    `noise` (simulated paths), clip at 0 (pest counts can't go negative)
+    and feed the value back into the row's lags. Returns the fed-back
+    values. Shared by recursive_forecast and the backtest, so the backtest
+    scores the forecaster that is served.
+    """
+    with span("model.predict", rows=len(matrix)):
+        predicted = model.predict(matrix)
+    values = np.maximum(predicted if noise is None else predicted + noise, 0.0)
+    _update_features(matrix, values, columns)
+    return values
+
+
+def one_step_residuals():
+    """
+    Out-of-sample one-step errors (observed - predicted) from the saved
+    backtest of the loaded model, or None.
+    """
+    stats = current_error_stats()
+    if stats is None or not stats.get("residuals"):
+        return None
+    return np.asarray(stats["residuals"], dtype=np.float64)
+
+
+@traced("recursive_forecast")
+def recursive_forecast(model, features, horizon, intervals=None, residuals=None, paths=None, seed=None):
     """
     XGBoost recursive forecasting function.
     Uses XGBoost model to generate multi-step ahead predictions with confidence intervals.
+
+    intervals="fixed" (default FORECAST_INTERVALS) puts a band of z * the
+    step's backtest residual std (STD_ERROR without backtest stats) around
+    every step. intervals="simulation" advances `paths` perturbed paths
+    next to the point forecast: at every step each path's prediction gets
+    a residual resampled from `residuals` (default: the one-step errors of
+    the saved backtest; normal with the one-step std without one) and is
+    fed back into its own lags, so errors compound through the model and
+    the 2.5% / 97.5% quantiles widen with the horizon. The point forecast
+    and all paths share one batched predict per step.
+
+    Pest counts can't go negative: the point forecast, the paths and both
+    bounds are clipped at 0 in either mode.
     """
     z = 1.96  # 95% CI
+    intervals = intervals or FORECAST_INTERVALS
+    if intervals not in ("fixed", "simulation"):
+        raise ValueError(f"Unknown forecast intervals {intervals!r} (use 'fixed' or 'simulation')")
+    simulate = intervals == "simulation"
+    paths = (paths or SIMULATION_PATHS) if simulate else 0
+    rng = np.random.default_rng(SIMULATION_SEED if seed is None else seed)
+    std_errors = step_std_errors(horizon)
+    if simulate:
+        if residuals is None:
+            residuals = one_step_residuals()
+        if residuals is not None:
+            residuals = np.asarray(residuals, dtype=np.float64).ravel()
+            residuals = residuals[np.isfinite(residuals)]
+
     predictions = []
     ci_lower = []
     ci_upper = []
 
-    # Last available features row
-    latest_features = features.iloc[-1].copy()
+    # Row 0 is the point forecast, rows 1.. the simulated paths
+    columns = {name: i for i, name in enumerate(features.columns)}
+    matrix = np.tile(features.iloc[-1].to_numpy(dtype=np.float64), (1 + paths, 1))
+    noise = np.zeros(1 + paths) if simulate else None
     last_date = features.index[-1]
 
     future_dates = (
@@ -64,36 +239,26 @@ def recursive_forecast(model, features, horizon):
     )
 
     for step in range(horizon):
-        # XGBoost model prediction
-        X = latest_features.values.reshape(1, -1)
-        y_pred = model.predict(X)[0]
-        predictions.append(y_pred)
+        with span("forecast.step", step=step):
+            if simulate:
+                if residuals is not None and len(residuals):
+                    noise[1:] = rng.choice(residuals, size=paths)
+                else:
+                    noise[1:] = rng.normal(0.0, float(std_errors[0]), size=paths)
+            # XGBoost model prediction, fed back into the lag and rolling features
+            values = forecast_step(model, matrix, columns, noise)
+            point = values[0]
+            predictions.append(point)
 
-        # Compute CI using std_error from backtest residuals
-        # lower = max(0, y_pred - z * std_error)  # clip at 0
-        # upper = y_pred + z * std_error
-
-        ci_lower.append(y_pred - z * STD_ERROR)
-        ci_upper.append(y_pred + z * STD_ERROR)
-
-        # --- Update lag features ---
-        for lag in range(N_LAG, 1, -1):
-            latest_features[f"lag_{lag}"] = latest_features[f"lag_{lag-1}"]
-        latest_features["lag_1"] = y_pred
-
-        # --- Update rolling statistics ---
-        for w in ROLL_WINDOWS:
-            lags_for_window = [
-                latest_features[f"lag_{i}"] for i in range(1, min(N_LAG, w) + 1)
-            ]
-            latest_features[f"roll_mean_{w}"] = np.mean(lags_for_window)
-            latest_features[f"roll_std_{w}"] = np.std(lags_for_window)
-            latest_features[f"roll_min_{w}"] = np.min(lags_for_window)
-            latest_features[f"roll_max_{w}"] = np.max(lags_for_window)
-            latest_features[f"roll_median_{w}"] = np.median(lags_for_window)
-            latest_features[f"roll_cumsum_{w}"] = np.sum(lags_for_window)
-            latest_features[f"ewm_mean_{w}"] = np.mean(lags_for_window)
-            latest_features[f"ewm_std_{w}"] = np.std(lags_for_window)
+            if simulate:
+                lower, upper = np.quantile(values[1:], [0.025, 0.975])
+            else:
+                # Compute CI using std_error from backtest residuals
+                lower = point - z * float(std_errors[step])
+                upper = point + z * float(std_errors[step])
+            # A skewed error distribution can put a quantile past the point itself
+            ci_lower.append(max(min(lower, point), 0.0))
+            ci_upper.append(max(upper, point))
 
     # Convert to dict with index-based keys for frontend compatibility
     result = {
@@ -126,11 +291,26 @@ def risk_levels(forecast):
 
 def peak_day(forecast):
     return {
-        "peak_count": np.round(max(forecast["forecast"].values()), 1),  # Changed to 1 decimal for consistency
+        "peak_count": float(np.round(max(forecast["forecast"].values()), 1)),  # Changed to 1 decimal for consistency
+        # forecast dicts are keyed by the string step index
         "peak_date": forecast["future_dates"][
-            np.argmax(np.array([v for v in forecast["forecast"].values()]))
+            str(np.argmax(np.array([v for v in forecast["forecast"].values()])))
         ],
     }
 
 
+def forecast_summary(forecast):
+    """KPI summary of a forecast (served by /forecast/kpi and pushed on refresh)."""
+    return {
+        "risk_levels": risk_levels(forecast),
+        "day_above_threshold": len(
+            [i for i in forecast["forecast"].values() if i >= 10]
+        ),
+        "avg_predicted": float(np.round(
+            np.array([v for v in forecast["forecast"].values()]).mean(), 1
+        )),  # Changed to 1 decimal for consistency with frontend
+        "peak_day": peak_day(forecast),
+    }
+
+
 
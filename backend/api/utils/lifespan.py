@@ -1,26 +1,83 @@
+import asyncio
+import os
+import time
 from contextlib import asynccontextmanager
+from api.db import create_indexes
+from api.model_loader import refresh_model
 from api.mongo_client import get_latest_model, verify_and_load_model
-from api.utils.startup import initialize_database
+from api.utils.startup import seed_admin_user
+from api.utils.executors import shutdown_executors
+from api.utils.metrics import startup_duration_seconds
+from api.utils.warmup import WARMUP_ON_STARTUP, start_warmup
+
+# Seconds each required startup task may take before the server starts without it
+STARTUP_TASK_TIMEOUT = float(os.getenv("STARTUP_TASK_TIMEOUT", "15"))
+
+# The model registry check runs in the background after startup
+MODEL_REGISTRY_CHECK = os.getenv("MODEL_REGISTRY_CHECK", "true").lower() != "false"
+MODEL_REGISTRY_TIMEOUT = float(os.getenv("MODEL_REGISTRY_TIMEOUT", "60"))
+
+
+async def run_startup_task(name, fn, timeout):
+    """
+    Run a blocking startup function on a worker thread with a timeout.
+    Failures and timeouts are logged, never raised: the server starts anyway.
+    """
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(asyncio.to_thread(fn), timeout)
+    except asyncio.TimeoutError:
+        # The thread can't be interrupted; it finishes (or fails) on its own
+        print(f"⏱️ Startup task '{name}' timed out after {timeout:g}s, continuing without it")
+        return None
+    except Exception as e:
+        print(f"❌ Startup task '{name}' failed: {e}")
+        return None
+    print(f"✅ Startup task '{name}' done in {time.perf_counter() - started:.2f}s")
+    return result
+
+
+def check_model_registry():
+    """
+    Download the newest registry model into models/ (if any), verify it and
+    reload if the warm-up already loaded another (or failed to load one).
+    """
+    model_path = get_latest_model()
+    if model_path:
+        # Check if it works
+        if verify_and_load_model(model_path) is not None:
+            refresh_model()
+    else:
+        print("⚠️ WARNING: No model found (Online or Offline). Predictions will fail.")
+    return model_path
+
 
 @asynccontextmanager
 async def lifespan(app):
     print("\n🚀 SERVER STARTUP: Initializing System...")
+    started = time.perf_counter()
 
-    try:
-        # Initialize user database (indexes, admin user)
-        await initialize_database()
-        
-        # Load ML model
-        model_path = get_latest_model()
-        if model_path:
-            # Check if it works
-            loaded_model = verify_and_load_model(model_path)
-        else:
-            print("⚠️ WARNING: No model found (Online or Offline). Predictions will fail.")
+    # Dataset, model and forecast load in the background; GET /ready reports them
+    if WARMUP_ON_STARTUP:
+        start_warmup()
 
-    except Exception as e:
-        print(f"❌ Critical Startup Error: {e}")
+    # Required tasks run concurrently and are awaited (each bounded by its timeout)
+    await asyncio.gather(
+        run_startup_task("database indexes", create_indexes, STARTUP_TASK_TIMEOUT),
+        run_startup_task("admin user", seed_admin_user, STARTUP_TASK_TIMEOUT),
+    )
+
+    # Optional tasks keep running after the server starts accepting requests
+    background = []
+    if MODEL_REGISTRY_CHECK:
+        background.append(asyncio.create_task(
+            run_startup_task("model registry", check_model_registry, MODEL_REGISTRY_TIMEOUT)
+        ))
 
+    startup_duration_seconds.set(round(time.perf_counter() - started, 3))
     print("✅ SERVER READY: API is listening for requests.\n")
-    yield  
-    print("🛑 SERVER SHUTDOWN: Cleaning up resources...")
\ No newline at end of file
+    yield
+    print("🛑 SERVER SHUTDOWN: Cleaning up resources...")
+    for task in background:
+        task.cancel()
+    shutdown_executors()
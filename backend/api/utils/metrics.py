@@ -0,0 +1,209 @@
+"""
+Lightweight Prometheus-style metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms are plain in-process objects: recording is
+a dict lookup plus a bisect under a short lock, cheap enough to leave on in
+production. Values that already live elsewhere (dataset size, cache and
+pool statistics) are read at scrape time through collectors instead of
+being mirrored on every request. Mongo command latency is recorded by a
+pymongo CommandListener passed to each MongoClient.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def sample_lines(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict, float]]) -> List[str]:
+    """Render one metric family from (labels, value) pairs."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def collector(self, fn: Callable[[], List[str]]):
+        """Register fn() -> exposition lines, evaluated on every scrape."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        for collect in list(self._collectors):
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, float] = {}
+        registry.register(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = self._header()
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(series)) for labels, series in self._values.items()]
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for labels, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# --- HTTP ---------------------------------------------------------------------
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+
+# --- Startup ------------------------------------------------------------------
+
+startup_duration_seconds = Gauge(
+    "app_startup_duration_seconds", "Time spent in the startup lifespan."
+)
+process_start_time_seconds = Gauge(
+    "process_start_time_seconds", "Start time of the process since unix epoch in seconds."
+)
+process_start_time_seconds.set(time.time())
+
+# --- MongoDB ------------------------------------------------------------------
+
+mongo_command_duration_seconds = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency by command and outcome.",
+    ("command", "status"),
+    buckets=MONGO_BUCKETS,
+)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every driver command's round trip (pass via event_listeners=)."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration_seconds.observe(event.duration_micros / 1e6, event.command_name, "ok")
+
+    def failed(self, event):
+        mongo_command_duration_seconds.observe(event.duration_micros / 1e6, event.command_name, "error")
+
+
+mongo_command_listener = MongoCommandMetrics()
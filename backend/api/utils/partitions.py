@@ -0,0 +1,150 @@
+"""
+Year partitions of the loaded dataset with pruning statistics.
+
+The dataset is kept sorted by date, so every year is one contiguous row
+range. For each year the index records the date range, the min/max pest
+count and which seasons and field stages occur. Filtered queries only scan
+the row ranges of partitions whose statistics can match (a 30-day window on
+a ten-year history touches one or two partitions instead of every row).
+
+The index is rebuilt for every dataset version; frames other than the
+loaded dataset (or unsorted ones) are scanned in full.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from api.data_loader import on_dataset_change
+
+COUNT_COLUMN = "Pest Count/Damage"
+
+
+def _present(column: pd.Series, start: int, stop: int) -> frozenset:
+    """Distinct values of column[start:stop] (through category codes when possible)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = np.unique(column.cat.codes.to_numpy()[start:stop])
+        categories = column.cat.categories
+        return frozenset(categories[code] for code in codes if code >= 0)
+    return frozenset(column.iloc[start:stop].dropna().unique())
+
+
+class Partition:
+    """Statistics of one year's contiguous row range."""
+
+    __slots__ = ("year", "start", "stop", "date_min", "date_max", "count_min", "count_max",
+                 "seasons", "field_stages")
+
+    def __init__(self, year, start, stop, date_min, date_max, count_min, count_max, seasons, field_stages):
+        self.year = year
+        self.start = start
+        self.stop = stop
+        self.date_min = date_min
+        self.date_max = date_max
+        self.count_min = count_min
+        self.count_max = count_max
+        self.seasons = seasons
+        self.field_stages = field_stages
+
+    @property
+    def rows(self) -> int:
+        return self.stop - self.start
+
+    def may_match(self, start_date, end_date, season=None, field_stage=None) -> bool:
+        """False only when the statistics rule out every row of the partition."""
+        if end_date < self.date_min or start_date > self.date_max:
+            return False
+        if season and season != "All" and season not in self.seasons:
+            return False
+        if field_stage and field_stage != "All" and field_stage not in self.field_stages:
+            return False
+        return True
+
+    def to_dict(self) -> Dict:
+        return {
+            "year": self.year,
+            "rows": self.rows,
+            "date_min": self.date_min.strftime("%Y-%m-%d"),
+            "date_max": self.date_max.strftime("%Y-%m-%d"),
+            "count_min": self.count_min,
+            "count_max": self.count_max,
+            "seasons": sorted(self.seasons),
+            "field_stages": sorted(self.field_stages),
+        }
+
+
+class PartitionIndex:
+    """Year partitions of one date-sorted frame."""
+
+    def __init__(self, df: pd.DataFrame, version: Optional[str] = None):
+        self.frame = df
+        self.version = version
+        self.partitions: List[Partition] = []
+        if df.empty:
+            return
+
+        dates = df["Date"].to_numpy()
+        years = df["Date"].dt.year.to_numpy()
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(years)) + 1])
+        stops = np.append(starts[1:], len(df))
+        counts = df[COUNT_COLUMN].to_numpy(dtype=np.float64)
+        count_min = np.fmin.reduceat(counts, starts)
+        count_max = np.fmax.reduceat(counts, starts)
+        for i, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+            self.partitions.append(Partition(
+                year=int(years[start]),
+                start=start,
+                stop=stop,
+                date_min=pd.Timestamp(dates[start]),
+                date_max=pd.Timestamp(dates[stop - 1]),
+                count_min=float(count_min[i]),
+                count_max=float(count_max[i]),
+                seasons=_present(df["Season"], start, stop),
+                field_stages=_present(df["Field Stage"], start, stop),
+            ))
+
+    def prune(self, start_date, end_date, season=None, field_stage=None) -> List[Partition]:
+        return [p for p in self.partitions if p.may_match(start_date, end_date, season, field_stage)]
+
+    def rows_for(self, partitions: List[Partition]) -> pd.DataFrame:
+        """The frame's rows in `partitions`, as slices of adjacent partition runs."""
+        if not partitions:
+            return self.frame.iloc[0:0]
+        runs = []
+        for p in partitions:
+            if runs and runs[-1][1] == p.start:
+                runs[-1][1] = p.stop
+            else:
+                runs.append([p.start, p.stop])
+        if len(runs) == 1:
+            start, stop = runs[0]
+            return self.frame.iloc[start:stop]
+        return pd.concat([self.frame.iloc[start:stop] for start, stop in runs])
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "rows": len(self.frame),
+            "partitions": [p.to_dict() for p in self.partitions],
+        }
+
+
+_index: Optional[PartitionIndex] = None
+_lock = threading.Lock()
+
+
+@on_dataset_change
+def _rebuild(df, version):
+    global _index
+    index = PartitionIndex(df, version) if df["Date"].is_monotonic_increasing else None
+    with _lock:
+        _index = index
+
+
+def get_partition_index(df: Optional[pd.DataFrame] = None) -> Optional[PartitionIndex]:
+    """Index of the loaded dataset; None if `df` is given and is another frame."""
+    index = _index
+    if index is None or (df is not None and index.frame is not df):
+        return None
+    return index
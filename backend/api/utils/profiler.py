@@ -0,0 +1,159 @@
+"""
+On-demand profiling of the running worker process.
+
+CPU mode samples every thread's stack with sys._current_frames() at a fixed
+interval for a bounded time and aggregates them into collapsed stacks
+("thread;outer;...;inner count"), the input format of flamegraph.pl,
+speedscope and similar tools. Memory mode diffs two tracemalloc snapshots
+taken `duration` seconds apart and reports where allocations grew, either
+as top source lines or as collapsed allocation stacks weighted by bytes.
+
+Both block the calling thread for `duration`; run them off the event loop.
+Only one profile runs per process at a time.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+# Stack depth kept per sample / allocation traceback
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 25
+
+# Leaf frames of threads that are just waiting (dropped unless include_idle)
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_base.py", "result"),
+    ("periodic_executor.py", "_run"),
+}
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this process."""
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        index = path.rfind(marker)
+        if index != -1:
+            return path[index + len(marker):]
+    return os.path.basename(path)
+
+
+def _frame_label(filename: str, name: str, lineno: int) -> str:
+    return f"{name} ({_short_path(filename)}:{lineno})"
+
+
+def _collapse(counts: Counter) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
+
+
+def _acquire():
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running on this worker")
+
+
+def sample_cpu(duration: float, interval: float = 0.01, include_idle: bool = False) -> Dict:
+    """Sample all thread stacks for `duration` seconds; returns collapsed stacks."""
+    _acquire()
+    try:
+        own_thread = threading.get_ident()
+        counts: Counter = Counter()
+        samples = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(_frame_label(code.co_filename, code.co_name, frame.f_lineno))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+        return {
+            "pid": os.getpid(),
+            "duration": duration,
+            "interval": interval,
+            "samples": samples,
+            "collapsed": _collapse(counts),
+        }
+    finally:
+        _profile_lock.release()
+
+
+def trace_allocations(
+    duration: float,
+    top: int = 30,
+    group_by: str = "lineno",
+    path_filter: Optional[str] = None,
+) -> Dict:
+    """
+    Diff tracemalloc snapshots taken `duration` seconds apart.
+    group_by="lineno" returns the top growing source lines; "traceback"
+    also returns collapsed allocation stacks weighted by grown bytes.
+    """
+    _acquire()
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        if path_filter:
+            # Match anywhere in the traceback, so pandas allocations made on
+            # behalf of e.g. api/utils/forecast_utils.py are kept
+            filters.append(tracemalloc.Filter(True, f"*{path_filter}*", all_frames=True))
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        time.sleep(duration)
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        current, peak = tracemalloc.get_traced_memory()
+
+        stats = after.compare_to(before, group_by)
+        growth = [stat for stat in stats if stat.size_diff > 0]
+        result = {
+            "pid": os.getpid(),
+            "duration": duration,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "grown_bytes": sum(stat.size_diff for stat in growth),
+            "top": [
+                {
+                    "location": f"{_short_path(stat.traceback[-1].filename)}:{stat.traceback[-1].lineno}",
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                }
+                for stat in growth[:top]
+            ],
+        }
+        if group_by == "traceback":
+            counts: Counter = Counter()
+            for stat in growth:
+                # tracemalloc tracebacks are ordered oldest frame first
+                stack = [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+                counts[";".join(stack)] += stat.size_diff
+            result["collapsed"] = _collapse(counts)
+        return result
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _profile_lock.release()
@@ -0,0 +1,134 @@
+"""
+Memory-bounded LRU cache for filtered query results.
+
+Dashboard filters repeat heavily (same season/stage, a handful of date
+ranges), so KPI, operational and threshold-action results are cached by
+normalized filter + dataset version. Entry sizes are estimated from their
+JSON encoding; least recently used entries are evicted once the byte budget
+is exceeded. The cache is cleared whenever the dataset changes.
+
+Async callers wrap the compute function with sized(), so the estimate is
+taken on the executor thread along with the result, not on the event loop.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple
+
+from api.data_loader import on_dataset_change
+
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+
+_MISSING = object()
+
+
+def estimate_size(value) -> int:
+    """Approximate payload size in bytes (size of the JSON response body)."""
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+class SizedResult(NamedTuple):
+    value: Any
+    size: int
+
+
+def sized(fn: Callable) -> Callable:
+    """Wrap fn to also return the estimated size of its result (as a SizedResult)."""
+    def compute(*args, **kwargs) -> SizedResult:
+        value = fn(*args, **kwargs)
+        return SizedResult(value, estimate_size(value))
+    return compute
+
+
+class LRUResultCache:
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value, size: int = None):
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+                self.evicted_bytes += evicted_size
+
+    def get_or_compute(self, key: Hashable, fn: Callable, *args, **kwargs):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = fn(*args, **kwargs)
+            self.put(key, value)
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        get_or_compute for coroutine functions (e.g. SingleFlight.do_async).
+        When fn resolves to a SizedResult (see sized()), its size is used
+        instead of estimating one on the event loop.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await fn(*args, **kwargs)
+            if isinstance(value, SizedResult):
+                value, size = value
+                self.put(key, value, size)
+            else:
+                self.put(key, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared by /dashboard/kpi, /dashboard/operational and /threshold/actions
+query_cache = LRUResultCache("query", int(RESULT_CACHE_MAX_MB * 1024 * 1024))
+
+
+@on_dataset_change
+def _invalidate(df, version):
+    query_cache.invalidate()
@@ -0,0 +1,250 @@
+"""
+Time-bucket rollups for GET /dashboard/timeseries.
+
+At load time the dataset is reduced to one row per (day, season, field
+stage) holding observation count, sum and max of the pest count, action
+count and counts per threshold status. From that daily table a rollup per
+bucket size is kept:
+
+- week    calendar weeks starting on Monday
+- month   calendar months
+- season  runs of a season label (consecutive days of e.g. "Dry" with no
+          gap longer than SEASON_GAP_DAYS), so "Dry 2019-12-01..2020-05-31"
+          is one bucket
+
+Appended observations are reduced the same way and merged into the daily
+table, so ingest never rescans the dataset. A range query reads the
+buckets inside the range from the rollup (O(buckets)); the at most two
+buckets cut by the range edges are recomputed from the daily table.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from api.data_loader import (
+    get_dataset,
+    get_dataset_version,
+    on_dataset_change,
+    on_observations_appended,
+)
+from api.utils.data_transformer import action_mask
+
+BUCKETS = ("week", "month", "season")
+
+# Days without a season's label that end one run of it
+SEASON_GAP_DAYS = 31
+
+COUNT_COLUMN = "Pest Count/Damage"
+KEYS = ["season", "field_stage"]
+SUM_COLUMNS = ["observations", "sum", "actions"]
+STATUS_PREFIX = "status:"
+
+
+def _status_columns(frame: pd.DataFrame) -> List[str]:
+    return [column for column in frame.columns if column.startswith(STATUS_PREFIX)]
+
+
+def _additive_columns(frame: pd.DataFrame) -> List[str]:
+    return SUM_COLUMNS + _status_columns(frame)
+
+
+def daily_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (day, season, field stage) with additive statistics and max."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["day", *KEYS, *SUM_COLUMNS, "max"])
+    frame = pd.DataFrame({
+        "day": df["Date"].dt.normalize().to_numpy(),
+        "season": df["Season"].astype(str).to_numpy(),
+        "field_stage": df["Field Stage"].astype(str).to_numpy(),
+        "value": df[COUNT_COLUMN].to_numpy(dtype=np.float64),
+        "action": action_mask(df).to_numpy(dtype=np.int64),
+        "status": df["Threshold Status"].astype(str).to_numpy(),
+    })
+    keys = ["day", *KEYS]
+    daily = frame.groupby(keys, sort=True).agg(
+        observations=("value", "size"),
+        sum=("value", "sum"),
+        max=("value", "max"),
+        actions=("action", "sum"),
+    )
+    statuses = frame.groupby([*keys, "status"]).size().unstack("status", fill_value=0)
+    statuses.columns = [f"{STATUS_PREFIX}{status}" for status in statuses.columns]
+    return daily.join(statuses).fillna(0).reset_index()
+
+
+def merge_daily(daily: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Combine two daily rollups (rows for the same day and keys are added up)."""
+    if daily.empty:
+        return new
+    combined = pd.concat([daily, new], ignore_index=True).fillna(0)
+    aggregations = {column: "sum" for column in _additive_columns(combined)}
+    aggregations["max"] = "max"
+    return combined.groupby(["day", *KEYS], sort=True).agg(aggregations).reset_index()
+
+
+def _assign_buckets(daily: pd.DataFrame) -> pd.DataFrame:
+    """Add bucket start/end columns for every bucket size."""
+    daily = daily.copy()
+    day = daily["day"]
+    daily["week_start"] = day - pd.to_timedelta(day.dt.weekday, unit="D")
+    daily["week_end"] = daily["week_start"] + pd.Timedelta(days=6)
+    daily["month_start"] = day.dt.to_period("M").dt.start_time
+    daily["month_end"] = day.dt.to_period("M").dt.end_time.dt.normalize()
+
+    # Season runs: per label, a new run starts after a gap of SEASON_GAP_DAYS
+    season_days = daily[["season", "day"]].drop_duplicates().sort_values(["season", "day"])
+    new_run = (
+        (season_days["season"] != season_days["season"].shift())
+        | (season_days["day"].diff() > pd.Timedelta(days=SEASON_GAP_DAYS))
+    )
+    run = new_run.cumsum()
+    season_days["season_start"] = season_days.groupby(run)["day"].transform("min")
+    season_days["season_end"] = season_days.groupby(run)["day"].transform("max")
+    return daily.merge(season_days, on=["season", "day"], how="left")
+
+
+def _bucket_table(daily: pd.DataFrame, bucket: str) -> pd.DataFrame:
+    start, end = f"{bucket}_start", f"{bucket}_end"
+    aggregations = {column: "sum" for column in _additive_columns(daily)}
+    aggregations["max"] = "max"
+    table = daily.groupby([start, end, *KEYS], sort=True).agg(aggregations).reset_index()
+    return table.rename(columns={start: "start", end: "end"})
+
+
+class Rollups:
+    """Daily table plus one rollup per bucket size for one dataset version."""
+
+    def __init__(self, daily: pd.DataFrame, version: Optional[str] = None):
+        self.version = version
+        self.daily = _assign_buckets(daily) if not daily.empty else daily
+        self.tables: Dict[str, pd.DataFrame] = {}
+        # Longest bucket per size, to find buckets overlapping a range start
+        self.max_span: Dict[str, pd.Timedelta] = {}
+        for bucket in BUCKETS:
+            table = _bucket_table(self.daily, bucket) if not daily.empty else self.daily
+            self.tables[bucket] = table
+            self.max_span[bucket] = (table["end"] - table["start"]).max() if not table.empty else pd.Timedelta(0)
+
+    @property
+    def date_min(self):
+        return self.daily["day"].iloc[0] if not self.daily.empty else None
+
+    @property
+    def date_max(self):
+        return self.daily["day"].iloc[-1] if not self.daily.empty else None
+
+    def _edge(self, bucket: str, bucket_start, bucket_end, start, end) -> pd.DataFrame:
+        """Rows of one bucket cut by the range, recomputed from the daily rows inside [start, end]."""
+        days = self.daily["day"]
+        lo = int(days.searchsorted(max(start, bucket_start), side="left"))
+        hi = int(days.searchsorted(min(end, bucket_end), side="right"))
+        rows = self.daily.iloc[lo:hi]
+        # Season runs of other labels can overlap the same days
+        return rows[rows[f"{bucket}_start"].to_numpy() == np.datetime64(bucket_start)]
+
+    def query(self, bucket: str, start=None, end=None, season=None, field_stage=None) -> List[Dict]:
+        """Buckets overlapping [start, end], filtered by season / field stage."""
+        table = self.tables[bucket]
+        if table.empty:
+            return []
+        start = pd.Timestamp(start) if start is not None else self.date_min
+        end = pd.Timestamp(end) if end is not None else self.date_max
+
+        # Only buckets starting in [start - longest bucket, end] can overlap
+        starts = table["start"]
+        lo = int(starts.searchsorted(start - self.max_span[bucket], side="left"))
+        hi = int(starts.searchsorted(end, side="right"))
+        rows = table.iloc[lo:hi]
+        rows = rows[rows["end"] >= start]
+        inside = (rows["start"] >= start) & (rows["end"] <= end)
+        parts = [rows[inside].assign(partial=False)]
+        edges = rows.loc[~inside, ["start", "end"]].drop_duplicates()
+        for bucket_start, bucket_end in edges.itertuples(index=False):
+            edge = self._edge(bucket, bucket_start, bucket_end, start, end)
+            parts.append(edge.assign(start=bucket_start, end=bucket_end, partial=True))
+        rows = pd.concat(parts, ignore_index=True)
+        if season and season != "All":
+            rows = rows[rows["season"] == season]
+        if field_stage and field_stage != "All":
+            rows = rows[rows["field_stage"] == field_stage]
+        if rows.empty:
+            return []
+
+        # Seasonal buckets stay per season; calendar buckets add up all combinations
+        group = ["start", "end", "season"] if bucket == "season" else ["start", "end"]
+        aggregations = {column: "sum" for column in _additive_columns(rows)}
+        aggregations["max"] = "max"
+        aggregations["partial"] = "any"
+        grouped = rows.groupby(group, sort=True).agg(aggregations).reset_index()
+        return _bucket_records(grouped, bucket)
+
+
+def _bucket_records(grouped: pd.DataFrame, bucket: str) -> List[Dict]:
+    observations = grouped["observations"].to_numpy(dtype=np.int64)
+    sums = grouped["sum"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.round(sums / observations, 4)
+    statuses = {
+        column[len(STATUS_PREFIX):]: grouped[column].to_numpy(dtype=np.int64)
+        for column in _status_columns(grouped)
+    }
+    columns = {
+        "start": grouped["start"].dt.strftime("%Y-%m-%d").tolist(),
+        "end": grouped["end"].dt.strftime("%Y-%m-%d").tolist(),
+    }
+    if bucket == "season":
+        columns["season"] = grouped["season"].tolist()
+    columns.update({
+        # Cut by the requested range: only the days inside it are counted
+        "partial": grouped["partial"].astype(bool).tolist(),
+        "observations": observations.tolist(),
+        "sum": np.round(sums, 4).tolist(),
+        "mean": [mean if count else None for mean, count in zip(means.tolist(), observations.tolist())],
+        "max": grouped["max"].to_numpy(dtype=np.float64).tolist(),
+        "actions": grouped["actions"].to_numpy(dtype=np.int64).tolist(),
+    })
+    records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    for i, record in enumerate(records):
+        record["threshold_status"] = {
+            status: int(counts[i]) for status, counts in statuses.items() if counts[i]
+        }
+    return records
+
+
+_rollups: Optional[Rollups] = None
+_lock = threading.Lock()
+
+
+def get_rollups() -> Rollups:
+    """Rollups of the loaded dataset (loading it, or building them, if needed)."""
+    df = get_dataset()
+    version = get_dataset_version()
+    rollups = _rollups
+    if rollups is None or rollups.version != version:
+        _rebuild(df, version)
+        rollups = _rollups
+    return rollups
+
+
+@on_observations_appended
+def _merge_appended(new_rows, df, version):
+    global _rollups
+    with _lock:
+        current = _rollups
+        if current is None:
+            return
+        daily = current.daily[["day", *KEYS, *_additive_columns(current.daily), "max"]]
+        _rollups = Rollups(merge_daily(daily, daily_rollup(new_rows)), version)
+
+
+@on_dataset_change
+def _rebuild(df, version):
+    global _rollups
+    # Appends were already merged incrementally above
+    if _rollups is not None and _rollups.version == version:
+        return
+    rollups = Rollups(daily_rollup(df), version)
+    with _lock:
+        _rollups = rollups
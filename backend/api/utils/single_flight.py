@@ -0,0 +1,176 @@
+"""
+Request coalescing (single-flight) for expensive computations.
+
+Concurrent calls with the same key share one in-flight computation, and the
+result is kept for a short TTL so a burst of identical dashboard requests
+computes once. Keys are built from canonicalized request parameters plus
+the dataset version, so an ingest never serves stale results.
+Async routes use do_async(), which runs the leader's computation on a named
+executor and lets followers await it on the event loop without holding a
+worker thread.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from api.data_loader import get_dataset_version, on_dataset_change
+from api.model_loader import get_model_fingerprint
+
+# Seconds a computed result is reused for identical requests
+DEFAULT_TTL = float(os.getenv("SINGLE_FLIGHT_TTL", "5"))
+DEFAULT_MAX_ENTRIES = 256
+
+# All SingleFlight instances by name (for stats reporting)
+registry: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    def __init__(self):
+        # Resolved by the leader; followers wait on it from threads or coroutines
+        self.future: Future = Future()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls and cache results briefly."""
+
+    def __init__(self, name: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        registry[name] = self
+
+    def _claim(self, key: Hashable):
+        """Return (cached, value) on a fresh hit, else (False, (call, leader))."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                return True, cached[1]
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return False, (call, False)
+            call = self._inflight[key] = _Call()
+            self.misses += 1
+            return False, (call, True)
+
+    def _finish(self, key: Hashable, call: _Call, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            del self._inflight[key]
+            if error is None:
+                self._store(key, result)
+        if error is None:
+            call.future.set_result(result)
+        else:
+            call.future.set_exception(error)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        hit, value = self._claim(key)
+        if hit:
+            return value
+        call, leader = value
+        if not leader:
+            return call.future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as error:
+            self._finish(key, call, error=error)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    async def do_async(self, key: Hashable, executor, fn: Callable, *args, **kwargs):
+        """Like do(), but the leader runs fn on `executor` (a NamedExecutor)."""
+        hit, value = self._claim(key)
+        if hit:
+            return value
+        call, leader = value
+        if leader:
+            # Detached from the leader's request so a disconnect does not
+            # cancel the computation followers are waiting on
+            call.task = asyncio.ensure_future(executor.run(fn, *args, **kwargs))
+            call.task.add_done_callback(lambda task: self._finish_task(key, call, task))
+        # Shielded: one waiter giving up must not cancel the shared result
+        return await asyncio.shield(asyncio.wrap_future(call.future))
+
+    def _finish_task(self, key: Hashable, call: _Call, task: asyncio.Task):
+        if task.cancelled():
+            self._finish(key, call, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish(key, call, error=task.exception())
+        else:
+            self._finish(key, call, task.result())
+
+    def _store(self, key: Hashable, value):
+        now = time.monotonic()
+        if len(self._results) >= self.max_entries:
+            # Drop expired entries first, then the oldest ones
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            while len(self._results) >= self.max_entries:
+                self._results.pop(next(iter(self._results)))
+        self._results[key] = (now + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "cached": len(self._results),
+            "inflight": len(self._inflight),
+        }
+
+
+def _normalize_date(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return pd.to_datetime(value).isoformat()
+
+
+def _normalize_choice(value) -> str:
+    return "All" if value in (None, "", "All") else str(value)
+
+
+def filter_key(start=None, end=None, season=None, field_stage=None, **extra) -> tuple:
+    """
+    Canonical cache key for FilterAll-style parameters.
+    Equivalent requests ("2024-1-1" vs "2024-01-01", None vs "All") map to
+    the same key; the dataset version is always part of it.
+    """
+    return (
+        _normalize_date(start),
+        _normalize_date(end),
+        _normalize_choice(season),
+        _normalize_choice(field_stage),
+        tuple(sorted(extra.items())),
+        get_dataset_version(),
+    )
+
+
+def forecast_key(**params) -> tuple:
+    """Cache key for forecast requests (dataset version and model fingerprint)."""
+    return (tuple(sorted(params.items())), get_dataset_version(), get_model_fingerprint())
+
+
+@on_dataset_change
+def _clear_results(df, version):
+    # Keys already carry the version; this just frees the stale entries early
+    for single_flight in registry.values():
+        single_flight.clear()
@@ -1,5 +1,8 @@
 """
 Startup utilities: database initialization, admin user seeding.
+
+Both are blocking pymongo calls; the lifespan runs them as concurrent
+startup tasks on worker threads.
 """
 import os
 import bcrypt
@@ -16,14 +19,15 @@ ADMIN_NAME = os.getenv("ADMIN_NAME") or "System Administrator"
 ADMIN_ROLE = os.getenv("ADMIN_ROLE") or "Administrator"
 
 
-async def initialize_database():
+def initialize_database():
     """Initialize database: create indexes and seed admin user."""
     print("🔧 Initializing database...")
-    
-    # Create indexes
     create_indexes()
-    
-    # Seed admin user if it doesn't exist
+    seed_admin_user()
+
+
+def seed_admin_user():
+    """Insert the configured admin user if it doesn't exist."""
     existing_admin = users_collection.find_one({"email": ADMIN_EMAIL})
     if not existing_admin:
         password_hash = hash_password(ADMIN_PASSWORD)
@@ -0,0 +1,271 @@
+"""
+Lightweight request tracing.
+
+Hot paths are wrapped in `span("name")` / `@traced("name")`. Outside a
+sampled request these cost one ContextVar lookup. A request is sampled when
+it carries `X-Trace: 1` (or a W3C `traceparent` with the sampled flag), or
+at random with TRACE_SAMPLE_RATE. Finished traces are exported as OTLP/JSON
+(resourceSpans) lines to TRACE_EXPORT_FILE, or to the "api.tracing" logger
+when no file is configured.
+"""
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from pymongo import monitoring
+
+TRACE_HEADER = "x-trace"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "ews-backend")
+
+# Spans kept per trace; later ones are counted but dropped
+MAX_SPANS_PER_TRACE = 1000
+
+logger = logging.getLogger("api.tracing")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return random.getrandbits(nbytes * 8).to_bytes(nbytes, "big").hex()
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start", "end", "attributes", "error", "_token")
+
+    # OTLP span kinds
+    INTERNAL = 1
+    SERVER = 2
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict, kind: int = INTERNAL):
+        self.trace = trace
+        self.kind = kind
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, end: Optional[int] = None):
+        self.end = end or time.time_ns()
+        self.trace.add(self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+    # Context manager protocol, used by span()
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.finish()
+        return False
+
+
+class Trace:
+    """Spans of one sampled request."""
+
+    def __init__(self, trace_id: Optional[str] = None, remote_parent_id: Optional[str] = None):
+        self.trace_id = trace_id or _new_id(16)
+        self.remote_parent_id = remote_parent_id
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def add(self, span: Span):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def to_otlp(self) -> Dict:
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "api.tracing"}, "spans": spans}],
+            }]
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def span(name: str, **attributes):
+    """Context manager timing a block as a child of the current span."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else trace.remote_parent_id, attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span() for synchronous functions."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+# --- Sampling / request lifecycle ---------------------------------------------
+
+
+def parse_traceparent(value: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent header."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 0x01)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def sample_request(trace_header: Optional[str], traceparent: Optional[str]) -> Optional[Trace]:
+    """Decide sampling for a request; returns its Trace or None."""
+    parent = parse_traceparent(traceparent)
+    if trace_header is not None and trace_header.strip().lower() in ("0", "false", "off"):
+        return None
+    if parent and parent[2]:
+        trace = Trace(parent[0], parent[1])
+    elif trace_header is not None and trace_header.strip().lower() in ("1", "true", "on"):
+        trace = Trace()
+    elif TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE:
+        trace = Trace()
+    else:
+        return None
+    return trace
+
+
+@contextmanager
+def request_span(trace: Trace, name: str, **attributes):
+    """Activate `trace` for the block and time it as the server (root) span."""
+    trace_token = _current_trace.set(trace)
+    try:
+        with Span(trace, name, trace.remote_parent_id, attributes, kind=Span.SERVER) as root:
+            yield root
+    finally:
+        _current_trace.reset(trace_token)
+
+
+# --- Export -------------------------------------------------------------------
+
+_export_lock = threading.Lock()
+
+
+def export(trace: Trace):
+    """Write a finished trace as one OTLP/JSON line."""
+    line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+    if TRACE_EXPORT_FILE:
+        try:
+            with _export_lock, open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            return
+        except OSError as e:
+            print(f"⚠️ Could not write trace export: {e}")
+    logger.info(line)
+
+
+# --- MongoDB ------------------------------------------------------------------
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """Adds a span per Mongo command issued inside a sampled request."""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, error: Optional[str] = None):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        # Reported once the round trip is over; backdate the start
+        end = time.time_ns()
+        parent = _current_span.get()
+        mongo_span = Span(
+            trace,
+            f"mongo.{event.command_name}",
+            parent.span_id if parent else trace.remote_parent_id,
+            {"db.system": "mongodb", "db.name": event.database_name, "db.operation": event.command_name},
+        )
+        mongo_span.start = end - event.duration_micros * 1000
+        mongo_span.error = error
+        mongo_span.finish(end)
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event, str(event.failure))
+
+
+mongo_command_tracer = MongoCommandTracer()
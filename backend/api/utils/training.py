@@ -0,0 +1,320 @@
+"""
+Retraining pipeline for the forecast model.
+
+Two modes, both on the create_feature matrix of the loaded dataset:
+
+- full        grid search over TRAINING_PARAM_GRID, each candidate fitted on
+              the older rows and scored (RMSE) on the newest
+              TRAINING_VALIDATION_FRACTION, with early stopping. Candidates
+              run in TRAINING_WORKERS spawned processes; the best one is
+              refitted on every row.
+- warm_start  continue boosting the loaded model for TRAINING_WARM_START_ROUNDS
+              rounds on rows newer than what it was trained on (its
+              metadata's trained_through, else the first ingested row).
+
+A trained model is published with version metadata either to the local
+registry (models/, where servers load the newest file from) or to GridFS
+(servers download the newest upload on their registry check).
+
+    python -m api.utils.training full --publish local
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from api.utils.tracing import span, traced
+
+MODES = ("full", "warm_start")
+REGISTRIES = ("local", "gridfs")
+
+# Processes fitting search candidates (default: one per CPU)
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "0")) or os.cpu_count() or 1
+
+# Newest share of the rows held out to score candidates
+VALIDATION_FRACTION = float(os.getenv("TRAINING_VALIDATION_FRACTION", "0.2"))
+
+WARM_START_ROUNDS = int(os.getenv("TRAINING_WARM_START_ROUNDS", "100"))
+
+MAX_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 50
+
+DEFAULT_PARAM_GRID = {
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.05, 0.1],
+    "subsample": [0.8, 1.0],
+    "min_child_weight": [1, 5],
+}
+
+# JSON object of parameter -> values, e.g. {"max_depth": [4, 6]}
+PARAM_GRID = json.loads(os.getenv("TRAINING_PARAM_GRID", "null")) or DEFAULT_PARAM_GRID
+
+MODEL_PREFIX = "final-model(xgboost)"
+
+# One training run at a time per process (a search already uses every core)
+_training_lock = threading.Lock()
+
+
+class TrainingBusy(Exception):
+    """A training run is already in progress in this process."""
+
+
+def param_candidates(grid: Dict[str, List]) -> List[Dict]:
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _split(features, y, fraction: float = VALIDATION_FRACTION):
+    """Chronological split: the newest `fraction` of rows validates."""
+    X = features.to_numpy(dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    cut = int(len(X) * (1 - fraction))
+    if cut < 1 or cut >= len(X):
+        raise ValueError(f"Not enough rows ({len(X)}) to hold out {fraction:.0%} for validation")
+    return X[:cut], y[:cut], X[cut:], y[cut:]
+
+
+def _scores(y_true, y_pred) -> Dict:
+    errors = y_true - y_pred
+    return {
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mae": float(np.mean(np.abs(errors))),
+    }
+
+
+# Search data, set once per worker process by _init_search
+_search_data = None
+
+
+def _init_search(X_train, y_train, X_val, y_val):
+    global _search_data
+    _search_data = (X_train, y_train, X_val, y_val)
+
+
+def _fit_candidate(params: Dict, n_jobs: Optional[int] = 1) -> Dict:
+    import xgboost as xgb
+
+    X_train, y_train, X_val, y_val = _search_data
+    model = xgb.XGBRegressor(
+        **params,
+        n_estimators=MAX_ROUNDS,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        n_jobs=n_jobs,
+    )
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    return {
+        "params": params,
+        "n_estimators": int(model.best_iteration) + 1,
+        **_scores(y_val, model.predict(X_val, iteration_range=(0, model.best_iteration + 1))),
+    }
+
+
+@traced("training.search")
+def search(features, y, grid: Optional[Dict] = None, workers: Optional[int] = None) -> List[Dict]:
+    """Score every grid candidate on the validation rows; best (lowest RMSE) first."""
+    candidates = param_candidates(grid or PARAM_GRID)
+    data = _split(features, y)
+    workers = min(workers or TRAINING_WORKERS, len(candidates))
+    with span("training.candidates", candidates=len(candidates), workers=workers):
+        if workers <= 1:
+            _init_search(*data)
+            results = [_fit_candidate(params, n_jobs=None) for params in candidates]
+        else:
+            # spawn, not fork: the server's pool threads may hold locks at fork time;
+            # the data is sent once per worker, not once per candidate
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=context, initializer=_init_search, initargs=data,
+            ) as pool:
+                results = list(pool.map(_fit_candidate, candidates))
+    return sorted(results, key=lambda result: result["rmse"])
+
+
+def train_full(features, y, grid: Optional[Dict] = None, workers: Optional[int] = None):
+    """Grid search, then refit the best candidate on every row. Returns (model, details)."""
+    import xgboost as xgb
+
+    results = search(features, y, grid, workers)
+    best = results[0]
+    with span("training.refit", n_estimators=best["n_estimators"]):
+        model = xgb.XGBRegressor(**best["params"], n_estimators=best["n_estimators"])
+        # From the frame, so the model records its feature names (as the shipped ones do)
+        model.fit(features.astype(np.float64), np.asarray(y, dtype=np.float64))
+    return model, {
+        "params": {**best["params"], "n_estimators": best["n_estimators"]},
+        "validation": {"rmse": best["rmse"], "mae": best["mae"]},
+        "candidates": len(results),
+        "search": results[:5],
+    }
+
+
+TREE_PARAMS = ("max_depth", "learning_rate", "subsample", "min_child_weight")
+
+
+def train_warm_start(base_model, features, y, since, rounds: int = WARM_START_ROUNDS,
+                     base_params: Optional[Dict] = None):
+    """
+    Add `rounds` boosting rounds to `base_model`, fitted on the rows dated
+    after `since`, with the base's tree parameters (`base_params`, e.g. from
+    its metadata, else what the model file records). Returns (model, details).
+    """
+    import xgboost as xgb
+
+    new = np.asarray(features.index > since)
+    if not new.any():
+        raise ValueError(f"No observations after {since:%Y-%m-%d} to continue training on")
+    # A frame: boosters that record feature names reject unnamed data
+    X_new = features[new].astype(np.float64)
+    y_new = np.asarray(y, dtype=np.float64)[new]
+    before = _scores(y_new, base_model.predict(X_new))
+
+    params = {
+        name: value for name, value in (base_params or base_model.get_params()).items()
+        if name in TREE_PARAMS and value is not None
+    }
+    with span("training.warm_start", rows=len(X_new), rounds=rounds):
+        model = xgb.XGBRegressor(**params, n_estimators=rounds)
+        model.fit(X_new, y_new, xgb_model=base_model.get_booster())
+    return model, {
+        "params": {**params, "n_estimators": rounds},
+        "new_rows": int(len(X_new)),
+        "since": since.strftime("%Y-%m-%d"),
+        # In-sample on the new rows: how much the extra rounds moved the fit
+        "new_rows_before": before,
+        "new_rows_after": _scores(y_new, model.predict(X_new)),
+    }
+
+
+def _warm_start_since(df, metadata: Dict):
+    """Date after which rows are new to the loaded model."""
+    import pandas as pd
+
+    if metadata.get("trained_through"):
+        return pd.Timestamp(metadata["trained_through"])
+    if "Source" in df.columns:
+        ingested = df.loc[df["Source"] == "ingest", "Date"]
+        if len(ingested):
+            return ingested.min() - pd.Timedelta(days=1)
+    raise ValueError("The loaded model has no trained_through metadata and nothing was ingested; use since=")
+
+
+def save_local(model, metadata: Dict, folder=None) -> Path:
+    """
+    Write the model and its metadata sidecar to the local registry (models/).
+    The metadata is written first: a server never loads a model without it.
+    """
+    from api.model_loader import MODEL_FOLDER, metadata_path
+
+    folder = Path(os.getcwd()) / (folder or MODEL_FOLDER)
+    folder.mkdir(parents=True, exist_ok=True)
+    version, n = metadata["version"], 1
+    while (folder / f"{MODEL_PREFIX}-{version}.json").exists():
+        version, n = f"{metadata['version']}-{n}", n + 1
+    metadata["version"] = version
+    path = folder / f"{MODEL_PREFIX}-{version}.json"
+    # xgboost picks the format from the extension, so stage under the final name
+    with tempfile.TemporaryDirectory(dir=folder) as staging:
+        tmp = Path(staging) / path.name
+        model.save_model(str(tmp))
+        metadata["fingerprint"] = hashlib.sha1(tmp.read_bytes()).hexdigest()[:16]
+        metadata_path(path).write_text(json.dumps(metadata, indent=2))
+        os.replace(tmp, path)
+    print(f"💾 Model {path.name} saved to {folder}")
+    return path
+
+
+@traced("training.retrain")
+def retrain(mode: str = "full", publish: Optional[str] = "local", since=None,
+            grid: Optional[Dict] = None, workers: Optional[int] = None,
+            rounds: int = WARM_START_ROUNDS) -> Dict:
+    """
+    Train on the loaded dataset and publish the model (publish=None keeps it
+    unpublished). Returns the version metadata. Raises TrainingBusy while
+    another run is in progress.
+    """
+    if not _training_lock.acquire(blocking=False):
+        raise TrainingBusy("A training run is already in progress on this worker")
+    try:
+        return _retrain(mode, publish, since, grid, workers, rounds)
+    finally:
+        _training_lock.release()
+
+
+def _retrain(mode, publish, since, grid, workers, rounds) -> Dict:
+    import pandas as pd
+    from api.data_loader import get_dataset, get_dataset_version
+    from api.model_loader import get_model, get_model_fingerprint, get_model_metadata
+    from api.utils.forecast_utils import create_feature
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown training mode {mode!r} (use {' or '.join(MODES)})")
+    if publish not in (*REGISTRIES, None):
+        raise ValueError(f"Unknown registry {publish!r} (use {' or '.join(REGISTRIES)})")
+
+    started = time.perf_counter()
+    df = get_dataset()
+    features, y = create_feature(df)
+    created = datetime.now(timezone.utc)
+    metadata = {
+        "version": created.strftime("%Y%m%dT%H%M%SZ"),
+        "created_at": created.isoformat(),
+        "mode": mode,
+        "dataset_version": get_dataset_version(),
+        "rows": int(len(features)),
+        "trained_through": features.index[-1].strftime("%Y-%m-%d"),
+    }
+    if mode == "full":
+        model, details = train_full(features, y, grid, workers)
+    else:
+        base = get_model()
+        if base is None:
+            raise RuntimeError("No model loaded to continue training from")
+        since = pd.Timestamp(since) if since is not None else _warm_start_since(df, get_model_metadata())
+        model, details = train_warm_start(
+            base, features, y, since, rounds, get_model_metadata().get("params"),
+        )
+        metadata["base_fingerprint"] = get_model_fingerprint()
+        metadata["base_version"] = get_model_metadata().get("version")
+    metadata.update(details)
+    metadata["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+
+    if publish:
+        # GridFS uploads come from a local copy too (servers also read models/)
+        path = save_local(model, metadata)
+        metadata["file"] = path.name
+        if publish == "gridfs":
+            from api.mongo_client import publish_model
+
+            metadata["gridfs_id"] = publish_model(path, metadata)
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the forecast model")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--publish", choices=(*REGISTRIES, "none"), default="local")
+    parser.add_argument("--workers", type=int, default=None, help="Search processes (default TRAINING_WORKERS)")
+    parser.add_argument("--since", default=None, help="warm_start: train on rows after this date")
+    parser.add_argument("--rounds", type=int, default=WARM_START_ROUNDS, help="warm_start: boosting rounds to add")
+    args = parser.parse_args()
+
+    metadata = retrain(
+        args.mode, None if args.publish == "none" else args.publish,
+        since=args.since, workers=args.workers, rounds=args.rounds,
+    )
+    print(json.dumps(metadata, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Content-addressed storage for user uploads.
+
+Files are named after the SHA-256 of the uploaded bytes, so re-uploading the
+same image reuses the stored file and a given URL never changes content.
+"""
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Optional
+
+UPLOAD_DIR = Path(__file__).parent.parent.parent / "uploads"
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+# Length of the hex digest used in file names (128 bits is plenty for uploads)
+HASH_LENGTH = 32
+
+# Also write a WebP variant next to each processed photo (set to "0" to disable)
+WEBP_VARIANTS = os.getenv("UPLOAD_WEBP_VARIANTS", "1") != "0"
+
+PHOTO_MAX_SIZE = (800, 800)
+
+
+def content_hash(contents: bytes) -> str:
+    """Return the content hash used as the storage name."""
+    return hashlib.sha256(contents).hexdigest()[:HASH_LENGTH]
+
+
+def is_content_addressed(name: str) -> bool:
+    """Check whether a file stem looks like a content hash."""
+    if len(name) != HASH_LENGTH:
+        return False
+    try:
+        int(name, 16)
+    except ValueError:
+        return False
+    return True
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write bytes via a temp file so readers never see a partial upload."""
+    tmp_path = path.with_name(f".{path.name}.{os.urandom(4).hex()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _process_photo(contents: bytes) -> Optional[dict]:
+    """Auto-rotate, resize and encode a photo. Returns encoded bytes per format."""
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(contents))
+        # Auto-rotate based on EXIF
+        try:
+            from PIL.ExifTags import ORIENTATION
+            exif = image._getexif()
+            if exif:
+                orientation = exif.get(ORIENTATION)
+                if orientation == 3:
+                    image = image.rotate(180, expand=True)
+                elif orientation == 6:
+                    image = image.rotate(270, expand=True)
+                elif orientation == 8:
+                    image = image.rotate(90, expand=True)
+        except Exception:
+            # No readable EXIF (PNG, GIF, corrupt tags): keep the orientation
+            pass
+
+        image.thumbnail(PHOTO_MAX_SIZE, Image.Resampling.LANCZOS)
+        image = image.convert("RGB")
+
+        encoded = {}
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90)
+        encoded["jpg"] = buffer.getvalue()
+
+        if WEBP_VARIANTS:
+            try:
+                buffer = io.BytesIO()
+                image.save(buffer, "WEBP", quality=85, method=4)
+                encoded["webp"] = buffer.getvalue()
+            except Exception as e:
+                # Pillow built without WebP support
+                print(f"⚠️ WebP variant skipped: {e}")
+        return encoded
+    except Exception:
+        return None
+
+
+def store_photo(contents: bytes) -> str:
+    """
+    Store a profile photo under its content hash.
+    Returns the public path (e.g. /uploads/<hash>.jpg).
+    Identical uploads are processed only once.
+    """
+    digest = content_hash(contents)
+    jpg_path = UPLOAD_DIR / f"{digest}.jpg"
+
+    if not jpg_path.exists():
+        encoded = _process_photo(contents)
+        if encoded is None:
+            # Fallback: save raw file
+            _write_atomic(jpg_path, contents)
+        else:
+            if "webp" in encoded:
+                _write_atomic(UPLOAD_DIR / f"{digest}.webp", encoded["webp"])
+            _write_atomic(jpg_path, encoded["jpg"])
+
+    return f"/uploads/{jpg_path.name}"
@@ -0,0 +1,83 @@
+"""
+Background warm-up and readiness.
+
+Importing the app no longer loads the model, the dataset or the cached
+forecast. Each component loads on first use and reports its state here; the
+lifespan starts warm_up() in a background thread so they are usually warm
+before traffic arrives, and GET /ready answers 503 until they are.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+# Warm-up order; the forecast needs both the model and the dataset
+COMPONENTS = ("model", "data", "forecast")
+
+# Set to "false" to skip the background warm-up (components load on first use)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() != "false"
+
+_lock = threading.Lock()
+_state: Dict[str, Dict] = {name: {"status": "pending"} for name in COMPONENTS}
+_loaders: Dict[str, Callable] = {}
+_thread = None
+
+
+def register_loader(component: str, loader: Callable):
+    """Register the function warm_up() calls to load a component."""
+    _loaders[component] = loader
+    return loader
+
+
+def mark_loading(component: str):
+    with _lock:
+        _state[component] = {"status": "loading", "started": time.time()}
+
+
+def mark_ready(component: str, **details):
+    with _lock:
+        started = _state.get(component, {}).get("started")
+        seconds = round(time.time() - started, 3) if started else None
+        _state[component] = {"status": "ready", "seconds": seconds, **details}
+
+
+def mark_failed(component: str, error: Exception):
+    with _lock:
+        _state[component] = {"status": "failed", "error": str(error)}
+
+
+def readiness() -> Dict:
+    """Status of every component; ready once all of them are."""
+    with _lock:
+        components = {name: dict(state) for name, state in _state.items()}
+    for state in components.values():
+        state.pop("started", None)
+    return {
+        "ready": all(state["status"] == "ready" for state in components.values()),
+        "components": components,
+    }
+
+
+def warm_up():
+    """Load every registered component in order (already loaded ones return at once)."""
+    started = time.perf_counter()
+    for component in COMPONENTS:
+        loader = _loaders.get(component)
+        if loader is None:
+            continue
+        try:
+            if loader() is None and _state[component]["status"] != "failed":
+                mark_failed(component, "not available")
+        except Exception as e:
+            mark_failed(component, e)
+            print(f"⚠️ Warm-up of {component} failed: {e}")
+    print(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+def start_warmup():
+    """Run warm_up() in a daemon thread so startup does not wait for it."""
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+        _thread.start()
+    return _thread
@@ -1,16 +1,20 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from pathlib import Path
 import os
 import logging
 from dotenv import load_dotenv
 
 from api.utils.lifespan import lifespan
-from api.utils.dashboard_utils import dashboard_filter
-from api.data_loader import df
+from api.middleware.static_cache import CachedStaticFiles
+from api.middleware.conditional import ConditionalGetMiddleware
+from api.middleware.compression import CompressionMiddleware
+from api.middleware.metrics import MetricsMiddleware
+from api.middleware.tracing import TracingMiddleware, TracedJSONResponse
+from api.utils.upload_storage import UPLOAD_DIR
+from api.utils.warmup import readiness
 from api.middleware.error_handler import (
     validation_exception_handler,
     http_exception_handler,
@@ -30,6 +34,8 @@ from api.routes.filters import filter_router
 from api.routes.forecast import forecast_router
 from api.routes.threshold_actions import threshold_router
 from api.routes.alerts import alerts_router
+from api.routes.stream import stream_router
+from api.routes.metrics import metrics_router
 
 load_dotenv()
 
@@ -38,8 +44,23 @@ app = FastAPI(
     description="Backend API for Pest Monitoring and Forecasting",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=TracedJSONResponse,
 )
 
+# ETag / 304 handling for dataset-derived endpoints.
+# Added before CORS so CORS stays the outermost layer and also covers 304s.
+app.add_middleware(ConditionalGetMiddleware)
+
+# Brotli/gzip compression above a size threshold (wraps the ETag layer so
+# compressed payloads can be cached per ETag)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency / status metrics (measures compression too)
+app.add_middleware(MetricsMiddleware)
+
+# Request tracing, sampled per request via the X-Trace / traceparent headers
+app.add_middleware(TracingMiddleware)
+
 # CORS configuration
 origins = [
     "http://localhost:3000",  # React dev (default)
@@ -62,10 +83,8 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Serve uploaded files
-UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Serve uploaded files (content-addressed, immutable caching)
+app.mount("/uploads", CachedStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 
 @app.get("/")
@@ -78,6 +97,13 @@ def health():
     return {"ok": True}
 
 
+@app.get("/ready")
+def ready():
+    """503 until the dataset, model and cached forecast are loaded."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(user_router)
@@ -87,6 +113,8 @@ app.include_router(filter_router)
 app.include_router(forecast_router)
 app.include_router(threshold_router)
 app.include_router(alerts_router)
+app.include_router(stream_router)
+app.include_router(metrics_router)
 
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -0,0 +1,9 @@
+"""
+Benchmark suite for the API's hot paths.
+
+    cd backend
+    python -m benchmarks.run --sizes 10k,1m --output benchmarks/results/latest.json
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/latest.json
+
+See benchmarks/run.py for the measured operations.
+"""
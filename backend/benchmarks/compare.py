@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 1.10] [--fail]
+
+Prints the median of every timing present in both files with the
+candidate / baseline ratio and flags slowdowns above the threshold. With
+--fail the exit status is 1 when any regression is found.
+"""
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+def flatten(node, prefix: str = "") -> Dict[str, float]:
+    """Map "size/suite/name[/cold|warm]" -> median_ms for every timing."""
+    timings = {}
+    if isinstance(node, dict):
+        if "median_ms" in node:
+            timings[prefix] = node["median_ms"]
+        for key, value in node.items():
+            if isinstance(value, dict):
+                timings.update(flatten(value, f"{prefix}/{key}" if prefix else key))
+    return timings
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float):
+    before = flatten(baseline.get("results", {}))
+    after = flatten(candidate.get("results", {}))
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        ratio = new / old if old else float("inf")
+        rows.append((name, old, new, ratio, ratio > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.10, help="Ratio above which a timing is a regression")
+    parser.add_argument("--fail", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"candidate: {candidate['meta'].get('commit')} ({candidate['meta'].get('timestamp')})")
+    rows = compare(baseline, candidate, args.threshold)
+    width = max((len(name) for name, *_ in rows), default=10)
+    for name, old, new, ratio, regressed in rows:
+        flag = "  ⚠️ regression" if regressed else ""
+        print(f"{name:<{width}}  {old:>10.3f}  {new:>10.3f}  x{ratio:.2f}{flag}")
+
+    regressions = [row for row in rows if row[4]]
+    print(f"\n{len(rows)} timings compared, {len(regressions)} slower than x{args.threshold:.2f}")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Load-testing harness.
+
+Starts the app (benchmarks/serve.py: in-memory MongoDB stand-in) with
+uvicorn on a local port, drives it with closed-loop virtual users replaying
+a weighted mix of dashboard traffic, and reports per-route p50/p95/p99
+latency, throughput and error rate. Every combination of --workers and
+--cpus is run as a separate configuration, so worker-count and CPU sweeps
+come out of one invocation:
+
+    python -m benchmarks.load --users 20 --duration 30 --workers 1,2 --cpus 1,2
+
+Each virtual user logs in, then loops: pick a request from the mix, send
+it, wait the think time. Filter requests draw from a fixed set of ranges,
+seasons and stages, so result caches see a realistic share of repeats.
+--cpus pins the server processes with sched_setaffinity (Linux).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+
+# (route label, weight)
+DEFAULT_MIX = {
+    "POST /auth/login": 2,
+    "POST /dashboard/kpi": 25,
+    "POST /dashboard/operational": 20,
+    "GET /dashboard/forecast": 10,
+    "GET /alerts": 15,
+    "GET /filters/basic": 15,
+    "GET /filters/advanced": 13,
+}
+
+DATE_RANGES = [
+    ("2019-01-01", "2024-12-31"),
+    ("2024-01-01", "2024-12-31"),
+    ("2024-06-01", "2024-11-30"),
+    ("2023-12-01", "2024-05-31"),
+    ("2024-10-01", "2024-10-31"),
+]
+SEASONS = ["All", "All", "Dry", "Wet"]
+FIELD_STAGES = ["All", "All", "All", "Vegetative", "Reproductive", "Ripening"]
+HORIZONS = [7, 7, 7, 14, 30]
+
+SERVER_START_TIMEOUT = 120
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, int]:
+    """'kpi=30,alerts=10' overrides weights of routes whose label contains the key."""
+    mix = dict(DEFAULT_MIX)
+    if spec:
+        for part in spec.split(","):
+            key, _, weight = part.partition("=")
+            matches = [label for label in mix if key.strip() in label]
+            if not matches:
+                raise SystemExit(f"Unknown route in --mix: {key}")
+            for label in matches:
+                mix[label] = int(weight)
+    return {label: weight for label, weight in mix.items() if weight > 0}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# --- Server -------------------------------------------------------------------
+
+
+class Server:
+    """uvicorn running benchmarks.serve:app in a child process."""
+
+    def __init__(self, workers: int, cpus: Optional[int], rows: Optional[int], env: Dict[str, str]):
+        self.workers = workers
+        self.cpus = cpus
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, **env}
+        if rows:
+            self.env["LOADTEST_ROWS"] = str(rows)
+        self.process: Optional[subprocess.Popen] = None
+
+    def _pin(self):
+        if self.cpus and hasattr(os, "sched_setaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, available[: self.cpus])
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "benchmarks.serve:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--workers", str(self.workers), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=self.env,
+            preexec_fn=self._pin,
+            stdout=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited during startup (code {self.process.returncode})")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError("Server did not become healthy in time")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- Load generator -----------------------------------------------------------
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, route: str, seconds: float, status: str, ok: bool):
+        self.latencies.setdefault(route, []).append(seconds)
+        by_status = self.statuses.setdefault(route, {})
+        by_status[status] = by_status.get(status, 0) + 1
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed: float) -> Dict:
+        routes = {}
+        all_latencies = []
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            all_latencies.extend(ordered)
+            routes[route] = self._summary(ordered, self.errors.get(route, 0), elapsed)
+            routes[route]["status_codes"] = self.statuses[route]
+        total = self._summary(sorted(all_latencies), sum(self.errors.values()), elapsed)
+        return {"total": total, "routes": routes}
+
+    @staticmethod
+    def _summary(ordered: List[float], errors: int, elapsed: float) -> Dict:
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        }
+
+
+def build_request(route: str, rng: random.Random, credentials: Dict):
+    method, path = route.split(" ", 1)
+    if path == "/auth/login":
+        return method, path, {"username": credentials["email"], "password": credentials["password"]}
+    if path in ("/dashboard/kpi", "/dashboard/operational"):
+        start, end = rng.choice(DATE_RANGES)
+        return method, path, {
+            "start": start,
+            "end": end,
+            "season": rng.choice(SEASONS),
+            "field_stage": rng.choice(FIELD_STAGES),
+        }
+    if path == "/dashboard/forecast":
+        return method, f"{path}?horizon={rng.choice(HORIZONS)}", None
+    if path == "/alerts":
+        return method, "/alerts/?limit=10", None
+    return method, path, None
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    mix: Dict[str, int],
+    deadline: float,
+    think: float,
+    credentials: Dict,
+    seed: int,
+):
+    rng = random.Random(seed)
+    routes, weights = list(mix), list(mix.values())
+    headers = {}
+
+    async def send(route: str):
+        method, url, payload = build_request(route, rng, credentials)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=payload, headers=headers)
+            status = str(response.status_code)
+            ok = response.status_code < 400
+        except httpx.HTTPError as e:
+            response, status, ok = None, type(e).__name__, False
+        recorder.record(route, time.perf_counter() - started, status, ok)
+        return response
+
+    # Every user starts with a login, like the dashboard does
+    response = await send("POST /auth/login")
+    if response is not None and response.status_code == 200:
+        headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+    while time.monotonic() < deadline:
+        await send(rng.choices(routes, weights)[0])
+        if think:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+
+
+async def generate_load(url: str, users: int, duration: float, warmup: float, think: float,
+                        mix: Dict[str, int], credentials: Dict, seed: int) -> Dict:
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        if warmup:
+            await asyncio.gather(*[
+                virtual_user(client, Recorder(), mix, time.monotonic() + warmup, think, credentials, seed + i)
+                for i in range(users)
+            ])
+        recorder = Recorder()
+        started = time.monotonic()
+        await asyncio.gather(*[
+            virtual_user(client, recorder, mix, started + duration, think, credentials, seed + 1000 + i)
+            for i in range(users)
+        ])
+        return recorder.report(time.monotonic() - started)
+
+
+def check_slo(total: Dict, p95_ms: Optional[float], error_rate: Optional[float]) -> Dict:
+    checks = {}
+    if p95_ms is not None:
+        checks["p95_ms"] = {"target": p95_ms, "actual": total["p95_ms"], "ok": total["p95_ms"] <= p95_ms}
+    if error_rate is not None:
+        checks["error_rate"] = {
+            "target": error_rate, "actual": total["error_rate"], "ok": total["error_rate"] <= error_rate
+        }
+    return {"checks": checks, "ok": all(check["ok"] for check in checks.values())}
+
+
+def print_report(label: str, report: Dict):
+    print(f"\n📊 {label}")
+    print(f"{'route':<30} {'req':>7} {'rps':>8} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:<30} {stats['requests']:>7} {stats['throughput_rps']:>8.1f} "
+            f"{stats['error_rate'] * 100:>6.2f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+        )
+
+
+# --- Entry point --------------------------------------------------------------
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before each run")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--workers", default="1", help="uvicorn worker counts to sweep, e.g. 1,2,4")
+    parser.add_argument("--cpus", default="", help="CPU counts to pin the server to, e.g. 1,2 (Linux)")
+    parser.add_argument("--rows", type=int, help="Serve a synthetic dataset of this many rows")
+    parser.add_argument("--mix", help="Weight overrides, e.g. kpi=40,forecast=0")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the server (repeatable)")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--slo-p95-ms", type=float, help="Fail the run when overall p95 exceeds this")
+    parser.add_argument("--slo-error-rate", type=float, help="Fail the run when the error rate exceeds this")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="JSON file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args(argv)
+    output = Path(args.output).resolve() if args.output else None
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from benchmarks.mongo_stub import LOADTEST_EMAIL, LOADTEST_PASSWORD
+    from benchmarks.run import environment_info
+
+    mix = parse_mix(args.mix)
+    credentials = {"email": LOADTEST_EMAIL, "password": LOADTEST_PASSWORD}
+    server_env = dict(item.split("=", 1) for item in args.env)
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    cpu_counts = [int(c) for c in args.cpus.split(",")] if args.cpus else [None]
+
+    report = {
+        "meta": {
+            **environment_info(),
+            "users": args.users,
+            "duration": args.duration,
+            "think_ms": args.think_ms,
+            "rows": args.rows,
+            "mix": mix,
+            "server_env": server_env,
+        },
+        "runs": [],
+    }
+    configurations = [(None, None)] if args.url else [(w, c) for c in cpu_counts for w in worker_counts]
+    failed = False
+    for workers, cpus in configurations:
+        label = "external server" if args.url else f"workers={workers} cpus={cpus or 'all'}"
+        print(f"🚀 {label}: {args.users} users for {args.duration:.0f}s")
+
+        async def measure(url):
+            return await generate_load(
+                url, args.users, args.duration, args.warmup, args.think_ms / 1000, mix, credentials, args.seed
+            )
+
+        if args.url:
+            result = asyncio.run(measure(args.url))
+        else:
+            with Server(workers, cpus, args.rows, server_env) as server:
+                result = asyncio.run(measure(server.url))
+        slo = check_slo(result["total"], args.slo_p95_ms, args.slo_error_rate)
+        failed = failed or not slo["ok"]
+        report["runs"].append({"workers": workers, "cpus": cpus, **result, "slo": slo})
+        print_report(label, result)
+        if slo["checks"]:
+            print("✅ SLO met" if slo["ok"] else f"❌ SLO missed: {slo['checks']}")
+
+    output = output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n✅ Results written to {output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+In-memory stand-in for the MongoDB collections used by the API.
+
+Supports the subset of the pymongo Collection API the routes call
+(find_one / find with sort and limit / insert_one / update_one and
+bulk_write of UpdateOne with $set, $setOnInsert and upsert / delete_one /
+delete_many / count_documents / create_index) with equality, $in and
+$gte filters. install() swaps every reference to the real collections in
+loaded api.* modules, so benchmarks run without a database.
+"""
+import copy
+import os
+import sys
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+# Account seeded by benchmarks/serve.py and used by benchmarks/load.py
+LOADTEST_EMAIL = os.getenv("LOADTEST_EMAIL", "loadtest@ews.local")
+LOADTEST_PASSWORD = os.getenv("LOADTEST_PASSWORD", "loadtest123")
+
+
+def _match(actual, expected) -> bool:
+    if isinstance(expected, dict) and "$in" in expected:
+        return actual in expected["$in"]
+    if isinstance(expected, dict) and "$gte" in expected:
+        return actual is not None and actual >= expected["$gte"]
+    return actual == expected
+
+
+def _matches(document: Dict, query: Optional[Dict]) -> bool:
+    return all(_match(document.get(key), value) for key, value in (query or {}).items())
+
+
+class InMemoryCursor:
+    def __init__(self, documents: List[Dict]):
+        self._documents = documents
+
+    def sort(self, key, direction: int = 1):
+        self._documents.sort(key=lambda doc: (doc.get(key) is None, doc.get(key)), reverse=direction < 0)
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self._documents)
+
+
+class InMemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict] = []
+
+    def find_one(self, query: Optional[Dict] = None, *args, **kwargs):
+        for document in self.documents:
+            if _matches(document, query):
+                return copy.deepcopy(document)
+        return None
+
+    def find(self, query: Optional[Dict] = None, *args, **kwargs):
+        return InMemoryCursor([copy.deepcopy(d) for d in self.documents if _matches(d, query)])
+
+    def count_documents(self, query: Optional[Dict] = None, **kwargs) -> int:
+        return sum(1 for d in self.documents if _matches(d, query))
+
+    def insert_one(self, document: Dict):
+        document = copy.deepcopy(document)
+        document.setdefault("_id", ObjectId())
+        self.documents.append(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        for document in self.documents:
+            if _matches(document, query):
+                document.update(copy.deepcopy(update.get("$set", {})))
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            result = self.insert_one({**query, **update.get("$setOnInsert", {}), **update.get("$set", {})})
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    def bulk_write(self, requests, ordered: bool = True):
+        # UpdateOne requests only (what the API sends)
+        for request in requests:
+            self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+        return SimpleNamespace(acknowledged=True)
+
+    def delete_one(self, query: Dict):
+        for index, document in enumerate(self.documents):
+            if _matches(document, query):
+                del self.documents[index]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def delete_many(self, query: Dict):
+        before = len(self.documents)
+        self.documents = [d for d in self.documents if not _matches(d, query)]
+        return SimpleNamespace(deleted_count=before - len(self.documents))
+
+    def create_index(self, *args, **kwargs):
+        return "stub_index"
+
+
+def prepare_environment():
+    """Call before importing api.*: api.db requires MONGODB_URI to be set."""
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/benchmarks")
+
+
+def install() -> Dict[str, InMemoryCollection]:
+    """Replace the api.db collections everywhere they were imported."""
+    import api.db as db
+
+    replacements = {}
+    for name in ("users_collection", "alerts_collection", "alert_reads_collection", "alert_read_state_collection"):
+        real = getattr(db, name)
+        replacements[id(real)] = InMemoryCollection(name)
+
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == "api" or module_name.startswith("api.")):
+            continue
+        for attribute, value in list(vars(module).items()):
+            stub = replacements.get(id(value))
+            if stub is not None:
+                setattr(module, attribute, stub)
+    return {stub.name: stub for stub in replacements.values()}
+
+
+def seed_user(users: InMemoryCollection, email: str, password: str, role: str = "Administrator") -> Dict:
+    """Insert an approved user (bcrypt-hashed password) and return it."""
+    from datetime import datetime
+
+    from api.auth_utils import hash_password
+
+    now = datetime.utcnow()
+    document = {
+        "email": email.lower(),
+        "passwordHash": hash_password(password),
+        "name": email.split("@")[0],
+        "role": role,
+        "status": "approved",
+        "createdAt": now,
+        "updatedAt": now,
+    }
+    users.insert_one(document)
+    return users.find_one({"email": email.lower()})
@@ -0,0 +1,322 @@
+"""
+Benchmark runner.
+
+For every dataset size it times, on a synthetic frame with the schema of
+data/data1.csv:
+
+- functions: filter_dataset, each KPI helper, csv_to_observations,
+  calculate_kpis_from_observations, create_feature, dataset replacement
+  (including all change listeners)
+- forecast: recursive_forecast for each horizon (1-30 by default)
+- routes: end-to-end latency through the ASGI app with an in-process
+  client and MongoDB replaced by benchmarks/mongo_stub.py, both with
+  result caches cleared before every call ("cold") and served from them
+  ("warm")
+
+Results are written as JSON (timings in milliseconds); compare two runs with
+`python -m benchmarks.compare`.
+
+    python -m benchmarks.run --sizes 10k,1m --repeat 5
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+
+DEFAULT_SIZES = "10k,1m"
+DEFAULT_HORIZONS = "1-30"
+
+# csv_to_observations builds one dict per row; larger frames are truncated
+DEFAULT_CONVERSION_ROWS = 100_000
+# End-to-end routes are skipped for datasets above this size
+DEFAULT_E2E_MAX_ROWS = 1_000_000
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "repeat": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p95_ms": round(ordered[p95_index] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_call(fn: Callable, *args, repeat: int = 5, warmup: int = 1, setup: Callable = None, **kwargs) -> Dict:
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn(*args, **kwargs)
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        fn(*args, **kwargs)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def time_async(fn: Callable, repeat: int = 5, warmup: int = 1, setup: Callable = None) -> Dict:
+    for _ in range(warmup):
+        if setup:
+            setup()
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def parse_horizons(spec: str) -> List[int]:
+    horizons = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        horizons.extend(range(int(start), int(end or start) + 1))
+    return horizons
+
+
+def clear_caches():
+    """Drop every result cache so the next request recomputes."""
+    from api.middleware.compression import payload_cache
+    from api.utils.result_cache import query_cache
+    from api.utils.single_flight import registry
+
+    query_cache.invalidate()
+    for flight in registry.values():
+        flight.clear()
+    payload_cache.entries.clear()
+    payload_cache.size = 0
+
+
+def date_window(df, days: int):
+    import pandas as pd
+
+    end = df["Date"].max()
+    start = max(df["Date"].min(), end - pd.Timedelta(days=days))
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+# --- Suites -------------------------------------------------------------------
+
+
+def bench_functions(df, repeat: int, conversion_rows: int, window_days: int) -> Dict:
+    from api.data_loader import replace_dataset
+    from api.utils import dashboard_utils as du
+    from api.utils.data_transformer import calculate_kpis_from_observations, csv_to_observations
+    from api.utils.forecast_utils import create_feature
+
+    start, end = df["Date"].min(), df["Date"].max()
+    window_start, window_end = date_window(df, window_days)
+    results = {
+        "filter_dataset.all": time_call(du.filter_dataset, df, start, end, repeat=repeat),
+        "filter_dataset.season_stage": time_call(
+            du.filter_dataset, df, start, end, "Dry", "Vegetative", repeat=repeat
+        ),
+        "filter_dataset.window": time_call(du.filter_dataset, df, window_start, window_end, repeat=repeat),
+    }
+    for name in (
+        "pest_sum", "average_pest_count", "above_threshold_level", "economic_damage",
+        "action_rate", "threshold_status_counts",
+    ):
+        results[f"kpi.{name}"] = time_call(getattr(du, name), df, start, end, repeat=repeat)
+    for name in ("current_field_stage", "most_affected_field_stage"):
+        results[f"kpi.{name}"] = time_call(getattr(du, name), df, start, end, repeat=repeat)
+
+    sample = df.head(conversion_rows)
+    results["csv_to_observations"] = {
+        "rows": len(sample),
+        **time_call(csv_to_observations, sample, repeat=repeat),
+    }
+    observations = csv_to_observations(sample)
+    results["calculate_kpis_from_observations"] = {
+        "rows": len(sample),
+        **time_call(calculate_kpis_from_observations, observations, repeat=repeat),
+    }
+    del observations
+    results["create_feature"] = time_call(create_feature, df, repeat=repeat)
+    # Includes every dataset-change listener (metadata, alerts, forecast, caches)
+    results["dataset.replace"] = time_call(replace_dataset, df, repeat=max(1, repeat // 2), warmup=0)
+    return results
+
+
+def bench_forecast(df, repeat: int, horizons: List[int]) -> Dict:
+    from api.model_loader import model
+    from api.utils.forecast_utils import create_feature, recursive_forecast
+
+    features, _ = create_feature(df)
+    return {
+        str(horizon): time_call(recursive_forecast, model, features, horizon, repeat=repeat)
+        for horizon in horizons
+    }
+
+
+async def bench_routes(df, repeat: int, window_days: int) -> Dict:
+    import httpx
+
+    from api.data_loader import replace_dataset
+    from app import app
+
+    replace_dataset(df)
+    start, end = date_window(df, window_days)
+    body = {"start": start, "end": end, "season": "All", "field_stage": "All"}
+    routes = {
+        "GET /filters/basic": ("GET", "/filters/basic", None),
+        "GET /filters/advanced": ("GET", "/filters/advanced", None),
+        "POST /dashboard/kpi": ("POST", "/dashboard/kpi", body),
+        "POST /dashboard/operational": ("POST", "/dashboard/operational", body),
+        "GET /dashboard/forecast": ("GET", "/dashboard/forecast?horizon=7", None),
+        "GET /dashboard/observations": ("GET", f"/dashboard/observations?start={start}&end={end}", None),
+        "GET /forecast/predict": ("GET", "/forecast/predict", None),
+        "GET /forecast/kpi": ("GET", "/forecast/kpi", None),
+        "GET /threshold/actions": ("GET", f"/threshold/actions?start={start}&end={end}", None),
+        "GET /threshold/status": ("GET", "/threshold/status", None),
+        "GET /alerts": ("GET", "/alerts/?limit=10", None),
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for name, (method, url, payload) in routes.items():
+            async def call():
+                response = await client.request(method, url, json=payload)
+                response.raise_for_status()
+                return response
+
+            response = await call()
+            results[name] = {
+                "bytes": len(response.content),
+                "cold": await time_async(call, repeat=repeat, setup=clear_caches),
+                "warm": await time_async(call, repeat=repeat),
+            }
+    return results
+
+
+# --- Entry point --------------------------------------------------------------
+
+
+def environment_info() -> Dict:
+    import numpy
+    import pandas
+    import xgboost
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10
+            ).stdout.strip()
+        except Exception:
+            return ""
+
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "xgboost": xgboost.__version__,
+    }
+
+
+def run(args) -> Dict:
+    from benchmarks.synthetic import generate_dataset, parse_size
+
+    suites = set(args.suites.split(","))
+    horizons = parse_horizons(args.horizons)
+    report = {
+        "meta": {
+            **environment_info(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "suites": sorted(suites),
+        },
+        "results": {},
+    }
+    for label in args.sizes.split(","):
+        rows = parse_size(label)
+        print(f"⏱️  {label}: generating {rows:,} rows...")
+        started = time.perf_counter()
+        df = generate_dataset(rows, seed=args.seed)
+        result = {
+            "rows": rows,
+            "generate_ms": round((time.perf_counter() - started) * 1000, 3),
+            "memory_bytes": int(df.memory_usage(deep=True).sum()),
+        }
+        if "functions" in suites:
+            print(f"⏱️  {label}: functions")
+            result["functions"] = bench_functions(df, args.repeat, args.conversion_rows, args.window_days)
+        if "forecast" in suites:
+            print(f"⏱️  {label}: forecast ({len(horizons)} horizons)")
+            result["forecast"] = bench_forecast(df, args.repeat, horizons)
+        if "routes" in suites:
+            if rows > args.e2e_max_rows:
+                result["routes"] = {"skipped": f"more than {args.e2e_max_rows:,} rows (--e2e-max-rows)"}
+            else:
+                print(f"⏱️  {label}: routes")
+                result["routes"] = asyncio.run(bench_routes(df, args.repeat, args.window_days))
+        report["results"][label] = result
+        del df
+        gc.collect()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated sizes, e.g. 10k,1m,10m")
+    parser.add_argument("--suites", default="functions,forecast,routes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--horizons", default=DEFAULT_HORIZONS, help="e.g. 1-30 or 1,7,14,30")
+    parser.add_argument("--window-days", type=int, default=30, help="Date range used by filtered routes")
+    parser.add_argument("--conversion-rows", type=int, default=DEFAULT_CONVERSION_ROWS)
+    parser.add_argument("--e2e-max-rows", type=int, default=DEFAULT_E2E_MAX_ROWS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+    output = Path(args.output).resolve() if args.output else None
+
+    # The API loads data/ and models/ relative to the working directory
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    from benchmarks import mongo_stub
+
+    mongo_stub.prepare_environment()
+    import app  # noqa: F401  (loads every api module before the stub swaps collections)
+
+    mongo_stub.install()
+
+    report = run(args)
+    output = output or (
+        RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'nogit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"✅ Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+The API app wired to the in-memory MongoDB stand-in, for load tests.
+
+Importing this module loads the app, swaps the collections for
+benchmarks/mongo_stub.py and seeds the load-test user, so each uvicorn
+worker process gets its own ready-to-use copy:
+
+    uvicorn benchmarks.serve:app --workers 2
+
+LOADTEST_ROWS=<n> replaces the dataset with a synthetic one of n rows.
+"""
+import os
+
+from benchmarks import mongo_stub
+
+mongo_stub.prepare_environment()
+# Keep the startup model registry lookup local; unreachable, it falls back to models/
+os.environ.setdefault("MONGODB_MODELS_URI", "mongodb://127.0.0.1:9/")
+
+from app import app  # noqa: E402
+
+collections = mongo_stub.install()
+mongo_stub.seed_user(
+    collections["users_collection"], mongo_stub.LOADTEST_EMAIL, mongo_stub.LOADTEST_PASSWORD
+)
+
+if os.getenv("LOADTEST_ROWS"):
+    from api.data_loader import replace_dataset
+    from benchmarks.synthetic import generate_dataset
+
+    replace_dataset(generate_dataset(int(os.environ["LOADTEST_ROWS"])))
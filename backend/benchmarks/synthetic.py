@@ -0,0 +1,101 @@
+"""
+Synthetic observation datasets with the schema of data/data1.csv.
+
+Rows are spread over up to six years of daily dates (several fields per day
+for larger sizes), with a Dry/Wet season calendar, the field-stage cycle of
+each season, stage-dependent pest counts and threshold status / action
+derived from the count the way they are in the real data. Generation is
+seeded, so a size always produces the same frame.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Date", "Year", "Season", "Field Stage", "Pest", "Pest Count/Damage",
+    "Threshold Status", "Action", "Threshold", "Stage Type",
+]
+
+START_DATE = "2019-01-01"
+MAX_DAYS = 6 * 365
+
+# Dry season starts in December, Wet in June (~183 days each)
+SEASON_LENGTH = 183
+# (stage, last day of the stage within the season, mean pest count)
+STAGE_CALENDAR = [
+    ("Land Prep", 15, 1.0),
+    ("Nursery", 35, 1.5),
+    ("Vegetative", 85, 5.0),
+    ("Reproductive", 125, 8.0),
+    ("Ripening", 160, 6.0),
+    ("Harvest", 166, 2.0),
+    ("Fallow", SEASON_LENGTH, 1.0),
+]
+CROP_GROWTH_STAGES = {"Vegetative", "Reproductive", "Ripening"}
+
+STATUSES = np.array(["Below Threshold", "Economic Threshold", "Economic Damage"], dtype=object)
+STAGE_TYPES = np.array(["Management Stage", "Crop Growth Stage"], dtype=object)
+SEASONS = np.array(["Wet", "Dry"], dtype=object)
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_size(label: str) -> int:
+    """'10k' / '1m' / '2500' -> row count."""
+    label = label.strip().lower()
+    if label in SIZES:
+        return SIZES[label]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1], 1)
+    return int(float(label.rstrip("km")) * multiplier)
+
+
+def generate_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = min(rows, MAX_DAYS)
+    # Evenly spread rows over the days, already in date order
+    day_index = np.arange(rows, dtype=np.int64) * days // rows
+    dates = pd.Timestamp(START_DATE) + pd.to_timedelta(day_index, unit="D")
+    dates = pd.DatetimeIndex(dates)
+
+    # Season and position within it
+    month = dates.month.to_numpy()
+    is_dry = (month == 12) | (month <= 5)
+    season_start_month = np.where(is_dry, 12, 6)
+    season_start_year = np.where((month == 12) | ~is_dry, dates.year, dates.year - 1)
+    season_start = pd.to_datetime(
+        {"year": season_start_year, "month": season_start_month, "day": np.ones(rows, dtype=int)}
+    )
+    day_in_season = np.clip((dates - pd.DatetimeIndex(season_start)).days.to_numpy(), 0, SEASON_LENGTH - 1)
+
+    bounds = np.array([end for _, end, _ in STAGE_CALENDAR])
+    stage_index = np.searchsorted(bounds, day_in_season, side="right")
+    stage_index = np.minimum(stage_index, len(STAGE_CALENDAR) - 1)
+    stage_names = np.array([name for name, _, _ in STAGE_CALENDAR], dtype=object)
+    stage_means = np.array([mean for _, _, mean in STAGE_CALENDAR])
+    field_stage = stage_names[stage_index]
+
+    counts = rng.poisson(stage_means[stage_index]).astype(float)
+    # Index into small object arrays so rows share the same str objects
+    status_index = (counts >= 5).astype(np.int8) + (counts > 10)
+    status = STATUSES[status_index]
+    action = (status_index > 0).astype(np.int64)
+
+    is_crop_stage = np.array([name in CROP_GROWTH_STAGES for name, _, _ in STAGE_CALENDAR])
+    stage_type = STAGE_TYPES[is_crop_stage[stage_index].astype(np.int8)]
+
+    return pd.DataFrame({
+        "Date": dates,
+        "Year": dates.year.astype(float),
+        "Season": SEASONS[is_dry.astype(np.int8)],
+        "Field Stage": field_stage,
+        "Pest": np.full(rows, "RBB", dtype=object),
+        "Pest Count/Damage": counts,
+        "Threshold Status": status,
+        "Action": action,
+        "Threshold": status,
+        "Stage Type": stage_type,
+    }, columns=COLUMNS)
+
+
+def write_dataset(df: pd.DataFrame, path) -> None:
+    """Write a generated frame in the CSV layout of data/data1.csv."""
+    df.to_csv(path, index=False, date_format="%Y-%m-%d")
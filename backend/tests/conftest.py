@@ -0,0 +1,54 @@
+"""
+Shared setup for the backend tests: run from backend/ (data/ and models/
+are resolved from the working directory) against the in-memory MongoDB
+stand-in used by the benchmarks.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+os.chdir(BACKEND)
+
+from benchmarks import mongo_stub  # noqa: E402
+
+mongo_stub.prepare_environment()
+# No registry lookups or background warm-up during tests
+os.environ.setdefault("MONGODB_MODELS_URI", "mongodb://127.0.0.1:9/")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+os.environ.setdefault("MODEL_REGISTRY_CHECK", "false")
+
+
+@pytest.fixture
+def dataset():
+    """The loaded dataset; appends made by the test are undone afterwards."""
+    from api import data_loader
+
+    original = data_loader.get_dataset()
+    yield original
+    if data_loader.get_dataset() is not original:
+        data_loader.replace_dataset(original)
+
+
+def next_observation(df, days=1, **values):
+    """A copy of the newest row, `days` later, without its Source (so it counts as ingested)."""
+    import pandas as pd
+
+    row = df.iloc[[-1]].drop(columns=["Source"], errors="ignore").reset_index(drop=True)
+    row["Date"] = row["Date"] + pd.Timedelta(days=days)
+    for column, value in values.items():
+        row[column] = value
+    return row
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """The API app on the in-memory MongoDB stand-in (no lifespan: no startup tasks)."""
+    from starlette.testclient import TestClient
+
+    from benchmarks.serve import app
+
+    return TestClient(app)
@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from benchmarks import mongo_stub
+from api.utils import alert_engine as alerts_module
+from api.utils.alert_engine import AlertEngine
+
+
+@pytest.fixture(autouse=True)
+def collections(monkeypatch):
+    # Every engine below plays a separate worker sharing one database
+    collections = mongo_stub.install()
+    monkeypatch.setattr(alerts_module, "ALERT_READS_TTL", 0)
+    return collections
+
+
+def _observations(dates, status="Economic Threshold", source="data1"):
+    return pd.DataFrame({
+        "Date": pd.to_datetime(dates),
+        "Pest Count/Damage": [12.0] * len(dates),
+        "Field Stage": ["Tillering"] * len(dates),
+        "Threshold Status": [status] * len(dates),
+        "Action": [0] * len(dates),
+        "Source": [source] * len(dates),
+    })
+
+
+def _threshold_ids(engine):
+    return [alert["id"] for alert in engine.query(limit=100, category="threshold")]
+
+
+def _read(engine, user):
+    return {alert["id"]: alert["read"] for alert in engine.query(user, limit=100)}
+
+
+def test_alert_ids_are_stable_across_workers_and_rebuilds():
+    df = _observations(["2024-01-01", "2024-01-02", "2024-01-02"])
+    first, second = AlertEngine(), AlertEngine()
+    first.rebuild(df, "v1")
+    second.rebuild(df.iloc[::-1].reset_index(drop=True), "v1")
+    ids = _threshold_ids(first)
+    # Identical observations still get one alert each
+    assert len(set(ids)) == 3
+    assert sorted(ids) == sorted(_threshold_ids(second))
+    first.rebuild(df, "v2")
+    assert _threshold_ids(first) == ids
+
+
+def test_read_state_is_shared_between_workers():
+    df = _observations(["2024-01-01", "2024-01-02"])
+    first, second = AlertEngine(), AlertEngine()
+    first.rebuild(df, "v1")
+    second.rebuild(df, "v1")
+    alert_id = _threshold_ids(first)[0]
+
+    assert first.mark_read("user-1", alert_id)
+    assert _read(second, "user-1")[alert_id]
+    assert not _read(second, "user-2")[alert_id]
+
+    second.mark_all_read("user-1")
+    first.rebuild(df, "v2")
+    assert all(_read(first, "user-1").values())
+
+    # Issued after the watermark: unread on every worker
+    new = _observations(["2024-01-03"])
+    added = first.ingest(new, "v3")[0]["id"]
+    second.ingest(new, "v3")
+    assert not _read(first, "user-1")[added]
+    assert not _read(second, "user-1")[added]
+
+
+def test_anonymous_callers_cannot_mark_alerts_read():
+    from api.routes.alerts import mark_alert_read, mark_all_alerts_read
+
+    with pytest.raises(HTTPException) as error:
+        mark_alert_read("alert-forecast-1", current_user=None)
+    assert error.value.status_code == 401
+    with pytest.raises(HTTPException) as error:
+        mark_all_alerts_read(current_user=None)
+    assert error.value.status_code == 401
+
+
+def test_unread_queries_start_at_the_read_floor(monkeypatch):
+    engine = AlertEngine()
+    engine.rebuild(_observations(pd.date_range("2024-01-01", periods=200)), "v1")
+    # Loaded before the reads below, so those reach it incrementally
+    assert len(engine.query("user-1", limit=500, unread_only=True)) == len(engine._alerts) - 1
+
+    writer = AlertEngine()
+    writer.rebuild(_observations(pd.date_range("2024-01-01", periods=200)), "v1")
+    writer.mark_all_read("user-1")
+    added = [alert["id"] for alert in writer.ingest(_observations(pd.date_range("2024-08-01", periods=20)), "v2")]
+    engine.ingest(_observations(pd.date_range("2024-08-01", periods=20)), "v2")
+    writer.query("user-1")
+    for alert_id in added[:10]:
+        writer.mark_read("user-1", alert_id)
+
+    checked = []
+    is_read = engine._is_read
+    monkeypatch.setattr(engine, "_is_read", lambda reads, alert_id: checked.append(alert_id) or is_read(reads, alert_id))
+    unread = {alert["id"] for alert in engine.query("user-1", limit=500, unread_only=True, category="threshold")}
+    assert unread == set(added[10:])
+    # Only alerts issued with or after the last ingest are looked at
+    assert len(checked) < 2 * (len(added) + 3)
+
+    # Same newest-first order as filtering the full listing
+    expected = [alert for alert in engine.query("user-1", limit=500) if not alert["read"]][:5]
+    assert engine.query("user-1", limit=5, unread_only=True) == expected
+
+
+def test_read_state_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(alerts_module, "ALERT_READS_CACHE_SIZE", 2)
+    engine = AlertEngine()
+    engine.rebuild(_observations(["2024-01-01"]), "v1")
+    for user in ("user-1", "user-2", "user-1", "user-3"):
+        engine.query(user)
+    assert list(engine._reads) == ["user-1", "user-3"]
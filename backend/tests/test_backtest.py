@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.utils.backtest import forecast_origins, run_backtest, select_origins
+from api.utils.forecast_utils import create_feature, recursive_forecast
+
+
+class LastObservationModel:
+    """Predicts lag_1, so a forecast from row i repeats y[i - 1] at every step."""
+
+    def __init__(self, columns):
+        self.lag_1 = list(columns).index("lag_1")
+
+    def predict(self, matrix):
+        return matrix[:, self.lag_1].copy()
+
+
+def _series(rows=120):
+    dates = pd.date_range("2024-01-01", periods=rows, freq="D")
+    return pd.DataFrame({"Date": dates, "Pest Count/Damage": np.arange(rows, dtype=np.float64)})
+
+
+def test_steps_are_scored_against_the_following_observations():
+    features, y = create_feature(_series())
+    stats = run_backtest(LastObservationModel(features.columns), features, y, horizon=5, origins=40, workers=1)
+    # Step h from origin i predicts y[i - 1] and is scored against y[i + h]
+    # (a count series, so the error is exactly h + 1)
+    for row in stats["per_horizon"]:
+        assert row["mae"] == pytest.approx(row["horizon"] + 1)
+        assert row["bias"] == pytest.approx(row["horizon"] + 1)
+        assert row["residual_std"] == pytest.approx(0.0)
+
+
+def test_origins_leave_a_full_horizon_after_them():
+    positions = select_origins(rows=50, horizon=10, origins=100)
+    assert positions[0] == 0
+    assert positions[-1] + 1 + 10 - 1 == 49
+    with pytest.raises(ValueError):
+        select_origins(rows=10, horizon=10, origins=5)
+
+
+class ShrinkingModel(LastObservationModel):
+    """lag_1 - 4: recursive forecasts go below zero within a few steps unless clipped."""
+
+    def predict(self, matrix):
+        return matrix[:, self.lag_1] - 4.0
+
+
+def test_backtest_runs_the_served_forecaster():
+    features, _ = create_feature(_series(40))
+    model = ShrinkingModel(features.columns)
+    columns = {name: i for i, name in enumerate(features.columns)}
+    positions = [0, 10, len(features) - 1]
+
+    backtested = forecast_origins(model, features.to_numpy(dtype=np.float64)[positions], columns, 12)
+    for row, origin in zip(backtested, positions):
+        served = recursive_forecast(model, features.iloc[: origin + 1], 12, intervals="fixed")
+        assert row.tolist() == pytest.approx(list(served["forecast"].values()))
+    assert (backtested == 0).any() and (backtested >= 0).all()
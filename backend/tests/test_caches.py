@@ -0,0 +1,120 @@
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from api.data_loader import append_observations, get_dataset_version
+from api.middleware import compression, conditional
+from api.middleware.compression import CompressionMiddleware
+from api.middleware.conditional import ConditionalGetMiddleware
+from api.utils.result_cache import query_cache
+from api.utils.single_flight import SingleFlight, filter_key
+
+from conftest import next_observation
+
+
+@pytest.fixture
+def compressions(monkeypatch):
+    calls = []
+    compress = compression.compress
+
+    def counting(body, encoding):
+        calls.append(encoding)
+        return compress(body, encoding)
+
+    monkeypatch.setattr(compression, "compress", counting)
+    monkeypatch.setattr(compression, "payload_cache", compression.CompressedPayloadCache())
+    return calls
+
+
+@pytest.fixture
+def client(monkeypatch):
+    versions = {"dataset": "d1", "model": "m1", "intervals": "default"}
+    for source in versions:
+        monkeypatch.setitem(conditional.VERSION_SOURCES, source, lambda source=source: versions[source])
+    app = FastAPI()
+
+    @app.get("/forecast/predict")
+    def predict():
+        return {"values": list(range(2000)), "dataset": versions["dataset"]}
+
+    @app.get("/untagged")
+    def untagged():
+        return {"values": list(range(2000))}
+
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    client = TestClient(app)
+    client.versions = versions
+    return client
+
+
+def test_compressed_payloads_are_cached_per_etag_and_encoding(client, compressions):
+    for encoding in ("br", "gzip", "br", "gzip"):
+        response = client.get("/forecast/predict", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert response.json()["dataset"] == "d1"
+    assert compressions == ["br", "gzip"]
+
+    # A new version is a new ETag: compressed again, never served stale
+    client.versions["dataset"] = "d2"
+    response = client.get("/forecast/predict", headers={"Accept-Encoding": "br"})
+    assert response.json()["dataset"] == "d2"
+    assert compressions == ["br", "gzip", "br"]
+
+
+def test_responses_without_etag_are_not_cached(client, compressions):
+    for _ in range(2):
+        assert client.get("/untagged", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+    assert compressions == ["gzip", "gzip"]
+    assert not compression.payload_cache.entries
+
+
+def test_ingest_invalidates_result_cache_and_single_flight(dataset):
+    flight = SingleFlight("test_invalidation", ttl=60)
+    computed = []
+
+    def compute(value):
+        computed.append(value)
+        return value
+
+    key = filter_key("2020-1-1", None, "All", None, route="test")
+    assert key == filter_key("2020-01-01", "", None, "All", route="test")
+    query_cache.put(key, {"rows": 1})
+    assert flight.do(key, compute, "first") == "first"
+    assert flight.do(key, compute, "again") == "first"
+
+    before = get_dataset_version()
+    invalidations = query_cache.invalidations
+    append_observations(next_observation(dataset))
+    assert get_dataset_version() != before
+
+    assert query_cache.invalidations == invalidations + 1
+    assert query_cache.get(key) is None
+    assert flight.do(key, compute, "after") == "after"
+    # Keys carry the version, so new requests never reach the old entries
+    new_key = filter_key("2020-1-1", None, "All", None, route="test")
+    assert new_key != key
+    assert flight.do(new_key, compute, "new") == "new"
+
+
+def test_async_results_are_sized_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    from api.utils import result_cache
+    from api.utils.executors import aggregation_executor
+
+    threads = []
+    estimate = result_cache.estimate_size
+    monkeypatch.setattr(result_cache, "estimate_size", lambda value: threads.append(threading.current_thread()) or estimate(value))
+    cache = result_cache.LRUResultCache("test", 1 << 20)
+
+    async def lookup():
+        return await cache.get_or_compute_async(
+            "key", aggregation_executor.run, result_cache.sized(lambda: {"values": list(range(100))}),
+        ), threading.current_thread()
+
+    value, loop_thread = asyncio.run(lookup())
+    assert value == {"values": list(range(100))}
+    assert cache.bytes == estimate(value)
+    assert len(threads) == 1 and threads[0] is not loop_thread
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from api.middleware import conditional
+from api.middleware.compression import CompressionMiddleware
+from api.middleware.conditional import ConditionalGetMiddleware
+from api.utils import forecast_utils
+from api.utils.backtest import save_error_stats
+
+PAYLOAD = {"values": list(range(2000))}
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = {"dataset": "d1", "model": "m1", "intervals": "default"}
+    for source in versions:
+        monkeypatch.setitem(conditional.VERSION_SOURCES, source, lambda source=source: versions[source])
+    return versions
+
+
+@pytest.fixture
+def client(versions):
+    app = FastAPI()
+
+    @app.get("/forecast/predict")
+    def predict(bump: bool = False):
+        if bump:
+            # The dataset changes while the response is being produced
+            versions["dataset"] = "d2"
+        return PAYLOAD
+
+    # Compression outside ConditionalGet, as in app.py
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def test_matching_etag_is_answered_with_304(client, versions):
+    identity = {"Accept-Encoding": "identity"}
+    first = client.get("/forecast/predict", headers=identity)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json() == PAYLOAD
+
+    cached = client.get("/forecast/predict", headers={**identity, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    versions["model"] = "m2"
+    changed = client.get("/forecast/predict", headers={**identity, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_encoding_suffix_is_stripped_when_revalidating(client, encoding):
+    response = client.get("/forecast/predict", headers={"Accept-Encoding": encoding})
+    etag = response.headers["etag"]
+    assert response.headers["content-encoding"] == encoding
+    assert etag.endswith(f'-{encoding}"')
+
+    for tag in (etag, f"W/{etag}", f'"other", {etag}'):
+        cached = client.get("/forecast/predict", headers={"Accept-Encoding": encoding, "If-None-Match": tag})
+        assert cached.status_code == 304
+
+
+def test_response_racing_a_version_change_has_no_etag(client, versions):
+    response = client.get("/forecast/predict?bump=true", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and response.json() == PAYLOAD
+    assert "etag" not in response.headers
+    # The next response is tagged with the new version again
+    assert "etag" in client.get("/forecast/predict?bump=true").headers
+
+
+def test_error_stats_version_is_cached_until_the_writer_invalidates_it(tmp_path, monkeypatch):
+    path = tmp_path / "forecast_error.json"
+    monkeypatch.setattr(forecast_utils, "ERROR_STATS_PATH", path)
+    monkeypatch.setattr(forecast_utils, "get_model_fingerprint", lambda: "m1")
+    forecast_utils.invalidate_error_stats()
+    assert forecast_utils.get_error_stats_version() == "default"
+
+    save_error_stats({"model_fingerprint": "m1", "per_horizon": []}, path)
+    version = forecast_utils.get_error_stats_version()
+    assert version != "default"
+
+    # Written by another process: not stat()ed again until the recheck interval
+    path.write_text(json.dumps({"model_fingerprint": "m1", "per_horizon": [], "origins": 5}))
+    assert forecast_utils.get_error_stats_version() == version
+    monkeypatch.setattr(forecast_utils, "ERROR_STATS_RECHECK", 0)
+    assert forecast_utils.get_error_stats_version() != version
+    forecast_utils.invalidate_error_stats()
@@ -0,0 +1,16 @@
+import io
+
+from api.data_loader import append_observations, get_dataset
+from api.utils.dataset_schema import read_dataset
+
+from conftest import next_observation
+
+
+def test_pest_counts_keep_their_decimal_values(dataset):
+    csv = (
+        "Date,Year,Season,Field Stage,Pest,Pest Count/Damage,Threshold Status,Action,Threshold\n"
+        "2024-01-01,2024.0,Dry,Tillering,Black Rice Bug,3.7,Below Threshold,0,5\n"
+    )
+    assert read_dataset(io.StringIO(csv))["Pest Count/Damage"].tolist() == [3.7]
+    append_observations(next_observation(dataset, **{"Pest Count/Damage": 3.7}))
+    assert get_dataset()["Pest Count/Damage"].iloc[-1] == 3.7
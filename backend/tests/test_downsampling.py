@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.utils.downsampling import _chart_history, chart_history, lttb
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[321] = 25.0
+    keep = lttb(x, y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+    assert 321 in keep
+    assert (lttb(x, y, 2000) == x).all()
+
+
+def test_chart_history_extremes_cover_points_lttb_drops():
+    # Noise: with 50 of 1000 points LTTB keeps neither the peak nor the trough
+    values = np.random.default_rng(3).normal(10.0, 3.0, 1000)
+    df = pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=len(values), freq="D"),
+        "Pest Count/Damage": values,
+    })
+    keep = lttb(np.arange(len(values)), values, 50)
+    assert values[keep].max() < values.max() and values[keep].min() > values.min()
+
+    # Uncached: chart_history keys its cache by the loaded dataset's version
+    history = _chart_history(df, None, 50)
+    assert len(history["actual"]) == 50
+    assert history["max_pest_count"] == values.max()
+    assert history["min_pest_count"] == values.min()
+
+
+def test_chart_history_window_and_point_count(dataset):
+    full = chart_history(dataset, None, 0)
+    assert len(full["actual"]) == len(dataset)
+
+    days = 60
+    window = chart_history(dataset, days, 0)
+    first = pd.Timestamp(window["current_dates"][0])
+    assert pd.Timestamp(window["current_dates"][-1]) - first < pd.Timedelta(days=days)
+
+    reduced = chart_history(dataset, None, 100)
+    assert len(reduced["actual"]) == 100
+    assert reduced["max_pest_count"] == full["max_pest_count"]
+    assert reduced["min_pest_count"] == full["min_pest_count"]
+    assert reduced["current_dates"][0] == full["current_dates"][0]
+    assert reduced["current_dates"][-1] == full["current_dates"][-1]
+
+
+@pytest.mark.parametrize("path", ["/forecast/predict", "/dashboard/forecast"])
+def test_forecast_endpoints_downsample_history(api_client, dataset, path):
+    full = api_client.get(path).json()["data"]
+    reduced = api_client.get(path, params={"max_points": 50}).json()["data"]
+    recent = api_client.get(path, params={"history_days": 30, "max_points": 500}).json()["data"]
+
+    assert len(full["actual"]) == len(dataset)
+    assert len(reduced["actual"]) == len(reduced["current_dates"]) == 50
+    assert reduced["max_pest_count"] == full["max_pest_count"]
+    assert reduced["min_pest_count"] == full["min_pest_count"]
+    assert len(recent["actual"]) <= 500
+    assert recent["current_dates"][-1] == full["current_dates"][-1]
+    assert pd.Timestamp(recent["current_dates"][0]) > pd.Timestamp(full["current_dates"][-1]) - pd.Timedelta(days=30)
+
+    assert api_client.get(path, params={"max_points": 2}).status_code == 422
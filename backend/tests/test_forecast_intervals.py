@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.utils.backtest import run_backtest
+from api.utils.forecast_utils import create_feature, recursive_forecast
+
+
+class LagModel:
+    """Predicts the previous value (a random walk), so errors compound."""
+
+    def __init__(self, columns):
+        self.lag = list(columns).index("lag_1")
+
+    def predict(self, matrix):
+        return np.asarray(matrix)[:, self.lag]
+
+
+class ConstantModel:
+    """Always predicts `value` (the mean of the synthetic series)."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, matrix):
+        return np.full(len(matrix), self.value, dtype=np.float32)
+
+
+def _noisy_counts(rows, mean=10.0, std=2.0, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=rows, freq="D"),
+        "Pest Count/Damage": mean + rng.normal(0.0, std, size=rows),
+    })
+
+
+def _bands(forecast):
+    return [
+        np.array(list(forecast[key].values()))
+        for key in ("ci_lower", "forecast", "ci_upper")
+    ]
+
+
+def test_simulated_intervals_cover_held_out_observations():
+    features, y = create_feature(_noisy_counts(900))
+    model = ConstantModel(10.0)
+    horizon, cut = 5, 500
+    residuals = run_backtest(model, features[:cut], y[:cut], horizon, origins=300, workers=1)["residuals"]
+
+    inside = []
+    for origin in range(cut, len(features) - horizon - 1, 4):
+        lower, _, upper = _bands(recursive_forecast(
+            model, features[: origin + 1], horizon, intervals="simulation", residuals=residuals,
+        ))
+        observed = y.to_numpy()[origin + 1: origin + 1 + horizon]
+        inside.extend((lower <= observed) & (observed <= upper))
+    assert 0.9 <= np.mean(inside) <= 0.99
+
+
+@pytest.mark.parametrize("intervals", ["fixed", "simulation"])
+@pytest.mark.parametrize("value", [-0.5, 0.2, 8.0])
+def test_bounds_enclose_a_non_negative_forecast(intervals, value):
+    features, _ = create_feature(_noisy_counts(60))
+    # Residuals skewed to one side put both simulated quantiles above the point
+    residuals = np.abs(np.random.default_rng(0).normal(3.0, 1.0, size=50))
+    lower, point, upper = _bands(recursive_forecast(
+        ConstantModel(value), features, 10, intervals=intervals, residuals=residuals,
+    ))
+    assert (point >= 0).all() and (lower >= 0).all()
+    assert (lower <= point).all() and (point <= upper).all()
+
+
+def test_simulated_paths_propagate_through_the_lags():
+    features, _ = create_feature(_noisy_counts(60, mean=50.0))
+    residuals = np.random.default_rng(2).normal(0.0, 1.0, size=500)
+    lower, point, upper = _bands(recursive_forecast(
+        LagModel(features.columns), features, 30, intervals="simulation", residuals=residuals,
+    ))
+    width = upper - lower
+    # A random walk of unit steps: the band grows like sqrt(step), far
+    # beyond the one-step residual spread it would keep without feedback
+    assert np.allclose(point, point[0])
+    assert width[-1] > 4 * width[0]
+    assert np.all(np.diff(width[::5]) > 0)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from api.data_loader import append_observations, get_dataset
+from api.utils.data_transformer import action_mask
+from api.utils.rollups import get_rollups
+
+from conftest import next_observation
+
+
+def _expected(df, bucket):
+    """Per-bucket totals straight from the rows."""
+    day = df["Date"].dt.normalize()
+    if bucket == "week":
+        start = day - pd.to_timedelta(day.dt.weekday, unit="D")
+    else:
+        start = day.dt.to_period("M").dt.start_time
+    frame = pd.DataFrame({
+        "start": start.dt.strftime("%Y-%m-%d"),
+        "value": df["Pest Count/Damage"].astype(float),
+        "action": action_mask(df).astype(int),
+    })
+    grouped = frame.groupby("start").agg(
+        observations=("value", "size"), sum=("value", "sum"), max=("value", "max"), actions=("action", "sum"),
+    )
+    return {start: tuple(row) for start, row in zip(grouped.index, grouped.itertuples(index=False))}
+
+
+def _actual(records):
+    return {
+        record["start"]: (record["observations"], record["sum"], record["max"], record["actions"])
+        for record in records
+    }
+
+
+def _assert_matches(df, bucket):
+    expected = _expected(df, bucket)
+    actual = _actual(get_rollups().query(bucket))
+    assert actual.keys() == expected.keys()
+    for start, (observations, total, peak, actions) in expected.items():
+        assert actual[start][0] == observations
+        assert np.isclose(actual[start][1], total)
+        assert actual[start][2] == peak
+        assert actual[start][3] == actions
+
+
+def test_rollups_follow_appends(dataset):
+    for bucket in ("week", "month"):
+        _assert_matches(dataset, bucket)
+    seasons_before = get_rollups().query("season")
+
+    # One row inside the last week, one starting a new month (and week)
+    last = dataset["Date"].iloc[-1]
+    days_to_next_month = (last + pd.offsets.MonthBegin(1) - last).days
+    append_observations(next_observation(dataset, days=0, **{"Pest Count/Damage": 9999.0}))
+    append_observations(next_observation(dataset, days=days_to_next_month, **{"Pest Count/Damage": 1.0}))
+
+    df = get_dataset()
+    for bucket in ("week", "month"):
+        _assert_matches(df, bucket)
+    assert get_rollups().query("month")[-1]["start"] == (last + pd.offsets.MonthBegin(1)).strftime("%Y-%m-%d")
+
+    # Same season label within SEASON_GAP_DAYS: the last season run grows
+    seasons = get_rollups().query("season")
+    assert len(seasons) == len(seasons_before)
+    assert sum(s["observations"] for s in seasons) == len(df)
+    assert max(s["max"] for s in seasons) == 9999.0
+
+
+def test_range_query_flags_partial_buckets(dataset):
+    rollups = get_rollups()
+    weeks = rollups.query("week")
+    middle = weeks[len(weeks) // 2]
+    start = pd.Timestamp(middle["start"]) + pd.Timedelta(days=2)
+    records = rollups.query("week", start=start, end=start + pd.Timedelta(days=20))
+    assert records[0]["start"] == middle["start"] and records[0]["partial"]
+    inside = dataset[(dataset["Date"] >= start) & (dataset["Date"] <= start + pd.Timedelta(days=20))]
+    assert sum(record["observations"] for record in records) == len(inside)
+
+
+def test_timeseries_endpoint_reflects_appends(api_client, dataset):
+    before = api_client.get("/dashboard/timeseries", params={"bucket": "month"}).json()["data"]["buckets"]
+    append_observations(next_observation(dataset, days=0))
+    after = api_client.get("/dashboard/timeseries", params={"bucket": "month"}).json()["data"]["buckets"]
+    assert after[-1]["observations"] == before[-1]["observations"] + 1
+    assert api_client.get("/dashboard/timeseries", params={"bucket": "year"}).status_code == 422
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.model_loader import file_fingerprint, get_model_fingerprint, latest_model_file, read_model_metadata
+from api.utils import training
+from api.utils.forecast_utils import create_feature
+
+GRID = {"max_depth": [2, 3], "learning_rate": [0.3]}
+
+
+@pytest.fixture(scope="module")
+def history():
+    rng = np.random.default_rng(0)
+    days = np.arange(300)
+    df = pd.DataFrame({
+        "Date": pd.date_range("2023-01-01", periods=len(days), freq="D"),
+        "Pest Count/Damage": 10 + 5 * np.sin(days / 10.0) + rng.normal(0, 0.5, len(days)),
+    })
+    return create_feature(df)
+
+
+def test_full_training_searches_the_grid(history):
+    features, y = history
+    model, details = training.train_full(features, y, grid=GRID, workers=1)
+    assert details["candidates"] == 2
+    assert [result["rmse"] for result in details["search"]] == sorted(r["rmse"] for r in details["search"])
+    assert details["params"]["n_estimators"] == model.get_booster().num_boosted_rounds()
+    assert details["validation"]["rmse"] == details["search"][0]["rmse"]
+
+
+def test_warm_start_adds_rounds_on_new_rows_only(history):
+    features, y = history
+    since = features.index[-60]
+    old = np.asarray(features.index <= since)
+    base, _ = training.train_full(features[old], y[old], grid=GRID, workers=1)
+    base_rounds = base.get_booster().num_boosted_rounds()
+
+    model, details = training.train_warm_start(base, features, y, since, rounds=7,
+                                               base_params={"max_depth": 2, "n_jobs": 4})
+    assert model.get_booster().num_boosted_rounds() == base_rounds + 7
+    assert details["new_rows"] == int((features.index > since).sum())
+    assert details["params"] == {"max_depth": 2, "n_estimators": 7}
+    assert details["new_rows_after"]["rmse"] <= details["new_rows_before"]["rmse"]
+    with pytest.raises(ValueError):
+        training.train_warm_start(base, features, y, features.index[-1], rounds=7)
+
+
+def test_warm_start_since():
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        "Source": ["data1", "ingest", "ingest"],
+    })
+    assert training._warm_start_since(df, {"trained_through": "2023-12-31"}) == pd.Timestamp("2023-12-31")
+    assert training._warm_start_since(df, {}) == pd.Timestamp("2024-01-01")
+    with pytest.raises(ValueError):
+        training._warm_start_since(df.assign(Source="data1"), {})
+
+
+def test_save_local_writes_metadata_and_versions(history, tmp_path):
+    features, y = history
+    model, details = training.train_full(features, y, grid={"max_depth": [2]}, workers=1)
+    first = training.save_local(model, {"version": "v1", **details}, folder=tmp_path)
+    second = training.save_local(model, {"version": "v1", **details}, folder=tmp_path)
+
+    assert first.name == f"{training.MODEL_PREFIX}-v1.json"
+    assert second.name == f"{training.MODEL_PREFIX}-v1-1.json"
+    json.loads(first.read_text())  # JSON model format, chosen from the extension
+    metadata = read_model_metadata(second)
+    assert metadata["version"] == "v1-1"
+    assert metadata["fingerprint"] == file_fingerprint(second)
+    assert latest_model_file(tmp_path) in (first, second)
+    assert not [path for path in tmp_path.iterdir() if path.is_dir()]
+
+
+def test_retrain_warm_start_records_its_base(dataset):
+    features, _ = create_feature(dataset)
+    metadata = training.retrain("warm_start", publish=None, since=features.index[-30], rounds=3)
+    assert metadata["mode"] == "warm_start"
+    assert metadata["base_fingerprint"] == get_model_fingerprint()
+    assert metadata["trained_through"] == features.index[-1].strftime("%Y-%m-%d")
+    assert metadata["rows"] == len(features)
+    assert "file" not in metadata
+
+
+def test_one_training_run_at_a_time():
+    with training._training_lock:
+        with pytest.raises(training.TrainingBusy):
+            training.retrain("full", publish=None)
+    with pytest.raises(ValueError):
+        training.retrain("partial", publish=None)
+
+
+def test_training_runs_on_its_own_pool(monkeypatch):
+    import asyncio
+    import threading
+
+    from api.routes import admin
+
+    threads = []
+    monkeypatch.setattr(admin, "_train_model", lambda *args: threads.append(threading.current_thread().name) or {})
+    asyncio.run(admin.train_model(mode="full", publish="none", activate=False, since=None, current_user={}))
+    assert threads[0].startswith("training-pool")
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from api.middleware.static_cache import IMMUTABLE_CACHE_CONTROL, CachedStaticFiles
+from api.utils import upload_storage
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_storage, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def _photo(size=(1600, 1200), color=(200, 40, 40)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_store_photo_resizes_once_under_its_content_hash(upload_dir, monkeypatch):
+    photo = _photo()
+    path = upload_storage.store_photo(photo)
+    digest = upload_storage.content_hash(photo)
+    assert path == f"/uploads/{digest}.jpg"
+    with Image.open(upload_dir / f"{digest}.jpg") as image:
+        assert image.format == "JPEG"
+        assert max(image.size) <= max(upload_storage.PHOTO_MAX_SIZE)
+
+    # The same bytes again: no second processing
+    monkeypatch.setattr(upload_storage, "_process_photo", lambda contents: pytest.fail("processed twice"))
+    assert upload_storage.store_photo(photo) == path
+
+
+def test_unreadable_photo_is_stored_as_uploaded(upload_dir):
+    path = upload_storage.store_photo(b"not an image")
+    assert (upload_dir / path.rsplit("/", 1)[1]).read_bytes() == b"not an image"
+
+
+def test_hashed_uploads_are_served_immutable(upload_dir):
+    photo = _photo()
+    path = upload_storage.store_photo(photo)
+    (upload_dir / "legacy.jpg").write_bytes(b"legacy")
+    client = TestClient(Starlette(routes=[Mount("/uploads", CachedStaticFiles(directory=str(upload_dir)))]))
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept"
+    digest = upload_storage.content_hash(photo)
+    etag = response.headers["etag"]
+    assert etag == f'"{digest}"'
+
+    revalidated = client.get(path, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+    # Pillow builds without WebP store no variant
+    if (upload_dir / f"{digest}.webp").exists():
+        webp = client.get(path, headers={"Accept": "image/webp,*/*"})
+        assert webp.headers["content-type"] == "image/webp"
+        assert webp.headers["etag"] != etag
+
+    assert client.get("/uploads/legacy.jpg").headers.get("cache-control") != IMMUTABLE_CACHE_CONTROL